@@ -0,0 +1,303 @@
+"""
+Mede o desempenho do scrape e das consultas sem acessar o jupiter:
+
+- parse: páginas sinteticas de carreiras e de curso de benchmarks/fixtures,
+  em unidades/s, cursos/s e disciplinas/s;
+- construção: custo de construir os CursoUsp e DisciplinaUsp de cada curso
+  a partir dos valores extraidos;
+- memoria: bytes por curso e por disciplina de um catalogo sintetico do
+  tamanho da USP, e dos indices de busca e sugestões;
+- consultas: latencia de cada funcionalidade do shell sobre esse catalogo.
+
+Os resultados são escritos em JSON, e execuções diferentes podem ser
+comparadas com --comparar. Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.bench_catalogo --saida resultados.json
+python3 -m benchmarks.bench_catalogo --saida novos.json --comparar resultados.json
+"""
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import pathlib
+import platform
+import random
+import statistics
+import subprocess
+import time
+import timeit
+import tracemalloc
+
+from src.CursoUsp import CursoUsp
+from src.DisciplinaUsp import DisciplinaUsp
+from src.EnsinoUsp import EnsinoUsp
+from src.ParserUsp import extrair_curso, extrair_unidades
+from src.RegistroUsp import RegistrosUsp
+from src.UnidadeUsp import UnidadeUsp
+
+FIXTURES = pathlib.Path(__file__).parent / 'fixtures'
+
+VERSAO_DOS_RESULTADOS = 1
+
+MODALIDADES = ('Disciplinas Obrigatórias', 'Disciplinas Optativas Livres', 'Disciplinas Optativas Eletivas')
+
+PALAVRAS = ('Álgebra', 'Linear', 'Cálculo', 'Geometria', 'Analítica', 'Estatística', 'Probabilidade',
+            'Programação', 'Estruturas', 'Dados', 'Sistemas', 'Operacionais', 'Redes', 'Computadores',
+            'Banco', 'Teoria', 'Grafos', 'Compiladores', 'Física', 'Química', 'Equações', 'Diferenciais',
+            'Ordinárias', 'Numérica', 'Inteligência', 'Artificial', 'Engenharia', 'Software', 'Introdução',
+            'Laboratório', 'Arquitetura', 'Análise', 'Direito', 'Economia', 'História', 'Biologia')
+
+def medir(funcao, repeticoes : int) -> float:
+    """
+    Menor tempo medio, em segundos, de uma chamada da função em 5 rodadas.
+    """
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes
+
+def medir_parse() -> dict:
+    resultados = {}
+
+    pagina = (FIXTURES / 'carreira.html').read_text(encoding='utf-8')
+    unidades = len(extrair_unidades(pagina))
+    tempo = medir(lambda: extrair_unidades(pagina), 20)
+    resultados['carreira.html'] = {'unidades' : unidades, 'segundos_por_pagina' : tempo,
+                                   'unidades_por_segundo' : unidades / tempo}
+
+    for arquivo in sorted(FIXTURES.glob('curso_*.html')):
+        pagina = arquivo.read_text(encoding='utf-8')
+        disciplinas = len(extrair_curso(pagina)[1])
+        tempo = medir(lambda: extrair_curso(pagina), 20)
+        resultados[arquivo.name] = {'disciplinas' : disciplinas, 'segundos_por_pagina' : tempo,
+                                    'cursos_por_segundo' : 1 / tempo, 'disciplinas_por_segundo' : disciplinas / tempo}
+    return resultados
+
+def medir_construcao() -> dict:
+    # O _construir_curso só utiliza o filtro do EnsinoUsp, então uma instância vazia é suficiente
+    ensino = EnsinoUsp._sem_scrape()
+    resultados = {}
+    for arquivo in sorted(FIXTURES.glob('curso_*.html')):
+        duracoes, linhas = extrair_curso(arquivo.read_text(encoding='utf-8'))
+        tempo = medir(lambda: ensino._construir_curso('Curso', 'Unidade - ( U )', duracoes, linhas), 200)
+        resultados[arquivo.name] = {'disciplinas' : len(linhas), 'segundos_por_curso' : tempo,
+                                    'segundos_por_disciplina' : tempo / max(len(linhas), 1)}
+    return resultados
+
+def _nome(aleatorio : random.Random, palavras : int) -> str:
+    return ' '.join(aleatorio.choice(PALAVRAS) for _ in range(palavras))
+
+def gerar_catalogo(unidades : int, cursos_por_unidade : int, disciplinas_por_curso : int,
+                   semente : int = 19) -> EnsinoUsp:
+    """
+    Gera um catalogo sintetico pelo mesmo caminho do scrape: cada curso é
+    construido a partir de linhas como as extraidas das páginas e cada
+    unidade é mesclada ao catalogo. Parte das disciplinas de cada curso é
+    da propria unidade e parte é compartilhada com as outras unidades.
+    """
+    aleatorio = random.Random(semente)
+    ensino = EnsinoUsp._sem_scrape()
+
+    def disciplina(prefixo : str, numero : int) -> tuple:
+        codigo = f'{prefixo}{numero:04d}'
+        aleatorio_da_disciplina = random.Random(codigo)
+        creditos = aleatorio_da_disciplina.choice(('2', '4', '6'))
+        return (codigo, _nome(aleatorio_da_disciplina, 4), creditos, aleatorio_da_disciplina.choice(('0', '1', '2')),
+                str(int(creditos) * 15), '', aleatorio_da_disciplina.choice(('', '30')), '')
+
+    compartilhadas = [disciplina('GER', numero) for numero in range(disciplinas_por_curso * 10)]
+    for numero_da_unidade in range(unidades):
+        sigla = f'U{numero_da_unidade:02d}'
+        unidade = f'Unidade {_nome(aleatorio, 2)} {numero_da_unidade} - ( {sigla} )'
+        proprias = [disciplina(f'{sigla}D', numero) for numero in range(disciplinas_por_curso * 4)]
+
+        resultados = []
+        for numero_do_curso in range(cursos_por_unidade):
+            curso = f'Bacharelado em {_nome(aleatorio, 3)} {numero_da_unidade}-{numero_do_curso} - integral'
+            grade = aleatorio.sample(proprias, disciplinas_por_curso * 3 // 4) + \
+                    aleatorio.sample(compartilhadas, disciplinas_por_curso - disciplinas_por_curso * 3 // 4)
+            linhas = [(MODALIDADES[0] if indice < len(grade) * 6 // 10 else
+                       MODALIDADES[1] if indice < len(grade) * 85 // 100 else MODALIDADES[2], valores)
+                      for indice, valores in enumerate(grade)]
+            duracoes = (str(aleatorio.choice((8, 10))), '8', str(aleatorio.choice((12, 14, 16))))
+            resultados.append(ensino._construir_curso(curso, unidade, duracoes, linhas))
+
+        ensino._mesclar_unidade((UnidadeUsp(unidade, {curso.get_curso() for curso, _ in resultados}, ensino._registros),
+                                 resultados))
+    return ensino
+
+def medir_memoria(unidades : int, cursos_por_unidade : int, disciplinas_por_curso : int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+
+    registros = RegistrosUsp()
+    disciplinas = [DisciplinaUsp((f'MEM{numero:05d}', f'Disciplina {numero}', '4', '0', '60', '', '', ''), 'Curso',
+                                 registros)
+                   for numero in range(20000)]
+    bytes_por_disciplina = tracemalloc.get_traced_memory()[0] / len(disciplinas)
+    del disciplinas
+    gc.collect()
+
+    inicio = tracemalloc.get_traced_memory()[0]
+    cursos = []
+    for numero in range(2000):
+        curso = CursoUsp(f'Curso de memoria {numero}', 'Unidade - ( U )', ('8', '8', '12'), registros)
+        curso.add_disciplinas((MODALIDADES[codigo % 3], f'MEM{codigo:05d}') for codigo in range(disciplinas_por_curso))
+        cursos.append(curso)
+    bytes_por_curso = (tracemalloc.get_traced_memory()[0] - inicio) / len(cursos)
+    del cursos
+    gc.collect()
+
+    inicio = tracemalloc.get_traced_memory()[0]
+    ensino = gerar_catalogo(unidades, cursos_por_unidade, disciplinas_por_curso)
+    bytes_do_catalogo = tracemalloc.get_traced_memory()[0] - inicio
+    ensino._construir_indices()
+    bytes_dos_indices = tracemalloc.get_traced_memory()[0] - inicio - bytes_do_catalogo
+    tracemalloc.stop()
+
+    registros = len(ensino.cursos) + len(ensino.disciplinas)
+    return {'bytes_por_disciplina' : bytes_por_disciplina, 'bytes_por_curso' : bytes_por_curso,
+            'bytes_do_catalogo' : bytes_do_catalogo, 'bytes_dos_indices' : bytes_dos_indices,
+            'bytes_por_registro_do_catalogo' : bytes_do_catalogo / registros}
+
+def _latencias(funcao, argumentos : list, tempo_maximo : float, amostras_maximas : int) -> dict:
+    tempos = []
+    limite = time.perf_counter() + tempo_maximo
+    while len(tempos) < amostras_maximas and (len(tempos) < 5 or time.perf_counter() < limite):
+        argumento = argumentos[len(tempos) % len(argumentos)]
+        inicio = time.perf_counter_ns()
+        funcao(argumento)
+        tempos.append((time.perf_counter_ns() - inicio) / 1000)
+
+    tempos.sort()
+    return {'amostras' : len(tempos), 'media_us' : statistics.fmean(tempos),
+            'p50_us' : tempos[len(tempos) // 2], 'p95_us' : tempos[int(len(tempos) * 0.95)]}
+
+def medir_consultas(ensino : EnsinoUsp, tempo_maximo : float) -> dict:
+    aleatorio = random.Random(7)
+    cursos = aleatorio.sample(list(ensino.cursos), min(200, len(ensino.cursos)))
+    codigos = aleatorio.sample(list(ensino.disciplinas), min(200, len(ensino.disciplinas)))
+    nomes = [ensino.disciplinas[codigo].get_nome() for codigo in codigos]
+
+    def nao_encontrado(nome : str, tipo : int):
+        ensino._cursos_ou_disciplinas_proximos_ao_nao_encontrado(nome, tipo)
+
+    # Mesmas chamadas do consulta_de_informacoes para cada funcionalidade
+    funcionalidades = {
+        'lc'                       : (lambda _ : ensino.cursos_por_unidade('texto', os.devnull), [None], 50),
+        'ddtc'                     : (lambda _ : ensino.dados_de_todos_os_cursos('texto', os.devnull), [None], 20),
+        'ddmc'                     : (lambda _ : ensino.disciplinas_usadas_em_mais_de_um_curso('texto', os.devnull), [None], 20),
+        'ddc'                      : (ensino.dados_do_curso, cursos, 100000),
+        'ddc (normalizado)'        : (ensino.dados_do_curso, [curso.upper() for curso in cursos], 100000),
+        'ddc (não encontrado)'     : (lambda nome : nao_encontrado(nome, 0), [curso[:-3] + 'xyz' for curso in cursos], 2000),
+        'ddd cod'                  : (ensino.dados_da_disciplina_codigo, codigos, 100000),
+        'ddd cod (não encontrado)' : (lambda codigo : nao_encontrado(codigo, 2), [codigo[:-1] + 'X' for codigo in codigos], 2000),
+        'ddd nome'                 : (ensino.dados_da_disciplina_nome, nomes, 100000),
+        'ddd nome (não encontrado)': (lambda nome : nao_encontrado(nome, 1), [nome[:-2] + 'zz' for nome in nomes], 2000),
+    }
+    try:
+        ensino.matriz()
+    except ImportError:
+        print('numpy e scipy não estão instalados, o cs não será medido.')
+    else:
+        funcionalidades['cs'] = (ensino.cursos_similares, cursos, 2000)
+
+    resultados = {}
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        for nome, (funcao, argumentos, amostras_maximas) in funcionalidades.items():
+            resultados[nome] = _latencias(funcao, argumentos, tempo_maximo, amostras_maximas)
+    return resultados
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=pathlib.Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _achatar(valores : dict, prefixo : str = '') -> dict[str, float]:
+    achatados = {}
+    for chave, valor in valores.items():
+        if isinstance(valor, dict):
+            achatados.update(_achatar(valor, f'{prefixo}{chave}.'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            achatados[prefixo + chave] = valor
+    return achatados
+
+def comparar(novos : dict, anteriores : dict) -> None:
+    """
+    Imprime a razão entre os valores novos e os anteriores de cada medida.
+    Em tempos e bytes uma razão menor que 1 é uma melhora, em taxas (por segundo) é uma piora.
+    """
+    antigos = _achatar(anteriores)
+    print(f'\n{"medida":<70}{"anterior":>14}{"novo":>14}{"razão":>8}')
+    for chave, valor in _achatar(novos).items():
+        # As medidas têm a unidade no nome (ex: p50_us), as contagens (ex: amostras) não são comparadas
+        if '_' not in chave.rsplit('.', 1)[-1]:
+            continue
+        if chave in antigos and antigos[chave]:
+            print(f'{chave:<70}{antigos[chave]:>14.4g}{valor:>14.4g}{valor / antigos[chave]:>8.2f}')
+
+def imprimir(resultados : dict) -> None:
+    print(f'\n{"parse":<28}{"registros":>10}{"ms/página":>12}{"registros/s":>14}')
+    for pagina, valores in resultados['parse'].items():
+        registros = valores.get('disciplinas', valores.get('unidades'))
+        print(f'{pagina:<28}{registros:>10}{valores["segundos_por_pagina"] * 1000:>12.3f}'
+              f'{registros / valores["segundos_por_pagina"]:>14.0f}')
+
+    print(f'\n{"construção":<28}{"disciplinas":>12}{"us/curso":>12}{"us/disciplina":>15}')
+    for pagina, valores in resultados['construcao'].items():
+        print(f'{pagina:<28}{valores["disciplinas"]:>12}{valores["segundos_por_curso"] * 1e6:>12.1f}'
+              f'{valores["segundos_por_disciplina"] * 1e6:>15.2f}')
+
+    memoria = resultados['memoria']
+    print(f'\nmemoria: {memoria["bytes_por_disciplina"]:.0f} bytes/disciplina, '
+          f'{memoria["bytes_por_curso"]:.0f} bytes/curso, catalogo {memoria["bytes_do_catalogo"] / 2**20:.1f} MiB, '
+          f'indices {memoria["bytes_dos_indices"] / 2**20:.1f} MiB')
+
+    print(f'\n{"consulta":<28}{"amostras":>10}{"p50 (us)":>12}{"p95 (us)":>12}')
+    for consulta, valores in resultados['consultas'].items():
+        print(f'{consulta:<28}{valores["amostras"]:>10}{valores["p50_us"]:>12.1f}{valores["p95_us"]:>12.1f}')
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do parse, da construção, da memoria e das consultas.")
+    parser.add_argument("--saida", metavar="ARQUIVO", default="resultados_bench.json",
+                        help="Arquivo JSON onde os resultados são escritos.")
+    parser.add_argument("--comparar", metavar="ARQUIVO", default=None,
+                        help="Resultados de uma execução anterior para comparar.")
+    parser.add_argument("--unidades", type=int, default=48, help="Unidades do catalogo sintetico.")
+    parser.add_argument("--cursos-por-unidade", type=int, default=20, help="Cursos de cada unidade do catalogo sintetico.")
+    parser.add_argument("--disciplinas-por-curso", type=int, default=60, help="Disciplinas da grade de cada curso.")
+    parser.add_argument("--tempo", type=float, default=1.0, help="Tempo maximo, em segundos, medindo cada consulta.")
+    argumentos = parser.parse_args()
+
+    resultados = {
+        'versao'     : VERSAO_DOS_RESULTADOS,
+        'data'       : datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit'     : _commit(),
+        'python'     : platform.python_version(),
+        'plataforma' : platform.platform(),
+    }
+    resultados['parse'] = medir_parse()
+    resultados['construcao'] = medir_construcao()
+    resultados['memoria'] = medir_memoria(argumentos.unidades, argumentos.cursos_por_unidade,
+                                          argumentos.disciplinas_por_curso)
+
+    ensino = gerar_catalogo(argumentos.unidades, argumentos.cursos_por_unidade, argumentos.disciplinas_por_curso)
+    inicio = time.perf_counter()
+    ensino._construir_indices()
+    resultados['catalogo'] = {'unidades' : len(ensino.unidades), 'cursos' : len(ensino.cursos),
+                              'disciplinas' : len(ensino.disciplinas),
+                              'segundos_construindo_indices' : time.perf_counter() - inicio}
+    resultados['consultas'] = medir_consultas(ensino, argumentos.tempo)
+
+    imprimir(resultados)
+    with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+    print(f'\nResultados escritos em {argumentos.saida}')
+
+    if argumentos.comparar is not None:
+        with open(argumentos.comparar, encoding='utf-8') as arquivo:
+            comparar(resultados, json.load(arquivo))
+
+if __name__ == '__main__':
+    main()
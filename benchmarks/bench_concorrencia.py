@@ -0,0 +1,94 @@
+"""
+Compara a concorrência fixa com a concorrência adaptativa (ConcorrenciaUsp)
+no scrape do backend http, contra o servidor local com latencia injetada
+(benchmarks/servidor_jupiter.py). Para cada modo são medidos os cursos por
+minuto, as respostas 503 do servidor e a concorrência final.
+
+Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.bench_concorrencia
+python3 -m benchmarks.bench_concorrencia --conexoes 64 --capacidade 8 --saida concorrencia.json
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from src.ConcorrenciaUsp import ConcorrenciaUsp
+from src.JupiterHttp import JupiterHttp
+from src.ParserUsp import extrair_curso
+from src.RastreamentoUsp import RastreamentoUsp
+
+from .servidor_jupiter import iniciar
+
+async def montar(curso : str, unidade : str, grade : str, trilha : str | None = None):
+    # Fora do laço de eventos, para que o parse não atrase a leitura das outras respostas
+    return curso, await asyncio.to_thread(extrair_curso, grade)
+
+async def scrape(url_base : str, unidades : int, conexoes : int, adaptativa : bool,
+                 por_segundo : float | None) -> dict:
+    rastreamento = RastreamentoUsp()
+    async with JupiterHttp(url_base, conexoes, rastreamento=rastreamento, por_segundo=por_segundo) as jupiter:
+        # Na concorrência fixa todas as conexões são usadas desde o inicio
+        jupiter.concorrencia = ConcorrenciaUsp(conexoes, por_segundo=por_segundo, adaptativa=adaptativa,
+                                               rastreamento=rastreamento)
+        codigos = (await jupiter.get_unidades())[:unidades]
+
+        inicio = time.perf_counter()
+        # Uma unidade com uma requisição que falhou em todas as tentativas não impede a medida das outras
+        resultados = await asyncio.gather(*(jupiter.scrape_unidade(codigo, unidade, montar)
+                                            for codigo, unidade in codigos), return_exceptions=True)
+        segundos = time.perf_counter() - inicio
+
+    falhas = [resultado for resultado in resultados if isinstance(resultado, Exception)]
+    cursos = sum(len(cursos) for _, cursos in (resultado for resultado in resultados if resultado not in falhas))
+    _, menor, maior = rastreamento.medidas['concorrência']
+    return {
+        'cursos'                 : cursos,
+        'segundos'               : segundos,
+        'cursos_por_minuto'      : cursos / segundos * 60,
+        'unidades_com_falha'     : len(falhas),
+        'requisicoes_repetidas'  : rastreamento.contadores.get('requisições repetidas', 0),
+        'congestionamentos'      : rastreamento.contadores.get('congestionamentos', 0),
+        'concorrencia_final'     : int(jupiter.concorrencia.limite),
+        'concorrencia_menor'     : menor,
+        'concorrencia_maior'     : maior,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da concorrência fixa contra a adaptativa no backend http.")
+    parser.add_argument("--unidades", type=int, default=4, help="Unidades scrapadas.")
+    parser.add_argument("--cursos-por-unidade", type=int, default=100)
+    parser.add_argument("--conexoes", type=int, default=64, help="Concorrência fixa e maximo da adaptativa.")
+    parser.add_argument("--rps", type=float, default=None, help="Limite de requisições por segundo.")
+    parser.add_argument("--capacidade", type=int, default=8, help="Capacidade do servidor local.")
+    parser.add_argument("--latencia", type=float, default=0.2, help="Latencia do servidor local abaixo da capacidade.")
+    parser.add_argument("--recusa", type=float, default=4.0, help="Acima dessa quantidade de vezes a capacidade o servidor responde 503.")
+    parser.add_argument("--saida", metavar="ARQUIVO", default=None, help="Arquivo JSON onde os resultados são escritos.")
+    argumentos = parser.parse_args()
+
+    servidor = iniciar(0, argumentos.cursos_por_unidade, argumentos.capacidade, argumentos.latencia, argumentos.recusa)
+    url_base = f'http://127.0.0.1:{servidor.server_address[1]}/jupiterweb/'
+
+    resultados = {}
+    for modo, adaptativa in (('fixa', False), ('adaptativa', True)):
+        servidor.zerar()
+        resultados[modo] = asyncio.run(scrape(url_base, argumentos.unidades, argumentos.conexoes,
+                                              adaptativa, argumentos.rps))
+        resultados[modo].update(servidor.estatisticas())
+    servidor.shutdown()
+
+    print(f'{"modo":<12}{"cursos/min":>12}{"segundos":>10}{"503":>8}{"repetidas":>11}'
+          f'{"unid. com falha":>17}{"conc. final":>13}{"max no servidor":>17}')
+    for modo, valores in resultados.items():
+        print(f'{modo:<12}{valores["cursos_por_minuto"]:>12.0f}{valores["segundos"]:>10.2f}'
+              f'{valores["recusadas_503"]:>8}{valores["requisicoes_repetidas"]:>11}{valores["unidades_com_falha"]:>17}'
+              f'{valores["concorrencia_final"]:>13}{valores["maximo_em_andamento"]:>17}')
+
+    if argumentos.saida is not None:
+        with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+        print(f'\nResultados escritos em {argumentos.saida}')
+
+if __name__ == '__main__':
+    main()
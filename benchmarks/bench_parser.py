@@ -0,0 +1,53 @@
+"""
+Compara o parse antigo das páginas de curso (BeautifulSoup com html.parser
+sobre o page_source inteiro, duas vezes por curso) com o parse do ParserUsp
+(lxml apenas sobre o #step4, uma vez por curso), nas páginas sinteticas de
+benchmarks/fixtures.
+
+Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.bench_parser
+"""
+import pathlib
+import timeit
+
+from bs4 import BeautifulSoup
+
+from src.ParserUsp import extrair_curso
+
+FIXTURES = pathlib.Path(__file__).parent / 'fixtures'
+
+def parse_antigo(pagina : str):
+    # Equivalente ao _get_curso_info + _get_disciplinas + construtores antigos
+    conteudos = BeautifulSoup(pagina, features="html.parser").find(id='step4').find('table').find('tr').find('td')
+    duracoes = tuple(conteudos.find("span", class_=classe).text for classe in ('duridlhab', 'durminhab', 'durmaxhab'))
+
+    disciplinas = []
+    for disciplina in BeautifulSoup(pagina, "html.parser").find_all(class_='disciplina'):
+        modalidade = disciplina.parent.parent.parent.find("tr").find("td").text
+        linha = disciplina.parent.parent
+        disciplinas.append((modalidade, (disciplina.text,) + tuple(linha.contents[i].text for i in range(1, 8))))
+    return duracoes, disciplinas
+
+def parse_novo(pagina : str):
+    return extrair_curso(pagina)
+
+def medir(funcao, pagina : str, repeticoes : int) -> float:
+    return min(timeit.repeat(lambda: funcao(pagina), number=repeticoes, repeat=5)) / repeticoes
+
+def main():
+    print(f'{"página":<22}{"disciplinas":>12}{"antigo (ms)":>14}{"novo (ms)":>12}{"ganho":>8}')
+    for arquivo in sorted(FIXTURES.glob('curso_*.html')):
+        pagina = arquivo.read_text(encoding='utf-8')
+
+        antigo = parse_antigo(pagina)
+        novo = parse_novo(pagina)
+        assert antigo == novo, f'O resultado dos dois parses difere para {arquivo.name}'
+
+        tempo_antigo = medir(parse_antigo, pagina, 20)
+        tempo_novo = medir(parse_novo, pagina, 20)
+        print(f'{arquivo.name:<22}{len(novo[1]):>12}{tempo_antigo * 1000:>14.2f}{tempo_novo * 1000:>12.2f}'
+              f'{tempo_antigo / tempo_novo:>7.1f}x')
+
+if __name__ == '__main__':
+    main()
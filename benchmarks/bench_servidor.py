@@ -0,0 +1,158 @@
+"""
+Mede a latencia do servidor de consultas (main.py --servir) em localhost,
+com varios clientes simultaneos mantendo as conexões abertas (keep-alive),
+sobre o catalogo sintetico do bench_catalogo salvo em um snapshot. O
+servidor roda em outro processo, como em uso. Os cenarios são:
+
+- codigos (cache): consultas de códigos já respondidas, servidas pelo cache;
+- codigos: consultas de códigos fora do cache;
+- codigos com sugestões: as mesmas consultas de códigos enquanto um dos
+  clientes pede sugestões de nomes novos, a consulta mais cara do servidor.
+
+Para cada cenario são medidos o p50, o p95 e o maximo da latencia e as
+consultas por segundo. Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.bench_servidor
+python3 -m benchmarks.bench_servidor --clientes 16 --saida servidor.json
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from .bench_catalogo import gerar_catalogo
+
+RAIZ = pathlib.Path(__file__).parent.parent
+
+def _porta_livre() -> int:
+    with socket.socket() as conexao:
+        conexao.bind(('127.0.0.1', 0))
+        return conexao.getsockname()[1]
+
+async def _pedir(leitor : asyncio.StreamReader, escritor : asyncio.StreamWriter, alvo : str) -> int:
+    escritor.write(f'GET {alvo} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode('latin-1'))
+    await escritor.drain()
+    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+    campos = dict(linha.split(': ', 1) for linha in cabecalho.decode('latin-1').split('\r\n')[1:] if linha)
+    await leitor.readexactly(int(campos['Content-Length']))
+    return int(cabecalho.split(b' ', 2)[1])
+
+async def _esperar_servidor(porta : int, tempo_maximo : float = 120.0) -> None:
+    limite = time.perf_counter() + tempo_maximo
+    while True:
+        try:
+            leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+        except OSError:
+            if time.perf_counter() > limite:
+                raise TimeoutError('O servidor não começou a responder.')
+            await asyncio.sleep(0.2)
+            continue
+        await _pedir(leitor, escritor, '/saude')
+        escritor.close()
+        return
+
+async def _cliente(porta : int, alvos, fim : float, tempos : list[float]) -> None:
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    numero = 0
+    while time.perf_counter() < fim:
+        alvo = alvos(numero)
+        inicio = time.perf_counter_ns()
+        await _pedir(leitor, escritor, alvo)
+        tempos.append((time.perf_counter_ns() - inicio) / 1000)
+        numero += 1
+    escritor.close()
+
+def _resumo(tempos : list[float], segundos : float) -> dict:
+    tempos = sorted(tempos)
+    if not tempos:
+        return {'consultas' : 0}
+    return {'consultas' : len(tempos), 'consultas_por_segundo' : len(tempos) / segundos,
+            'p50_us' : tempos[len(tempos) // 2], 'p95_us' : tempos[int(len(tempos) * 0.95)], 'max_us' : tempos[-1]}
+
+async def medir(porta : int, codigos : list[str], nomes : list[str], clientes : int, segundos : float) -> dict:
+    await _esperar_servidor(porta)
+    # Cada cenario usa um parametro proprio nos alvos, que o servidor ignora, para não
+    # reaproveitar as respostas guardadas no cache por outro cenario
+    sem_cache = lambda cenario : lambda numero : f'/disciplinas?codigo={codigos[numero % len(codigos)]}&{cenario}={numero}'
+    cenarios = {
+        'codigos (cache)'       : (lambda numero : f'/disciplinas?codigo={codigos[numero % len(codigos)]}', None),
+        'codigos'               : (sem_cache('c'), None),
+        'codigos com sugestões' : (sem_cache('s'),
+                                   lambda numero : f'/sugestoes/disciplinas?nome={quote(nomes[numero % len(nomes)])}{numero}'),
+    }
+
+    # Aquece o cache das consultas de códigos
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    for codigo in codigos:
+        await _pedir(leitor, escritor, f'/disciplinas?codigo={codigo}')
+    escritor.close()
+
+    resultados = {}
+    for cenario, (alvos, sugestoes) in cenarios.items():
+        tempos : list[float] = []
+        tempos_das_sugestoes : list[float] = []
+        fim = time.perf_counter() + segundos
+        tarefas = [_cliente(porta, alvos, fim, tempos) for _ in range(clientes - (sugestoes is not None))]
+        if sugestoes is not None:
+            tarefas.append(_cliente(porta, sugestoes, fim, tempos_das_sugestoes))
+        await asyncio.gather(*tarefas)
+        resultados[cenario] = _resumo(tempos, segundos)
+        if sugestoes is not None:
+            resultados[cenario]['sugestoes'] = _resumo(tempos_das_sugestoes, segundos)
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da latencia do servidor de consultas em localhost.")
+    parser.add_argument("--unidades", type=int, default=48, help="Unidades do catalogo sintetico.")
+    parser.add_argument("--cursos-por-unidade", type=int, default=20, help="Cursos de cada unidade do catalogo sintetico.")
+    parser.add_argument("--disciplinas-por-curso", type=int, default=60, help="Disciplinas da grade de cada curso.")
+    parser.add_argument("--clientes", type=int, default=8, help="Clientes simultaneos, cada um com uma conexão.")
+    parser.add_argument("--segundos", type=float, default=3.0, help="Duração de cada cenario.")
+    parser.add_argument("--saida", metavar="ARQUIVO", default=None, help="Arquivo JSON onde os resultados são escritos.")
+    argumentos = parser.parse_args()
+
+    ensino = gerar_catalogo(argumentos.unidades, argumentos.cursos_por_unidade, argumentos.disciplinas_por_curso)
+    aleatorio = random.Random(7)
+    codigos = aleatorio.sample(list(ensino.disciplinas), min(200, len(ensino.disciplinas)))
+    nomes = [ensino.disciplinas[codigo].get_nome() for codigo in codigos]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        snapshot = str(pathlib.Path(pasta) / 'catalogo.snap')
+        ensino.salvar_snapshot(snapshot)
+        del ensino
+
+        porta = _porta_livre()
+        servidor = subprocess.Popen([sys.executable, 'main.py', '--from-snapshot', snapshot, '--servir', str(porta)],
+                                    cwd=RAIZ, stdout=subprocess.DEVNULL)
+        try:
+            resultados = asyncio.run(medir(porta, codigos, nomes, argumentos.clientes, argumentos.segundos))
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+    print(f'{"cenario":<26}{"consultas/s":>13}{"p50 (us)":>11}{"p95 (us)":>11}{"max (us)":>11}')
+    for cenario, valores in resultados.items():
+        linhas = [(cenario, valores)]
+        if 'sugestoes' in valores:
+            linhas.append(('  sugestões', valores['sugestoes']))
+        for nome, medidas in linhas:
+            if not medidas['consultas']:
+                print(f'{nome:<26}{"nenhuma consulta terminou":>46}')
+                continue
+            print(f'{nome:<26}{medidas["consultas_por_segundo"]:>13.0f}{medidas["p50_us"]:>11.0f}'
+                  f'{medidas["p95_us"]:>11.0f}{medidas["max_us"]:>11.0f}')
+
+    if argumentos.saida is not None:
+        with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+        print(f'\nResultados escritos em {argumentos.saida}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Gera as páginas da pasta benchmarks/fixtures. As páginas são SINTETICAS:
+não foram gravadas do jupiter, e sim montadas seguindo a estrutura que o
+scrape espera da página de carreiras (os seletores comboUnidade e
+comboCurso, a aba #step4 com as durações nos spans duridlhab, durminhab e
+durmaxhab e uma tabela por modalidade com as linhas de .disciplina). Os
+nomes, códigos e valores são aleatorios, com semente fixa, então a geração
+é reprodutivel e escreve exatamente as páginas versionadas.
+
+Como as páginas não são do jupiter, os benchmarks medem o parse sobre uma
+estrutura parecida com a real, com o tamanho de cursos pequenos, medios e
+grandes, mas não garantem que o parse funcione com a página real. A
+página de carreiras é o cabeçalho do curso medio, com o seletor de unidades,
+sem a aba #step4.
+
+Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.gerar_fixtures
+python3 -m benchmarks.gerar_fixtures --pasta /tmp/fixtures
+"""
+import argparse
+import pathlib
+import random
+
+FIXTURES = pathlib.Path(__file__).parent / 'fixtures'
+
+PALAVRAS = ('Cálculo Álgebra Linear Introdução Programação Física Química Estatística Estruturas Dados Sistemas '
+            'Operacionais Redes Computadores Banco Teoria Grafos Computação Laboratório Análise Numérica Geometria '
+            'Analítica Equações Diferenciais Ordinárias Probabilidade Engenharia Software Arquitetura Compiladores '
+            'Inteligência Artificial').split()
+
+# Arquivo e (obrigatórias, optativas livres, optativas eletivas, cursos no seletor) de cada curso
+CURSOS = (('curso_pequeno.html', (25, 6, 4, 8)),
+          ('curso_medio.html',   (60, 20, 15, 20)),
+          ('curso_grande.html',  (110, 60, 45, 40)))
+
+class _Gerador:
+    """
+    Gera as páginas em sequencia a partir de um único gerador aleatorio,
+    então a ordem das chamadas faz parte do resultado.
+    """
+
+    def __init__(self, semente : int = 7) -> None:
+        self.aleatorio = random.Random(semente)
+        self.unidades = [f'Unidade {numero} - ( U{numero:02d} )' for numero in range(1, 90)]
+        self.unidades[10] = 'Instituto de Ciências Matemáticas e de Computação - ( ICMC )'
+
+    def nome(self) -> str:
+        return ' '.join(self.aleatorio.choice(PALAVRAS) for _ in range(self.aleatorio.randint(2, 5)))
+
+    def linha(self, codigo : str) -> str:
+        escolher = self.aleatorio.choice
+        cred_aula = escolher(['2', '4', '6'])
+        cred_trab = escolher(['0', '0', '1', '2'])
+        carga = str(int(cred_aula) * 15 + int(cred_trab) * 30)
+        ce, cp, atpa = escolher(['', '', '60']), escolher(['', '', '30']), escolher(['', '', '', '15'])
+        return (f'<tr style="height: 20px;"><td><a class="disciplina" href="javascript:void(0);" data-coddis="{codigo}">{codigo}</a></td>'
+                f'<td>{self.nome()}</td><td>{cred_aula}</td><td>{cred_trab}</td><td>{carga}</td><td>{ce}</td><td>{cp}</td><td>{atpa}</td></tr>')
+
+    def modalidade(self, titulo : str, quantidade : int, prefixo : str, periodos : int) -> str:
+        tabela = f'<table class="table table-bordered"><tr><td colspan="8" class="tipoDisciplina">{titulo}</td></tr>'
+        tabela += ('<tr><th>Código</th><th>Disciplina</th><th>Créd. Aula</th><th>Créd. Trab.</th>'
+                   '<th>CH</th><th>CE</th><th>CP</th><th>ATPA</th></tr>')
+        por_periodo = max(1, quantidade // periodos)
+        for numero in range(quantidade):
+            if numero % por_periodo == 0:
+                tabela += f'<tr><td colspan="8" class="periodo">{numero // por_periodo + 1}º Período Ideal</td></tr>'
+            tabela += self.linha(f'{prefixo}{self.aleatorio.randint(0, 9999):04d}')
+        return tabela + '</table>'
+
+    def pagina(self, obrigatorias : int, livres : int, eletivas : int, cursos : int) -> str:
+        unidades = ''.join(f'<option value="{numero}">{unidade}</option>' for numero, unidade in enumerate(self.unidades, 1))
+        opcoes_de_cursos = ''.join(f'<option value="{numero}">{self.nome()} - '
+                                   f'{self.aleatorio.choice(["diurno", "noturno", "integral"])}</option>'
+                                   for numero in range(cursos))
+        info = ('<table class="table"><tr><td><div class="form-group">'
+                '<label>Duração Ideal:</label> <span class="duridlhab">8</span> semestres<br>'
+                '<label>Duração Mínima:</label> <span class="durminhab">8</span> semestres<br>'
+                '<label>Duração Máxima:</label> <span class="durmaxhab">12</span> semestres<br>'
+                + ''.join(f'<label>Informação {numero}:</label> <span class="info{numero}">{self.nome()}</span><br>'
+                          for numero in range(12)) +
+                '</div></td></tr></table>')
+        step4 = ('<div id="step4" class="tab-pane" role="tabpanel">' + info +
+                 '<table class="layout"><tr><td>' +
+                 self.modalidade('Disciplinas Obrigatórias', obrigatorias, 'SMA', 8) +
+                 self.modalidade('Disciplinas Optativas Livres', livres, 'SCC', 2) +
+                 self.modalidade('Disciplinas Optativas Eletivas', eletivas, 'SME', 3) +
+                 '</td></tr></table></div>')
+        abas = ''.join(f'<div id="step{aba}" class="tab-pane" role="tabpanel"><p>{" ".join(self.nome() for _ in range(60))}</p></div>'
+                       for aba in (2, 3))
+        return ('<!DOCTYPE html><html lang="pt-br"><head><meta charset="utf-8"><title>Júpiter - Sistema de Graduação</title>'
+                + ''.join(f'<link rel="stylesheet" href="/css/estilo{numero}.css">' for numero in range(8)) +
+                '<script src="js/jquery.min.js"></script><script src="js/jquery.blockUI.js"></script></head><body>'
+                '<div id="menu"><ul>' + ''.join(f'<li><a href="#">{self.nome()}</a></li>' for _ in range(40)) + '</ul></div>'
+                '<ul class="nav nav-tabs">' + ''.join(f'<li><a id="step{aba}-tab" href="#step{aba}">Aba {aba}</a></li>'
+                                                      for aba in range(1, 5)) + '</ul>'
+                f'<div id="step1" class="tab-pane"><select id="comboUnidade"><option value="">Selecione a unidade</option>{unidades}</select>'
+                f'<select id="comboCurso"><option value="">Selecione o curso</option>{opcoes_de_cursos}</select>'
+                '<button id="enviar">Buscar</button></div>'
+                + abas + step4 + '</body></html>')
+
+def gerar(pasta : pathlib.Path) -> list[pathlib.Path]:
+    """
+    Escreve as páginas dos cursos e a página de carreiras na pasta.
+
+    :param pasta: Pasta onde as páginas são escritas.
+    :type pasta: pathlib.Path
+    :return: O caminho de cada página escrita.
+    :rtype: list[pathlib.Path]
+    """
+    pasta.mkdir(parents=True, exist_ok=True)
+    gerador = _Gerador()
+    paginas = {arquivo : gerador.pagina(*tamanhos) for arquivo, tamanhos in CURSOS}
+    medio = paginas['curso_medio.html']
+    paginas['carreira.html'] = medio[:medio.find('<div id="step4"')] + '</body></html>'
+
+    caminhos = []
+    for arquivo, pagina in paginas.items():
+        caminho = pasta / arquivo
+        caminho.write_text(pagina, encoding='utf-8')
+        caminhos.append(caminho)
+    return caminhos
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera as páginas sinteticas de benchmarks/fixtures.")
+    parser.add_argument("--pasta", default=str(FIXTURES), help="Pasta onde as páginas são escritas.")
+    argumentos = parser.parse_args()
+    for caminho in gerar(pathlib.Path(argumentos.pasta)):
+        print(f'Página escrita em {caminho}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Servidor local que imita os endpoints do jupiter usados pelo backend http
+(JupiterHttp), respondendo com as páginas sinteticas de benchmarks/fixtures.
+
+A latencia é injetada imitando um servidor com uma capacidade fixa: até
+--capacidade requisições simultaneas cada uma leva --latencia segundos, e
+acima disso a latencia cresce na proporção das requisições em andamento
+(o servidor divide o seu tempo entre elas). Acima de --recusa vezes a
+capacidade o servidor responde 503, como o jupiter sobrecarregado.
+
+Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.servidor_jupiter --porta 8765
+"""
+import argparse
+import json
+import pathlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = pathlib.Path(__file__).parent / 'fixtures'
+
+class ServidorJupiter(ThreadingHTTPServer):
+    """
+    Servidor com o estado compartilhado pelas requisições: as páginas,
+    a quantidade de requisições em andamento e as estatisticas.
+    """
+
+    daemon_threads = True
+    # O jupiter aceita muitas conexões, quem limita é a latencia
+    request_queue_size = 1024
+
+    def __init__(self, endereco : tuple[str, int], cursos_por_unidade : int, capacidade : int,
+                 latencia : float, recusa : float) -> None:
+        super().__init__(endereco, Requisicao)
+        self.cursos_por_unidade = cursos_por_unidade
+        self.capacidade = capacidade
+        self.latencia = latencia
+        self.recusa = recusa
+        self.carreira = (FIXTURES / 'carreira.html').read_bytes()
+        self.grades = [arquivo.read_bytes() for arquivo in sorted(FIXTURES.glob('curso_*.html'))]
+        self.trava = threading.Lock()
+        self.em_andamento = 0
+        self.respondidas = 0
+        self.recusadas = 0
+        self.maximo_em_andamento = 0
+
+    def estatisticas(self) -> dict:
+        with self.trava:
+            return {'respondidas' : self.respondidas, 'recusadas_503' : self.recusadas,
+                    'maximo_em_andamento' : self.maximo_em_andamento}
+
+    def zerar(self) -> None:
+        with self.trava:
+            self.respondidas = self.recusadas = self.maximo_em_andamento = 0
+
+class Requisicao(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # O cabeçalho e o corpo são escritos separados, e com o algoritmo de Nagle o corpo esperaria
+    # o ACK atrasado do cliente (~40ms), uma latencia que o jupiter não tem
+    disable_nagle_algorithm = True
+    server : ServidorJupiter
+
+    def log_message(self, *_) -> None:
+        pass
+
+    def _responder(self, status : int, corpo : bytes, tipo : str = 'text/html') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', f'{tipo}; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self) -> None:
+        servidor = self.server
+        with servidor.trava:
+            servidor.em_andamento += 1
+            em_andamento = servidor.em_andamento
+            servidor.maximo_em_andamento = max(servidor.maximo_em_andamento, em_andamento)
+        try:
+            if em_andamento > servidor.capacidade * servidor.recusa:
+                with servidor.trava:
+                    servidor.recusadas += 1
+                self._responder(503, b'Servidor sobrecarregado')
+                return
+
+            time.sleep(servidor.latencia * max(1.0, em_andamento / servidor.capacidade))
+
+            url = urlparse(self.path)
+            parametros = {chave : valores[0] for chave, valores in parse_qs(url.query).items()}
+            if url.path.endswith('jupCarreira.jsp'):
+                self._responder(200, servidor.carreira)
+            elif url.path.endswith('listarCursosRequisitos'):
+                cursos = [{'codcur' : f'{parametros["codcg"]}{numero:03}', 'codhab' : '0',
+                           'nomcur' : f'Curso {numero} da unidade {parametros["codcg"]}'}
+                          for numero in range(servidor.cursos_por_unidade)]
+                self._responder(200, json.dumps(cursos).encode('utf-8'), 'application/json')
+            elif url.path.endswith('listarGradeCurricular'):
+                self._responder(200, servidor.grades[int(parametros['codcur']) % len(servidor.grades)])
+            else:
+                self._responder(404, b'')
+                return
+            with servidor.trava:
+                servidor.respondidas += 1
+        finally:
+            with servidor.trava:
+                servidor.em_andamento -= 1
+
+def iniciar(porta : int = 0, cursos_por_unidade : int = 50, capacidade : int = 8,
+            latencia : float = 0.05, recusa : float = 4.0) -> ServidorJupiter:
+    """
+    Inicia o servidor em uma thread.
+
+    :param porta: Porta do servidor. Com 0 uma porta livre é escolhida.
+    :return: O servidor. A porta escolhida está em servidor.server_address.
+    """
+    servidor = ServidorJupiter(('127.0.0.1', porta), cursos_por_unidade, capacidade, latencia, recusa)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita o jupiter, com latencia injetada.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--cursos-por-unidade", type=int, default=50)
+    parser.add_argument("--capacidade", type=int, default=8, help="Requisições simultaneas sem aumento da latencia.")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latencia, em segundos, abaixo da capacidade.")
+    parser.add_argument("--recusa", type=float, default=4.0, help="Acima dessa quantidade de vezes a capacidade o servidor responde 503.")
+    argumentos = parser.parse_args()
+
+    iniciar(argumentos.porta, argumentos.cursos_por_unidade, argumentos.capacidade,
+            argumentos.latencia, argumentos.recusa)
+    print(f'Servindo em http://127.0.0.1:{argumentos.porta}/jupiterweb/')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
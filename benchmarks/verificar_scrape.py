@@ -0,0 +1,253 @@
+"""
+Verifica, sem acessar o jupiter, que caminhos diferentes do scrape chegam
+ao mesmo resultado a partir das páginas sinteticas de benchmarks/fixtures
+(benchmarks/gerar_fixtures.py):
+
+- base: um curso reaproveitado de um scrape base (--base) é igual ao curso
+  montado pelo parse, com e sem filtro de modalidades, mesmo quando o base
+  foi feito com outro filtro.
+- http: o scrape do backend http (--backend http --jupiter-url) contra o
+  servidor local benchmarks/servidor_jupiter.py é igual ao parse das mesmas
+  páginas pelo caminho do navegador (_montar_curso).
+- parse: um curso cujo parse falha, em outro processo (--processos) ou neste
+  processo, vai para o relatorio de falhas sem novas tentativas, e os outros
+  cursos da unidade são mesclados.
+- diario: um scrape retomado (--resume) com outro filtro de cursos ou de
+  modalidades só reaproveita os cursos do diario que valem para o filtro novo.
+- registros: recarregar o mesmo snapshot, como o servidor faz, não aumenta os
+  registros de nomes, e os dados da carga anterior continuam validos.
+- ordem: as disciplinas de cada curso ficam na ordem da página depois de
+  salvas e carregadas de um snapshot e de um banco.
+- delta: um snapshot delta (--delta) de uma noite em que poucos cursos mudaram
+  carrega os mesmos dados do snapshot completo, inclusive em uma cadeia de
+  deltas, e um delta cujo base mudou não é carregado. Os tamanhos do snapshot
+  completo e do delta são mostrados.
+
+Execute a partir da raiz do projeto:
+
+python3 -m benchmarks.verificar_scrape
+"""
+import os
+import pathlib
+import tempfile
+from collections import deque
+
+from src.BancoUsp import BancoUsp
+from src.DiarioUsp import DiarioUsp
+from src.EnsinoUsp import EnsinoUsp
+from src.EstagioDeParseUsp import EstagioDeParseUsp
+from src.FiltroUsp import FiltroUsp
+from src.ParserUsp import extrair_curso, extrair_unidades
+from src.UnidadeUsp import UnidadeUsp
+
+from .bench_catalogo import gerar_catalogo
+from .servidor_jupiter import iniciar
+
+FIXTURES = pathlib.Path(__file__).parent / 'fixtures'
+
+UNIDADE = 'Unidade das fixtures - ( FIX )'
+
+def _paginas() -> dict[str, str]:
+    return {arquivo.stem : arquivo.read_text(encoding='utf-8') for arquivo in sorted(FIXTURES.glob('curso_*.html'))}
+
+def montar_das_fixtures(filtro : FiltroUsp | None = None, base : EnsinoUsp | None = None) -> EnsinoUsp:
+    """
+    Monta um EnsinoUsp com um curso por página de curso das fixtures, como o scrape faria.
+    """
+    ensino = EnsinoUsp._sem_scrape(filtro=filtro)
+    ensino._base = base
+    paginas = _paginas()
+    resultados = [ensino._montar_curso(curso, UNIDADE, pagina) for curso, pagina in paginas.items()]
+    ensino._mesclar_unidade((UnidadeUsp(UNIDADE, set(paginas), ensino._registros), resultados))
+    ensino._construir_indices()
+    return ensino
+
+def _grades(ensino : EnsinoUsp) -> dict[str, tuple]:
+    return {nome : curso.para_tupla() for nome, curso in ensino.cursos.items()}
+
+def verificar_base() -> None:
+    sem_optativas_livres = lambda : FiltroUsp(modalidades=['optativas livres'])
+    completo = montar_das_fixtures()
+    filtrado = montar_das_fixtures(sem_optativas_livres())
+    assert _grades(completo) != _grades(filtrado), 'As fixtures não tem optativas livres para filtrar'
+
+    casos = (
+        ('base completo, scrape filtrado', completo, sem_optativas_livres, filtrado),
+        ('base filtrado, scrape completo', filtrado, FiltroUsp, completo),
+        ('base filtrado, scrape filtrado', filtrado, sem_optativas_livres, filtrado),
+        ('base completo, scrape completo', completo, FiltroUsp, completo),
+    )
+    for nome, base, filtro, esperado in casos:
+        obtido = montar_das_fixtures(filtro(), base)
+        assert _grades(obtido) == _grades(esperado), f'{nome}: as grades diferem do parse'
+        assert len(obtido.disciplinas) == len(esperado.disciplinas), f'{nome}: as disciplinas diferem do parse'
+        print(f'ok  base: {nome} ({len(obtido.disciplinas)} disciplinas, '
+              f'{obtido._contagem["inalterados"]} cursos reaproveitados)')
+
+def _catalogo(ensino : EnsinoUsp) -> tuple:
+    return (sorted(unidade.para_tupla() for unidade in ensino.iterar_unidades()),
+            sorted(curso.para_tupla() for curso in ensino.iterar_cursos()),
+            sorted(disciplina.para_tupla()[:-1] + (tuple(sorted(disciplina.para_tupla()[-1])),)
+                   for disciplina in ensino.iterar_disciplinas()))
+
+def verificar_http(unidades : int = 3, cursos_por_unidade : int = 6) -> None:
+    servidor = iniciar(0, cursos_por_unidade, capacidade=64, latencia=0.0)
+    try:
+        url_base = f'http://127.0.0.1:{servidor.server_address[1]}/jupiterweb/'
+        http = EnsinoUsp(str(unidades), backend='http', conexoes=8, url_base=url_base)
+    finally:
+        servidor.shutdown()
+
+    # O mesmo conteudo que o servidor local responde, montado pelo caminho do navegador
+    paginas = list(_paginas().values())
+    esperado = EnsinoUsp._sem_scrape()
+    for codigo, unidade in extrair_unidades((FIXTURES / 'carreira.html').read_text(encoding='utf-8'))[:unidades]:
+        cursos = {f'Curso {numero} da unidade {codigo}' : paginas[int(f'{codigo}{numero:03}') % len(paginas)]
+                  for numero in range(cursos_por_unidade)}
+        resultados = [esperado._montar_curso(curso, unidade, pagina) for curso, pagina in cursos.items()]
+        esperado._mesclar_unidade((UnidadeUsp(unidade, set(cursos), esperado._registros), resultados))
+
+    assert len(http.cursos) == unidades * cursos_por_unidade, 'http: cursos faltando no scrape'
+    assert _catalogo(http) == _catalogo(esperado), 'http: o scrape difere do parse das fixtures'
+    print(f'ok  http: {len(http.cursos)} cursos e {len(http.disciplinas)} disciplinas iguais ao parse das fixtures')
+
+def verificar_parse_com_falha() -> None:
+    ensino = EnsinoUsp._sem_scrape()
+    pagina = next(iter(_paginas().values()))
+    with EstagioDeParseUsp(1) as estagio:
+        ensino._estagio = estagio
+        # O int falha no outro processo com ValueError, como um parse que encontra um html inesperado
+        resultados = [ensino._parse('curso bom', UNIDADE, extrair_curso, pagina),
+                      ensino._parse('curso quebrado', UNIDADE, int, pagina)]
+        ensino._mesclar_unidade((UnidadeUsp(UNIDADE, {'curso bom', 'curso quebrado'}, ensino._registros), resultados))
+
+    assert list(ensino.cursos) == ['curso bom'], 'parse: o curso que falhou foi mesclado'
+    assert ensino.unidades[0].get_cursos() == {'curso bom'}, 'parse: a unidade ainda lista o curso que falhou'
+    assert ensino._falhas.quantidade == 1, 'parse: a falha não foi registrada'
+
+    # Sem o estagio de parse a falha acontece dentro do scrape do curso, no navegador ou no backend http
+    ensino = EnsinoUsp._sem_scrape()
+    paginas = {'curso bom' : pagina, 'curso quebrado' : ''}
+    tentativas = []
+    def scrape_curso(nav, seletor_curso : int, curso : str, unidade : str):
+        tentativas.append(curso)
+        return ensino._montar_curso(curso, unidade, paginas[curso])
+    ensino._scrape_curso = scrape_curso
+    novas_tentativas = deque()
+    resultados = [ensino._tentar_curso(None, 2, curso, UNIDADE, 1, novas_tentativas) for curso in paginas]
+    assert resultados[1] is None and not novas_tentativas, 'parse: o curso que falhou no parse será tentado novamente'
+    assert ensino._montar_sem_falha_de_parse(ensino._montar_curso, 'curso quebrado', UNIDADE, '') is None
+    assert ensino._falhas.quantidade == 2 and tentativas == list(paginas), 'parse: a falha não foi registrada'
+    print('ok  parse: a falha do parse de um curso não interrompe a mescla da unidade nem o scrape')
+
+def verificar_diario() -> None:
+    sem_optativas_livres = FiltroUsp(modalidades=['optativas livres'])
+    completo = montar_das_fixtures()
+    cursos = sorted(completo.cursos)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = str(pathlib.Path(pasta) / 'diario.jsonl')
+        diario = DiarioUsp(caminho, False)
+        diario.registrar_unidade(UNIDADE, cursos)
+        for curso in cursos:
+            diario.registrar_curso(UNIDADE, (completo.cursos[curso], []))
+        diario.fechar()
+
+        retomado = DiarioUsp(caminho, True)
+        assert retomado.get_unidade(UNIDADE) is not None, 'mesmo filtro: a unidade completa não foi reaproveitada'
+        _, resultados = retomado.get_unidade(UNIDADE, FiltroUsp(padrao='grande').aceita_curso)
+        assert [curso.get_curso() for curso, _ in resultados] == ['curso_grande'], \
+            'filtro de cursos: o diario devolveu cursos recusados pelo filtro'
+        retomado.fechar()
+
+        retomado = DiarioUsp(caminho, True, sem_optativas_livres.modalidades)
+        assert retomado.get_unidade(UNIDADE) is None and all(retomado.get_curso(UNIDADE, curso) is None for curso in cursos), \
+            'filtro de modalidades: o diario devolveu cursos registrados com outro filtro'
+        retomado.fechar()
+    print('ok  diario: cursos e modalidades de outro filtro não são reaproveitados')
+
+def verificar_registros(recargas : int = 3) -> None:
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = str(pathlib.Path(pasta) / 'fixtures.snap')
+        montar_das_fixtures().salvar_snapshot(caminho)
+
+        anterior = EnsinoUsp.carregar_snapshot(caminho)
+        esperado = _catalogo(anterior)
+        for _ in range(recargas):
+            recarregado = EnsinoUsp.carregar_snapshot(caminho)
+
+    registros = recarregado._registros
+    tamanhos = (len(registros.unidades.nomes), len(registros.cursos.nomes), len(registros.codigos.nomes))
+    assert tamanhos == (len(recarregado.unidades), len(recarregado.cursos), len(recarregado.disciplinas)), \
+        f'registros: os registros tem mais nomes {tamanhos} do que os dados'
+    assert _catalogo(recarregado) == esperado, 'registros: a recarga difere da carga anterior'
+    assert _catalogo(anterior) == esperado, 'registros: a recarga alterou os dados da carga anterior'
+    print(f'ok  registros: {recargas} recargas com {sum(tamanhos)} nomes registrados, como na primeira carga')
+
+def verificar_ordem() -> None:
+    esperado = {}
+    for curso, pagina in _paginas().items():
+        _, linhas = extrair_curso(pagina)
+        grades : tuple[dict, dict, dict] = ({}, {}, {})
+        for modalidade, valores in linhas:
+            posicao = ('obrigatórias', 'livres', 'eletivas').index(modalidade.split(' ')[-1].strip().lower())
+            grades[posicao].setdefault(valores[0])
+        esperado[curso] = tuple(tuple(grade) for grade in grades)
+
+    ensino = montar_das_fixtures()
+    with tempfile.TemporaryDirectory() as pasta:
+        snapshot, banco = os.path.join(pasta, 'fixtures.snap'), os.path.join(pasta, 'fixtures.db')
+        ensino.salvar_snapshot(snapshot)
+        ensino.salvar_banco(banco)
+        carregados = [('scrape', ensino), ('snapshot', EnsinoUsp.carregar_snapshot(snapshot)), ('banco', BancoUsp.abrir(banco))]
+        for origem, carregado in carregados:
+            for curso, grades in esperado.items():
+                assert carregado.buscar_cursos(curso)[0].para_tupla()[5:] == grades, \
+                    f'ordem: as disciplinas de {curso} no {origem} não estão na ordem da página'
+        carregados[-1][1].fechar()
+    print(f'ok  ordem: as grades de {len(esperado)} cursos na ordem da página no scrape, no snapshot e no banco')
+
+def verificar_delta(noites : int = 3, fracao : float = 0.02) -> None:
+    ensino = gerar_catalogo(48, 20, 60)
+    cursos = list(ensino.cursos.values())
+    disciplinas = list(ensino.disciplinas.values())
+    with tempfile.TemporaryDirectory() as pasta:
+        base = os.path.join(pasta, 'noite0.snap')
+        ensino.salvar_snapshot(base)
+        for noite in range(1, noites + 1):
+            # Uma noite tipica: alguns cursos mudam a duração e algumas disciplinas os creditos
+            for curso in cursos[noite::int(1 / fracao)]:
+                curso.dur_idl += 1
+            for disciplina in disciplinas[noite::int(1 / fracao) * 10]:
+                disciplina.cred_aula += 1
+
+            completo, delta = os.path.join(pasta, f'completo{noite}.snap'), os.path.join(pasta, f'noite{noite}.snap')
+            ensino.salvar_snapshot(completo)
+            ensino.salvar_snapshot(delta, base)
+            assert _catalogo(EnsinoUsp.carregar_snapshot(delta)) == _catalogo(EnsinoUsp.carregar_snapshot(completo)), \
+                f'delta: a noite {noite} difere do snapshot completo'
+            tamanhos = os.path.getsize(completo), os.path.getsize(delta)
+            base = delta
+
+        with open(os.path.join(pasta, 'noite0.snap'), 'ab') as arquivo:
+            arquivo.write(b'\0')
+        try:
+            EnsinoUsp.carregar_snapshot(delta)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('delta: um delta cujo base mudou foi carregado')
+    print(f'ok  delta: {noites} noites encadeadas iguais ao snapshot completo, com {fracao:.0%} dos cursos '
+          f'alterados o delta tem {tamanhos[1] / 1024:.0f} KiB e o completo {tamanhos[0] / 1024:.0f} KiB')
+
+def main():
+    verificar_base()
+    verificar_http()
+    verificar_parse_com_falha()
+    verificar_diario()
+    verificar_registros()
+    verificar_ordem()
+    verificar_delta()
+
+if __name__ == '__main__':
+    main()
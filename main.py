@@ -1,7 +1,168 @@
+import argparse
+import asyncio
+
+from src.BancoUsp import BancoUsp
 from src.EnsinoUsp import EnsinoUsp
+from src.FiltroUsp import FiltroUsp
+from src.RenderizadorUsp import ESCRITORES
+from src.ServidorUsp import ServidorUsp
+
+def processar_argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Faz o scrape dos dados da usp e permite consultas interativas.")
+    parser.add_argument("quantidade", nargs="?", default=None,
+                        help="Quantidade de unidades para o scrape. Por padrão todas as unidades.")
+    parser.add_argument("--unidades", metavar="SIGLAS", default=None,
+                        help="Faz o scrape apenas das unidades com essas siglas, separadas por virgula. Ex: ICMC,IME")
+    parser.add_argument("--cursos", metavar="REGEX", default=None,
+                        help="Faz o scrape apenas dos cursos cujo nome contém essa expressão regular.")
+    parser.add_argument("--periodos", metavar="PERIODOS", default=None,
+                        help=f"Faz o scrape apenas dos cursos desses periodos, separados por virgula ({', '.join(FiltroUsp.PERIODOS)}).")
+    parser.add_argument("--pular-modalidades", metavar="MODALIDADES", default=None,
+                        help="Ignora as disciplinas das modalidades que contém esses trechos, separados por virgula. Ex: \"optativas livres\"")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Quantidade de navegadores fazendo o scrape das unidades em paralelo.")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium",
+                        help="Forma de acessar o jupiter: navegando com o Chrome ou chamando os endpoints diretamente.")
+    parser.add_argument("--conexoes", type=int, default=16,
+                        help="Quantidade maxima de requisições simultaneas do backend http.")
+    parser.add_argument("--jupiter-url", metavar="URL", default=None,
+                        help="Endereço do jupiter utilizado pelo backend http, ex: o servidor local que imita o jupiter com as páginas sinteticas dos benchmarks (python3 -m benchmarks.servidor_jupiter).")
+    parser.add_argument("--snapshot", metavar="ARQUIVO", default=None,
+                        help="Salva os dados scrapados nesse arquivo de snapshot.")
+    parser.add_argument("--from-snapshot", metavar="ARQUIVO", default=None,
+                        help="Carrega os dados de um arquivo de snapshot ao invés de fazer o scrape.")
+    parser.add_argument("--acervo", metavar="PASTA", default=None,
+                        help="Guarda o html bruto de cada curso scrapado nessa pasta, para reconstruir os dados sem novo scrape.")
+    parser.add_argument("--from-acervo", metavar="PASTA", default=None,
+                        help="Reconstroi os dados a partir do html guardado em um acervo, sem navegador e sem acessar o jupiter.")
+    parser.add_argument("--banco", metavar="ARQUIVO", default=None,
+                        help="Salva os dados scrapados ou carregados nesse banco SQLite.")
+    parser.add_argument("--from-banco", metavar="ARQUIVO", default=None,
+                        help="Consulta os dados direto de um banco SQLite, sem carregar todos na memoria.")
+    parser.add_argument("--diario", metavar="ARQUIVO", default="diario_do_scrape.jsonl",
+                        help="Arquivo onde cada curso terminado é registrado durante o scrape.")
+    parser.add_argument("--falhas", metavar="ARQUIVO", default="falhas_do_scrape.jsonl",
+                        help="Arquivo onde os cursos que falharam em todas as tentativas são registrados.")
+    parser.add_argument("--prazo-do-curso", metavar="SEGUNDOS", type=float, default=EnsinoUsp.PRAZO_DO_CURSO,
+                        help="Tempo maximo do scrape de um curso. Um curso que passa do prazo é tentado novamente depois.")
+    parser.add_argument("--rps", type=float, default=None,
+                        help="Quantidade maxima de buscas ao jupiter iniciadas por segundo. A quantidade de buscas simultaneas se adapta a latencia do jupiter, até o --workers ou o --conexoes.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma um scrape interrompido a partir do arquivo do diario.")
+    parser.add_argument("--base", metavar="ARQUIVO", default=None,
+                        help="Snapshot do scrape anterior. Cursos que não mudaram desde ele não passam pelo parse novamente.")
+    parser.add_argument("--delta", action="store_true",
+                        help="Salva o --snapshot como um delta do --base, com apenas os cursos e disciplinas que mudaram. O --base precisa continuar no mesmo lugar para que o snapshot seja carregado.")
+    parser.add_argument("--extracao", choices=[EnsinoUsp.EXTRACAO_HTML, EnsinoUsp.EXTRACAO_JS], default=EnsinoUsp.EXTRACAO_HTML,
+                        help="Como os dados de cada curso são extraidos no navegador: transferindo o html ou com um script que devolve JSON.")
+    parser.add_argument("--processos", type=int, default=0,
+                        help="Faz o parse dos cursos nessa quantidade de processos, em paralelo com a navegação (e com a reconstrução do --from-acervo).")
+    parser.add_argument("--perfil-rapido", action="store_true",
+                        help="Inicia o Chrome sem janela e sem baixar imagens, fontes e folhas de estilo.")
+    parser.add_argument("--rastreamento", metavar="ARQUIVO", default=None,
+                        help="Escreve o tempo de cada unidade, curso e fase do scrape nesse arquivo, no formato de trace do Chrome (Perfetto).")
+    parser.add_argument("--exportar", choices=["lc", "ddtc", "ddmc"], default=None,
+                        help="Escreve o resultado dessa funcionalidade e sai, sem as consultas interativas.")
+    parser.add_argument("--formato", choices=list(ESCRITORES), default="texto",
+                        help="Formato da saida do --exportar.")
+    parser.add_argument("--lote", metavar="ARQUIVO", default=None,
+                        help="Executa as consultas desse arquivo, uma por linha, escreve um resultado JSON por consulta e sai. Com - as consultas são lidas do stdin.")
+    parser.add_argument("--saida", metavar="ARQUIVO", default=None,
+                        help="Arquivo de saida do --exportar e do --lote. Por padrão o stdout.")
+    parser.add_argument("--colunar", metavar="PASTA", default=None,
+                        help="Exporta as tabelas de unidades, cursos, disciplinas e grades nessa pasta e sai.")
+    parser.add_argument("--formato-colunar", choices=["parquet", "arrow"], default="parquet",
+                        help="Formato das tabelas do --colunar: Parquet ou Arrow IPC.")
+    parser.add_argument("--servir", metavar="PORTA", type=int, default=None,
+                        help="Responde as consultas por HTTP/JSON nessa porta. Necessita de --from-snapshot ou --from-banco, que é recarregado quando o arquivo muda.")
+    parser.add_argument("--endereco", default="127.0.0.1",
+                        help="Endereço em que o servidor do --servir escuta.")
+    argumentos = parser.parse_args()
+    if argumentos.servir is not None and argumentos.from_snapshot is None and argumentos.from_banco is None:
+        parser.error("--servir necessita de --from-snapshot ou --from-banco.")
+    if argumentos.delta and (argumentos.base is None or argumentos.snapshot is None):
+        parser.error("--delta necessita de --base e --snapshot.")
+
+    separar = lambda valor : valor.split(',') if valor is not None else None
+    try:
+        argumentos.filtro = FiltroUsp(separar(argumentos.unidades), argumentos.cursos,
+                                      separar(argumentos.periodos), separar(argumentos.pular_modalidades))
+    except ValueError as erro:
+        parser.error(str(erro))
+    return argumentos
+
+def servir(argumentos : argparse.Namespace) -> None:
+    if argumentos.from_banco is not None:
+        caminho = argumentos.from_banco
+        carregar = lambda: BancoUsp.abrir(caminho)
+    else:
+        caminho = argumentos.from_snapshot
+        carregar = lambda: EnsinoUsp.carregar_snapshot(caminho)
+
+    servidor = ServidorUsp(carregar, caminho)
+    try:
+        asyncio.run(servidor.servir(argumentos.endereco, argumentos.servir))
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
 
 def main():
-    usp = EnsinoUsp()
+    argumentos = processar_argumentos()
+
+    if argumentos.servir is not None:
+        servir(argumentos)
+        return
+
+    if argumentos.from_banco is not None:
+        usp = BancoUsp.abrir(argumentos.from_banco)
+    elif argumentos.from_snapshot is not None:
+        usp = EnsinoUsp.carregar_snapshot(argumentos.from_snapshot)
+    elif argumentos.from_acervo is not None:
+        usp = EnsinoUsp.reconstruir_do_acervo(argumentos.from_acervo, processos=argumentos.processos,
+                                             filtro=argumentos.filtro)
+        if argumentos.snapshot is not None:
+            usp.salvar_snapshot(argumentos.snapshot)
+    else:
+        usp = EnsinoUsp(argumentos.quantidade,
+                        trabalhadores=argumentos.workers,
+                        backend=argumentos.backend,
+                        conexoes=argumentos.conexoes,
+                        diario=argumentos.diario,
+                        retomar=argumentos.resume,
+                        base=argumentos.base,
+                        extracao=argumentos.extracao,
+                        perfil_rapido=argumentos.perfil_rapido,
+                        rastreamento=argumentos.rastreamento,
+                        acervo=argumentos.acervo,
+                        processos=argumentos.processos,
+                        falhas=argumentos.falhas,
+                        prazo_do_curso=argumentos.prazo_do_curso,
+                        por_segundo=argumentos.rps,
+                        filtro=argumentos.filtro,
+                        url_base=argumentos.jupiter_url)
+        if argumentos.snapshot is not None:
+            usp.salvar_snapshot(argumentos.snapshot, argumentos.base if argumentos.delta else None)
+
+    if argumentos.banco is not None:
+        usp.salvar_banco(argumentos.banco)
+
+    if argumentos.colunar is not None:
+        for caminho in usp.exportar_colunar(argumentos.colunar, argumentos.formato_colunar):
+            print(f'Tabela escrita em {caminho}')
+        return
+
+    if argumentos.lote is not None:
+        usp.consulta_em_lote(argumentos.lote, argumentos.saida)
+        return
+
+    if argumentos.exportar is not None:
+        exportar = {
+            'lc'   : usp.cursos_por_unidade,
+            'ddtc' : usp.dados_de_todos_os_cursos,
+            'ddmc' : usp.disciplinas_usadas_em_mais_de_um_curso,
+        }
+        exportar[argumentos.exportar](argumentos.formato, argumentos.saida)
+        return
+
     usp.consulta_de_informacoes()
     
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+class AcervoUsp:
+    """
+    A classe AcervoUsp guarda o conteudo bruto scrapado do jupiter: a
+    lista de cursos de cada unidade e o html da grade (ou o JSON da
+    extração no navegador) de cada curso. Cada conteudo é comprimido e guardado
+    em um arquivo cujo nome é o hash do conteudo, então conteudos
+    repetidos são guardados uma única vez, e um indice, uma linha JSON
+    por registro, liga cada unidade e curso aos seus conteudos.
+
+    Com o acervo os cursos podem ser reconstruidos sem navegador e sem
+    acessar o jupiter, por exemplo depois de uma correção no parse.
+
+    Estrutura da pasta:
+        indice.jsonl           registros das unidades e dos cursos
+        objetos/ab/abcd...     conteudos comprimidos, pelo sha256
+    """
+
+    INDICE  = 'indice.jsonl'
+    OBJETOS = 'objetos'
+
+    pasta     : str
+    cursos    : dict[str, list[str]]
+    posicoes  : dict[str, int]
+    conteudo  : dict[tuple[str, str], dict]
+
+    def __init__(self, pasta : str) -> None:
+        """
+        :param pasta: Pasta do acervo. É criada caso não exista. Os registros
+            de um acervo existente são carregados e os novos são adicionados
+            ao final do indice.
+        :type pasta: str
+        """
+        self.pasta = pasta
+        self.cursos = {}
+        self.posicoes = {}
+        self.conteudo = {}
+        self._trava = threading.Lock()
+        self._arquivo = None
+
+        os.makedirs(os.path.join(pasta, self.OBJETOS), exist_ok=True)
+        if os.path.exists(self._caminho_do_indice()):
+            self._carregar()
+
+    def _caminho_do_indice(self) -> str:
+        return os.path.join(self.pasta, self.INDICE)
+
+    def _caminho_do_objeto(self, endereco : str) -> str:
+        return os.path.join(self.pasta, self.OBJETOS, endereco[:2], endereco)
+
+    def _carregar(self) -> None:
+        """
+        Lê os registros do indice. Quando um curso foi registrado mais de
+        uma vez vale o ultimo registro. Uma ultima linha incompleta, escrita
+        durante uma interrupção, é removida do indice.
+        """
+        fim_valido = 0
+        with open(self._caminho_do_indice(), 'rb') as arquivo:
+            for linha in arquivo:
+                try:
+                    registro = json.loads(linha)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                if not linha.endswith(b'\n'):
+                    break
+                fim_valido += len(linha)
+
+                if registro['tipo'] == 'unidade':
+                    self.cursos[registro['unidade']] = registro['cursos']
+                    self.posicoes[registro['unidade']] = registro['posicao']
+                elif registro['tipo'] == 'curso':
+                    self.conteudo[(registro['unidade'], registro['curso'])] = registro
+
+        os.truncate(self._caminho_do_indice(), fim_valido)
+
+    def _escrever(self, registro : dict) -> None:
+        """
+        Adiciona um registro ao indice. O indice é aberto apenas na primeira escrita.
+
+        :param registro: Registro para ser escrito.
+        :type registro: dict
+        """
+        linha = json.dumps(registro, ensure_ascii=False) + '\n'
+        with self._trava:
+            if self._arquivo is None:
+                self._arquivo = open(self._caminho_do_indice(), 'a', encoding='utf-8')
+            self._arquivo.write(linha)
+            self._arquivo.flush()
+
+    def guardar(self, conteudo : str | None) -> str | None:
+        """
+        Guarda um conteudo comprimido, caso ele ainda não esteja no acervo.
+        O arquivo é escrito em um arquivo temporario e depois renomeado,
+        então um objeto do acervo nunca fica pela metade.
+
+        :param conteudo: O conteudo, ou None caso não exista conteudo.
+        :type conteudo: str | None
+        :return: O endereço (sha256 em hexadecimal) do conteudo, ou None.
+        :rtype: str | None
+        """
+        if conteudo is None:
+            return None
+
+        dados = conteudo.encode('utf-8')
+        endereco = hashlib.sha256(dados).hexdigest()
+        caminho = self._caminho_do_objeto(endereco)
+        if os.path.exists(caminho):
+            return endereco
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Cada thread escreve no seu temporario, já que varios navegadores podem guardar o mesmo conteudo
+        temporario = f'{caminho}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(zlib.compress(dados, level=6))
+        os.replace(temporario, caminho)
+        return endereco
+
+    def ler(self, endereco : str | None) -> str | None:
+        """
+        Lê um conteudo do acervo.
+
+        :param endereco: O endereço do conteudo, ou None.
+        :type endereco: str | None
+        :return: O conteudo, ou None caso o endereço seja None.
+        :rtype: str | None
+        :raises ValueError: Se o conteudo não corresponder ao endereço.
+        """
+        if endereco is None:
+            return None
+
+        with open(self._caminho_do_objeto(endereco), 'rb') as arquivo:
+            dados = zlib.decompress(arquivo.read())
+        if hashlib.sha256(dados).hexdigest() != endereco:
+            raise ValueError(f'O objeto {endereco} do acervo {self.pasta} está corrompido.')
+        return dados.decode('utf-8')
+
+    def registrar_unidade(self, unidade : str, posicao : int, cursos : list[str]) -> None:
+        """
+        Registra os cursos presentes no seletor de cursos de uma unidade.
+
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :param posicao: Posição da unidade no seletor de unidades, para que a
+            reconstrução junte as unidades na mesma ordem do scrape.
+        :type posicao: int
+        :param cursos: Nome dos cursos da unidade, na ordem do seletor.
+        :type cursos: list[str]
+        """
+        with self._trava:
+            if self.cursos.get(unidade) == cursos and self.posicoes.get(unidade) == posicao:
+                return
+            self.cursos[unidade] = cursos
+            self.posicoes[unidade] = posicao
+        self._escrever({'tipo' : 'unidade', 'unidade' : unidade, 'posicao' : posicao, 'cursos' : cursos})
+
+    def unidades(self) -> list[str]:
+        """
+        Retorna as unidades registradas, na ordem do seletor de unidades.
+
+        :return: Nome de cada unidade.
+        :rtype: list[str]
+        """
+        return sorted(self.cursos, key=lambda unidade : self.posicoes[unidade])
+
+    def registrar_curso(self, unidade : str, curso : str, extracao : str, grade : str | None) -> None:
+        """
+        Guarda o conteudo de um curso e o registra no indice.
+
+        :param unidade: Nome da unidade do curso.
+        :type unidade: str
+        :param curso: Nome do curso.
+        :type curso: str
+        :param extracao: Forma como o conteudo foi extraido (EnsinoUsp.EXTRACAO_HTML ou EXTRACAO_JS).
+        :type extracao: str
+        :param grade: Html da aba da grade (ou o JSON da extração no navegador),
+            ou None caso o curso não tenha sido encontrado.
+        :type grade: str | None
+        """
+        registro = {
+            'tipo'     : 'curso',
+            'unidade'  : unidade,
+            'curso'    : curso,
+            'extracao' : extracao,
+            'grade'    : self.guardar(grade),
+        }
+        with self._trava:
+            self.conteudo[(unidade, curso)] = registro
+        self._escrever(registro)
+
+    def fechar(self) -> None:
+        """
+        Fecha o indice do acervo.
+        """
+        with self._trava:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
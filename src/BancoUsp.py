@@ -0,0 +1,394 @@
+import os
+import sqlite3
+import threading
+from itertools import islice
+from typing import Iterable, Iterator
+
+from .CursoUsp import CursoUsp
+from .DisciplinaUsp import DisciplinaUsp
+from .UnidadeUsp import UnidadeUsp
+from .EnsinoUsp import EnsinoUsp
+from .IndiceUsp import normalizar
+from .RegistroUsp import NA
+from .SugestoesUsp import SugestoesUsp, escolher, trigramas
+
+ESQUEMA = """
+CREATE TABLE unidades (
+    id    INTEGER PRIMARY KEY,
+    nome  TEXT NOT NULL UNIQUE,
+    sigla TEXT NOT NULL
+);
+
+CREATE TABLE cursos (
+    id               INTEGER PRIMARY KEY,
+    nome             TEXT NOT NULL UNIQUE,
+    nome_normalizado TEXT NOT NULL,
+    unidade          TEXT NOT NULL,
+    duracao_ideal    INTEGER,
+    duracao_minima   INTEGER,
+    duracao_maxima   INTEGER
+);
+
+CREATE TABLE disciplinas (
+    id                    INTEGER PRIMARY KEY,
+    codigo                TEXT NOT NULL UNIQUE,
+    nome                  TEXT NOT NULL,
+    nome_normalizado      TEXT NOT NULL,
+    creditos_aula         INTEGER,
+    creditos_trabalho     INTEGER,
+    carga_horaria         INTEGER,
+    carga_horaria_estagio INTEGER,
+    carga_horaria_pcc     INTEGER,
+    atividades_tpa        INTEGER
+);
+
+-- Uma linha para cada disciplina da grade de um curso. A posição guarda a ordem da grade
+CREATE TABLE grades (
+    curso_id   INTEGER NOT NULL REFERENCES cursos (id),
+    modalidade INTEGER NOT NULL,
+    posicao    INTEGER NOT NULL,
+    codigo     TEXT NOT NULL,
+    PRIMARY KEY (curso_id, modalidade, posicao)
+) WITHOUT ROWID;
+
+-- Uma linha para cada curso listado por uma unidade, incluindo os que não puderam ser scrapados
+CREATE TABLE cursos_das_unidades (
+    unidade_id INTEGER NOT NULL REFERENCES unidades (id),
+    curso      TEXT NOT NULL,
+    PRIMARY KEY (unidade_id, curso)
+) WITHOUT ROWID;
+
+-- Uma linha para cada curso de uma disciplina, na ordem em que os cursos foram encontrados
+CREATE TABLE cursos_das_disciplinas (
+    codigo  TEXT NOT NULL REFERENCES disciplinas (codigo),
+    posicao INTEGER NOT NULL,
+    curso   TEXT NOT NULL,
+    PRIMARY KEY (codigo, posicao)
+) WITHOUT ROWID;
+
+-- Os nomes que podem ser sugeridos, de cada tipo de sugestão, na ordem em que desempatam
+CREATE TABLE sugeridos (
+    tipo             INTEGER NOT NULL,
+    posicao          INTEGER NOT NULL,
+    nome             TEXT NOT NULL,
+    nome_normalizado TEXT NOT NULL,
+    trigramas        INTEGER NOT NULL,
+    PRIMARY KEY (tipo, posicao)
+) WITHOUT ROWID;
+
+-- O indice invertido de trigramas dos nomes normalizados dos sugeridos (SugestoesUsp)
+CREATE TABLE trigramas (
+    tipo     INTEGER NOT NULL,
+    trigrama TEXT NOT NULL,
+    posicao  INTEGER NOT NULL,
+    PRIMARY KEY (tipo, trigrama, posicao)
+) WITHOUT ROWID;
+"""
+
+# Versão do esquema, guardada no user_version do banco
+VERSAO = 2
+
+# Tipos das sugestões nas tabelas sugeridos e trigramas
+SUGESTOES_DE_CURSOS, SUGESTOES_DE_DISCIPLINAS, SUGESTOES_DE_CODIGOS = range(3)
+
+INDICES = """
+CREATE INDEX cursos_por_nome_normalizado ON cursos (nome_normalizado);
+CREATE INDEX disciplinas_por_nome_normalizado ON disciplinas (nome_normalizado);
+"""
+
+# Quantidade de linhas de cada executemany
+TAMANHO_DO_LOTE = 10000
+
+def _lotes(linhas : Iterable[tuple]) -> Iterator[list[tuple]]:
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, TAMANHO_DO_LOTE)):
+        yield lote
+
+def _valor(valor : int) -> int | None:
+    return None if valor == NA else valor
+
+class _Sugeridos:
+    """
+    Acumula as linhas das tabelas sugeridos e trigramas de um tipo de
+    sugestão. Os nomes repetidos ficam só na primeira posição, como no
+    SugestoesUsp.
+    """
+
+    def __init__(self, tipo : int) -> None:
+        self.tipo = tipo
+        self._vistos : set[str] = set()
+
+    def linhas(self, nomes : Iterable[str]) -> tuple[list[tuple], list[tuple]]:
+        sugeridos, do_indice = [], []
+        for nome in nomes:
+            if nome in self._vistos:
+                continue
+            posicao = len(self._vistos)
+            self._vistos.add(nome)
+            normalizado = normalizar(nome)
+            do_nome = trigramas(normalizado)
+            sugeridos.append((self.tipo, posicao, nome, normalizado, len(do_nome)))
+            do_indice.extend((self.tipo, trigrama, posicao) for trigrama in do_nome)
+        return sugeridos, do_indice
+
+    def inserir(self, conexao : sqlite3.Connection, nomes : Iterable[str]) -> None:
+        sugeridos, do_indice = self.linhas(nomes)
+        conexao.executemany('INSERT INTO sugeridos VALUES (?, ?, ?, ?, ?)', sugeridos)
+        conexao.executemany('INSERT INTO trigramas VALUES (?, ?, ?)', do_indice)
+
+def escrever_banco(caminho : str, unidades : Iterable[UnidadeUsp], cursos : Iterable[CursoUsp],
+                   disciplinas : Iterable[DisciplinaUsp]) -> None:
+    """
+    Escreve as unidades, cursos e disciplinas em um banco SQLite. O
+    banco é escrito em um arquivo temporario, em uma única transação,
+    e só substitui o arquivo final quando está completo. Os indices são
+    criados depois das inserções, o que é mais rapido que mante-los
+    durante as inserções.
+
+    :param caminho: Caminho do arquivo do banco.
+    :type caminho: str
+    :param unidades: Unidades scrapadas.
+    :type unidades: Iterable[UnidadeUsp]
+    :param cursos: Cursos scrapados.
+    :type cursos: Iterable[CursoUsp]
+    :param disciplinas: Disciplinas scrapadas.
+    :type disciplinas: Iterable[DisciplinaUsp]
+    """
+    temporario = caminho + '.tmp'
+    if os.path.exists(temporario):
+        os.remove(temporario)
+
+    conexao = sqlite3.connect(temporario, isolation_level=None)
+    try:
+        # O arquivo temporario é descartado se algo falhar, então não precisa de diario
+        conexao.execute('PRAGMA journal_mode = OFF')
+        conexao.execute('PRAGMA synchronous = OFF')
+        conexao.executescript(ESQUEMA)
+        conexao.execute(f'PRAGMA user_version = {VERSAO}')
+        conexao.execute('BEGIN')
+        sugeridos = [_Sugeridos(tipo) for tipo in (SUGESTOES_DE_CURSOS, SUGESTOES_DE_DISCIPLINAS, SUGESTOES_DE_CODIGOS)]
+
+        for lote in _lotes(enumerate(unidades, 1)):
+            conexao.executemany('INSERT INTO unidades VALUES (?, ?, ?)', [
+                (id_unidade, unidade.get_nome(), unidade.get_sigla()) for id_unidade, unidade in lote])
+            conexao.executemany('INSERT INTO cursos_das_unidades VALUES (?, ?)', [
+                (id_unidade, curso) for id_unidade, unidade in lote for curso in unidade.get_cursos()])
+
+        for lote in _lotes(enumerate(cursos, 1)):
+            linhas, grades = [], []
+            for id_curso, curso in lote:
+                linhas.append((id_curso, curso.get_curso(), normalizar(curso.get_curso()), curso.get_unidade(),
+                               _valor(curso.dur_idl), _valor(curso.dur_min), _valor(curso.dur_max)))
+                for modalidade, codigos in enumerate((curso.get_disciplinas_obrigatorias(),
+                                                      curso.get_disciplinas_opt_livre(),
+                                                      curso.get_disciplinas_opt_eletivas())):
+                    grades.extend((id_curso, modalidade, posicao, codigo) for posicao, codigo in enumerate(codigos))
+            conexao.executemany('INSERT INTO cursos VALUES (?, ?, ?, ?, ?, ?, ?)', linhas)
+            conexao.executemany('INSERT INTO grades VALUES (?, ?, ?, ?)', grades)
+            sugeridos[SUGESTOES_DE_CURSOS].inserir(conexao, (curso.get_curso() for _, curso in lote))
+
+        for lote in _lotes(disciplinas):
+            conexao.executemany('INSERT INTO disciplinas (codigo, nome, nome_normalizado, creditos_aula, '
+                                'creditos_trabalho, carga_horaria, carga_horaria_estagio, carga_horaria_pcc, '
+                                'atividades_tpa) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+                (disciplina.codigo, disciplina.nome, normalizar(disciplina.nome),
+                 _valor(disciplina.cred_aula), _valor(disciplina.cred_trab), _valor(disciplina.CH),
+                 _valor(disciplina.CE), _valor(disciplina.CP), _valor(disciplina.ATPA))
+                for disciplina in lote])
+            conexao.executemany('INSERT INTO cursos_das_disciplinas VALUES (?, ?, ?)', [
+                (disciplina.codigo, posicao, curso)
+                for disciplina in lote for posicao, curso in enumerate(disciplina.get_cursos())])
+            sugeridos[SUGESTOES_DE_DISCIPLINAS].inserir(conexao, (disciplina.nome for disciplina in lote))
+            sugeridos[SUGESTOES_DE_CODIGOS].inserir(conexao, (disciplina.codigo for disciplina in lote))
+
+        for comando in INDICES.split(';'):
+            if comando.strip():
+                conexao.execute(comando)
+        conexao.execute('COMMIT')
+        conexao.execute('ANALYZE')
+    except BaseException:
+        conexao.close()
+        os.remove(temporario)
+        raise
+
+    conexao.close()
+    os.replace(temporario, caminho)
+
+class _SugestoesDoBanco:
+    """
+    As sugestões de um tipo, calculadas no banco com o mesmo resultado
+    do SugestoesUsp. Os candidatos são escolhidos pelo indice de trigramas
+    do banco e só eles são lidos para a comparação final.
+    """
+
+    def __init__(self, banco : 'BancoUsp', tipo : int) -> None:
+        self._banco = banco
+        self._tipo = tipo
+
+    def sugerir(self, nome : str, n : int = 5, corte : float = 0.6) -> list[str]:
+        procurado = normalizar(nome)
+        do_procurado = list(trigramas(procurado))
+        marcadores = ', '.join('?' * len(do_procurado))
+        # Coeficiente de Dice dos trigramas, calculado do mesmo jeito que no SugestoesUsp. Os
+        # trigramas em comum são contados antes da junção, que então é feita uma vez por nome
+        candidatos = self._banco._conexao.execute(
+            f'SELECT s.posicao, s.nome, s.nome_normalizado FROM (SELECT posicao, COUNT(*) AS em_comum '
+            f'FROM trigramas WHERE tipo = ? AND trigrama IN ({marcadores}) GROUP BY posicao) AS t '
+            f'JOIN sugeridos AS s ON s.tipo = ? AND s.posicao = t.posicao '
+            f'ORDER BY -2.0 * t.em_comum / (? + s.trigramas), t.posicao LIMIT ?',
+            (self._tipo, *do_procurado, self._tipo, len(do_procurado), n * SugestoesUsp.CANDIDATOS_POR_SUGESTAO))
+        return escolher(procurado, candidatos, n, corte)
+
+class BancoUsp(EnsinoUsp):
+    """
+    A classe BancoUsp faz as mesmas consultas do EnsinoUsp sobre um
+    banco SQLite escrito por escrever_banco, sem carregar todos os dados
+    na memoria. Cada consulta busca no banco apenas as linhas que precisa,
+    utilizando os indices dos nomes normalizados, dos códigos e dos
+    trigramas das sugestões, e os comandos que percorrem todos os dados
+    leem as linhas aos poucos. Cada thread que consulta o banco (ex: as
+    threads do ServidorUsp) tem a sua propria conexão somente de leitura.
+    """
+
+    COLUNAS_DOS_CURSOS = 'id, nome, unidade, duracao_ideal, duracao_minima, duracao_maxima'
+    COLUNAS_DAS_DISCIPLINAS = ('codigo, nome, creditos_aula, creditos_trabalho, carga_horaria, '
+                               'carga_horaria_estagio, carga_horaria_pcc, atividades_tpa')
+
+    @classmethod
+    def abrir(cls, caminho : str) -> 'BancoUsp':
+        """
+        Abre um banco SQLite, somente para leitura, para fazer as consultas.
+
+        :param caminho: Caminho do arquivo do banco.
+        :type caminho: str
+        :return: O BancoUsp do banco.
+        :rtype: BancoUsp
+        :raises FileNotFoundError: Se o arquivo do banco não existir.
+        :raises ValueError: Se o banco foi escrito com outra versão do esquema.
+        """
+        if not os.path.isfile(caminho):
+            raise FileNotFoundError(f'Banco {caminho} não existe.')
+
+        banco = cls._sem_scrape()
+        banco._caminho = caminho
+        banco._conexoes_da_thread = threading.local()
+        banco._conexoes = []
+        banco._trava_das_conexoes = threading.Lock()
+        versao, = banco._conexao.execute('PRAGMA user_version').fetchone()
+        if versao != VERSAO:
+            banco.fechar()
+            raise ValueError(f'O banco {caminho} tem a versão {versao} do esquema e não a {VERSAO}. Escreva o banco novamente.')
+        banco._construir_indices()
+        return banco
+
+    @property
+    def _conexao(self) -> sqlite3.Connection:
+        """
+        A conexão da thread atual, aberta na primeira consulta da thread.
+        """
+        conexao = getattr(self._conexoes_da_thread, 'conexao', None)
+        if conexao is None:
+            # Cada conexão só é usada pela sua thread. check_same_thread=False apenas
+            # para que fechar, chamado de outra thread, possa fechar todas elas
+            conexao = sqlite3.connect(f'file:{self._caminho}?mode=ro', uri=True, check_same_thread=False)
+            with self._trava_das_conexoes:
+                self._conexoes.append(conexao)
+            self._conexoes_da_thread.conexao = conexao
+        return conexao
+
+    def fechar(self) -> None:
+        """
+        Fecha as conexões de todas as threads com o banco. Deve ser chamada
+        depois que as consultas em andamento terminarem.
+        """
+        with self._trava_das_conexoes:
+            conexoes, self._conexoes = self._conexoes, []
+        for conexao in conexoes:
+            conexao.close()
+
+    def _construir_indices(self) -> None:
+        """
+        Não carrega nenhum indice na memoria: as buscas por nome utilizam os
+        indices do banco e as sugestões são calculadas pelo indice de trigramas
+        do banco.
+        """
+        self._sugestoes_de_cursos = _SugestoesDoBanco(self, SUGESTOES_DE_CURSOS)
+        self._sugestoes_de_disciplinas = _SugestoesDoBanco(self, SUGESTOES_DE_DISCIPLINAS)
+        self._sugestoes_de_codigos = _SugestoesDoBanco(self, SUGESTOES_DE_CODIGOS)
+        self._matriz = None
+
+    def _curso(self, linha : tuple) -> CursoUsp:
+        id_curso, nome, unidade, *duracoes = linha
+        grades : tuple[list[str], list[str], list[str]] = ([], [], [])
+        for modalidade, codigo in self._conexao.execute(
+                'SELECT modalidade, codigo FROM grades WHERE curso_id = ? ORDER BY modalidade, posicao', (id_curso,)):
+            grades[modalidade].append(codigo)
+        return CursoUsp.de_tupla((nome, unidade, *duracoes, *grades), self._registros)
+
+    def _disciplina(self, linha : tuple) -> DisciplinaUsp:
+        cursos = [curso for curso, in self._conexao.execute(
+            'SELECT curso FROM cursos_das_disciplinas WHERE codigo = ? ORDER BY posicao', (linha[0],))]
+        return DisciplinaUsp.de_tupla((*linha, cursos), self._registros)
+
+    def _cursos(self, onde : str = '', parametros : tuple = ()) -> Iterator[CursoUsp]:
+        # O cursor das linhas é separado do cursor das grades, então os cursos saem aos poucos
+        for linha in self._conexao.execute(
+                f'SELECT {self.COLUNAS_DOS_CURSOS} FROM cursos {onde} ORDER BY id', parametros):
+            yield self._curso(linha)
+
+    def _disciplinas(self, onde : str = '', parametros : tuple = ()) -> Iterator[DisciplinaUsp]:
+        for linha in self._conexao.execute(
+                f'SELECT {self.COLUNAS_DAS_DISCIPLINAS} FROM disciplinas {onde} ORDER BY id', parametros):
+            yield self._disciplina(linha)
+
+    def buscar_cursos(self, nome_do_curso : str) -> list[CursoUsp]:
+        cursos = list(self._cursos('WHERE nome = ?', (nome_do_curso,)))
+        if cursos:
+            return cursos
+
+        return list(self._cursos('WHERE nome_normalizado = ?', (normalizar(nome_do_curso),)))
+
+    def buscar_disciplinas_por_nome(self, nome : str) -> list[DisciplinaUsp]:
+        return list(self._disciplinas('WHERE nome_normalizado = ?', (normalizar(nome),)))
+
+    def buscar_disciplina(self, codigo : str) -> DisciplinaUsp | None:
+        return next(self._disciplinas('WHERE codigo = ?', (codigo,)), None)
+
+    def iterar_unidades(self) -> Iterator[UnidadeUsp]:
+        for id_unidade, nome in self._conexao.execute('SELECT id, nome FROM unidades ORDER BY id'):
+            cursos = {curso for curso, in self._conexao.execute(
+                'SELECT curso FROM cursos_das_unidades WHERE unidade_id = ?', (id_unidade,))}
+            yield UnidadeUsp(nome, cursos, self._registros)
+
+    def iterar_cursos(self) -> Iterator[CursoUsp]:
+        return self._cursos()
+
+    def iterar_disciplinas(self) -> Iterator[DisciplinaUsp]:
+        return self._disciplinas()
+
+    def iterar_disciplinas_compartilhadas(self) -> Iterator[DisciplinaUsp]:
+        return self._disciplinas('WHERE (SELECT COUNT(*) FROM cursos_das_disciplinas AS c '
+                                 'WHERE c.codigo = disciplinas.codigo) > 1')
+
+    def _materializar(self) -> tuple[list[UnidadeUsp], dict[str, CursoUsp], dict[str, DisciplinaUsp]]:
+        """
+        Carrega todos os dados do banco nas estruturas do EnsinoUsp, para
+        as analises que precisam de todos os dados de uma vez.
+        """
+        return (list(self.iterar_unidades()),
+                {curso.get_curso() : curso for curso in self.iterar_cursos()},
+                {disciplina.get_codigo() : disciplina for disciplina in self.iterar_disciplinas()})
+
+    def matriz(self):
+        if self._matriz is None:
+            # Importado aqui para que o numpy e o scipy só sejam necessarios para as analises
+            from .MatrizUsp import MatrizUsp
+            unidades, cursos, disciplinas = self._materializar()
+            self._matriz = MatrizUsp(cursos, disciplinas, unidades, self._registros)
+        return self._matriz
+
+    def exportar_colunar(self, pasta : str, formato : str = 'parquet') -> list[str]:
+        # Importado aqui para que o pyarrow só seja necessario para a exportação
+        from .ExportacaoUsp import exportar_colunar
+        unidades, cursos, disciplinas = self._materializar()
+        return exportar_colunar(pasta, unidades, cursos, disciplinas, formato)
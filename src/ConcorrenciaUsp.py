@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator
+
+from .RastreamentoUsp import RastreamentoUsp
+
+class ConcorrenciaUsp:
+    """
+    A classe ConcorrenciaUsp controla quantas buscas ao jupiter acontecem
+    ao mesmo tempo, ajustando o limite pelo AIMD (aumento aditivo e
+    redução multiplicativa) do controle de congestionamento do TCP.
+
+    Enquanto as respostas chegam sem erro e com latencia proxima da
+    menor latencia observada, o limite aumenta (dobra a cada janela até
+    o primeiro congestionamento e depois aumenta um por janela). Um erro,
+    um popup de erro ou uma latencia muito acima da menor observada
+    indicam que o servidor está sobrecarregado, e o limite cai pela metade,
+    no maximo uma vez por janela. Opcionalmente as buscas também são
+    limitadas a uma quantidade maxima por segundo.
+
+    O limite atual é registrado no rastreamento como a medida 'concorrência'.
+    """
+
+    # Fator da redução do limite a cada congestionamento
+    REDUCAO = 0.5
+    # Uma latencia (média móvel) acima de FATOR_DE_LATENCIA vezes a menor latencia indica congestionamento
+    FATOR_DE_LATENCIA = 3.0
+    # Aumentos de latencia menores que esse, em segundos, são ruido e não congestionamento
+    TOLERANCIA = 0.05
+    # Peso de cada nova latencia na média móvel
+    PESO_DA_LATENCIA = 0.2
+    # Quantidade de latencias em que a menor latencia é procurada
+    AMOSTRAS = 200
+
+    limite : float
+    em_voo : int
+
+    def __init__(self, maximo : int, minimo : int = 1, inicial : int | None = None,
+                 por_segundo : float | None = None, adaptativa : bool = True,
+                 rastreamento : RastreamentoUsp | None = None) -> None:
+        """
+        :param maximo: Limite maximo de buscas simultaneas.
+        :type maximo: int
+        :param minimo: Limite minimo de buscas simultaneas.
+        :type minimo: int
+        :param inicial: Limite inicial. Por padrão um quarto do maximo.
+        :type inicial: int | None
+        :param por_segundo: Quantidade maxima de buscas iniciadas por segundo, ou None para não limitar.
+        :type por_segundo: float | None
+        :param adaptativa: Se False o limite fica fixo no maximo.
+        :type adaptativa: bool
+        :param rastreamento: Rastreamento em que o limite e os congestionamentos são registrados.
+        :type rastreamento: RastreamentoUsp | None
+        """
+        self.maximo = maximo
+        self.minimo = min(minimo, maximo)
+        self.adaptativa = adaptativa
+        if not adaptativa:
+            self.limite = float(maximo)
+        else:
+            self.limite = float(max(self.minimo, min(maximo, inicial if inicial is not None else maximo // 4)))
+        self.em_voo = 0
+        self._intervalo = 1 / por_segundo if por_segundo else 0.0
+        self._proximo_inicio = 0.0
+        self._partida_lenta = True
+        self._latencias : deque = deque(maxlen=self.AMOSTRAS)
+        self._latencia_media : float | None = None
+        self._ultima_reducao = 0.0
+        self._rastreamento = rastreamento if rastreamento is not None else RastreamentoUsp()
+        self._trava = threading.Lock()
+        self._condicao = threading.Condition(self._trava)
+        self._condicao_async : asyncio.Condition | None = None
+        self._rastreamento.medir('concorrência', int(self.limite))
+
+    def _livre(self) -> bool:
+        # Deve ser chamada com a trava
+        return self.em_voo < int(self.limite)
+
+    def _atraso_do_ritmo(self) -> float:
+        """
+        Reserva o proximo inicio permitido pelo limite de buscas por segundo.
+
+        :return: Quanto tempo, em segundos, a busca deve esperar antes de começar.
+        :rtype: float
+        """
+        if not self._intervalo:
+            return 0.0
+        with self._trava:
+            agora = time.monotonic()
+            inicio = max(agora, self._proximo_inicio)
+            self._proximo_inicio = inicio + self._intervalo
+            return inicio - agora
+
+    def _terminou(self, latencia : float, falhou : bool) -> None:
+        """
+        Ajusta o limite com o resultado de uma busca. Deve ser chamada com a trava.
+        """
+        self.em_voo -= 1
+        if not self.adaptativa:
+            return
+
+        if falhou:
+            self._reduzir()
+            return
+
+        self._latencias.append(latencia)
+        media = self._latencia_media
+        self._latencia_media = latencia if media is None else media + self.PESO_DA_LATENCIA * (latencia - media)
+        menor = min(self._latencias)
+        if self._latencia_media > max(menor * self.FATOR_DE_LATENCIA, menor + self.TOLERANCIA):
+            self._reduzir()
+            return
+
+        # Na partida lenta cada resposta aumenta o limite em um, o que dobra o limite a cada janela
+        self.limite = min(self.maximo, self.limite + (1 if self._partida_lenta else 1 / self.limite))
+        self._rastreamento.medir('concorrência', int(self.limite))
+
+    def _reduzir(self) -> None:
+        """
+        Reduz o limite pela metade, a não ser que ele já tenha sido reduzido
+        na ultima janela (o tempo de uma resposta), já que as buscas que
+        estavam em voo sofreram o mesmo congestionamento. Deve ser chamada com a trava.
+        """
+        agora = time.monotonic()
+        self._partida_lenta = False
+        if agora - self._ultima_reducao < (self._latencia_media or 0.0):
+            return
+        self._ultima_reducao = agora
+        self.limite = max(self.minimo, self.limite * self.REDUCAO)
+        self._rastreamento.contar('congestionamentos')
+        self._rastreamento.medir('concorrência', int(self.limite))
+
+    def congestionamento(self) -> None:
+        """
+        Sinaliza um congestionamento que não é um erro da busca, como o
+        popup de erro do jupiter, reduzindo o limite.
+        """
+        if not self.adaptativa:
+            return
+        with self._condicao:
+            self._reduzir()
+
+    @contextmanager
+    def vaga(self, relogio : Callable[[], float] = time.perf_counter,
+             sem_congestionamento : tuple[type[BaseException], ...] = ()) -> Iterator[None]:
+        """
+        Ocupa uma vaga durante uma busca feita em uma thread (ex: por um
+        navegador). Bloqueia até existir uma vaga. Uma exceção dentro do
+        bloco with conta como congestionamento.
+
+        :param relogio: Relogio com que a latencia da busca é medida. Com um relogio
+            que só avança enquanto a busca espera o jupiter (EsperaUsp.tempo_no_jupiter)
+            o tempo do navegador e do parse não é confundido com sobrecarga do jupiter.
+        :type relogio: Callable[[], float]
+        :param sem_congestionamento: Exceções que não indicam sobrecarga do jupiter,
+            como o parse de uma página inesperada, e não reduzem o limite.
+        :type sem_congestionamento: tuple[type[BaseException], ...]
+        """
+        with self._condicao:
+            self._condicao.wait_for(self._livre)
+            self.em_voo += 1
+        atraso = self._atraso_do_ritmo()
+        if atraso > 0:
+            time.sleep(atraso)
+
+        inicio = relogio()
+        falhou = True
+        try:
+            yield
+            falhou = False
+        except sem_congestionamento:
+            falhou = False
+            raise
+        finally:
+            with self._condicao:
+                self._terminou(relogio() - inicio, falhou)
+                self._condicao.notify_all()
+
+    @asynccontextmanager
+    async def vaga_async(self) -> AsyncIterator[None]:
+        """
+        Ocupa uma vaga durante uma busca feita em uma tarefa do asyncio.
+        Espera até existir uma vaga. Uma exceção dentro do bloco async
+        with conta como congestionamento.
+        """
+        # A condição do asyncio precisa ser criada dentro do laço de eventos que a utiliza
+        if self._condicao_async is None:
+            self._condicao_async = asyncio.Condition()
+        condicao = self._condicao_async
+
+        async with condicao:
+            await condicao.wait_for(self._livre)
+            self.em_voo += 1
+        atraso = self._atraso_do_ritmo()
+        if atraso > 0:
+            await asyncio.sleep(atraso)
+
+        inicio = time.perf_counter()
+        falhou = True
+        try:
+            yield
+            falhou = False
+        finally:
+            with self._trava:
+                self._terminou(time.perf_counter() - inicio, falhou)
+            async with condicao:
+                condicao.notify_all()
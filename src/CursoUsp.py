@@ -1,52 +1,104 @@
-from bs4.element import Tag
+from array import array
+from typing import Iterable
 
-class CursoUsp:
+from .RegistroUsp import RegistrosUsp, NA, para_inteiro, de_inteiro, de_inteiro_str
 
-    nome : str 
-    unidade : str
-    dur_idl : str
-    dur_min : str
-    dur_max : str
-    disciplinas_obrigatorias  : set[str]
-    disciplinas_opt_livre     : set[str] 
-    disciplinas_opt_eletivas  : set[str]
+# Posição da grade de cada modalidade, pela ultima palavra do nome da modalidade
+_MODALIDADES = {'obrigatórias' : 0, 'livres' : 1, 'eletivas' : 2}
 
-    def __init__(self, curso : str, unidade : str, conteudos : Tag) -> None:
-        self.unidade = unidade
-        self.nome = curso
+class CursoUsp:
 
-        if conteudos is None:
-            self.dur_idl = "N/A"
-            self.dur_min = "N/A"
-            self.dur_max = "N/A"
+    __slots__ = ('registros', 'id', 'id_unidade', 'dur_idl', 'dur_min', 'dur_max',
+                 'disciplinas_obrigatorias', 'disciplinas_opt_livre', 'disciplinas_opt_eletivas')
+
+    # Nome e unidade são guardados como identificadores dos registros de cursos e unidades,
+    # as durações como inteiros (NA quando vazias) e as disciplinas como identificadores
+    # do registro de códigos
+    registros : RegistrosUsp
+    id : int
+    id_unidade : int
+    dur_idl : int
+    dur_min : int
+    dur_max : int
+    disciplinas_obrigatorias  : array
+    disciplinas_opt_livre     : array
+    disciplinas_opt_eletivas  : array
+
+    def __init__(self, curso : str, unidade : str, duracoes : tuple[str, str, str] | None,
+                 registros : RegistrosUsp) -> None:
+        self.registros = registros
+        self.id = registros.cursos.id(curso)
+        self.id_unidade = registros.unidades.id(unidade)
+
+        if duracoes is None:
+            self.dur_idl = NA
+            self.dur_min = NA
+            self.dur_max = NA
 
         else:
-            self.dur_idl = conteudos.find("span", class_= "duridlhab").text
-            if not self.dur_idl:
-                self.dur_idl = "N/A"
-                
-            self.dur_min = conteudos.find("span", class_= "durminhab").text
-            if not self.dur_min:
-                self.dur_min = "N/A"
-                
-            self.dur_max = conteudos.find("span", class_= "durmaxhab").text
-            if not self.dur_max:
-                self.dur_max = "N/A"
-
-        self.disciplinas_obrigatorias  = set()
-        self.disciplinas_opt_livre     = set()
-        self.disciplinas_opt_eletivas  = set()
-    
-    def add_disciplina(self, modalidade: str, disciplina : str) -> None:
-        tipo_de_modalidade = modalidade.split(' ')[-1].strip().lower()
-        if "obrigatórias" == tipo_de_modalidade:
-            self.disciplinas_obrigatorias.add(disciplina)
+            self.dur_idl, self.dur_min, self.dur_max = (para_inteiro(duracao) for duracao in duracoes)
+
+        self.disciplinas_obrigatorias  = array('I')
+        self.disciplinas_opt_livre     = array('I')
+        self.disciplinas_opt_eletivas  = array('I')
 
-        elif "livres" == tipo_de_modalidade:
-            self.disciplinas_opt_livre.add(disciplina)
-            
-        elif "eletivas" == tipo_de_modalidade:
-            self.disciplinas_opt_eletivas.add(disciplina)
+    @classmethod
+    def de_tupla(cls, valores : tuple, registros : RegistrosUsp) -> 'CursoUsp':
+        """
+        Cria um curso a partir da tupla gerada por para_tupla.
+
+        :param valores: Tupla com os valores do curso.
+        :type valores: tuple
+        :param registros: Registros dos nomes dos dados do curso.
+        :type registros: RegistrosUsp
+        :return: O curso.
+        :rtype: CursoUsp
+        """
+        nome, unidade, dur_idl, dur_min, dur_max, obrigatorias, livres, eletivas = valores
+        curso = cls(nome, unidade, (dur_idl, dur_min, dur_max), registros)
+        curso.disciplinas_obrigatorias.extend(registros.codigos.id(codigo) for codigo in obrigatorias)
+        curso.disciplinas_opt_livre.extend(registros.codigos.id(codigo) for codigo in livres)
+        curso.disciplinas_opt_eletivas.extend(registros.codigos.id(codigo) for codigo in eletivas)
+        return curso
+
+    def para_tupla(self) -> tuple:
+        """
+        Representa o curso como uma tupla de valores simples,
+        utilizada para salvar o curso em disco.
+
+        :return: Tupla com os valores do curso.
+        :rtype: tuple
+        """
+        return (self.get_curso(), self.get_unidade(), de_inteiro_str(self.dur_idl),
+                de_inteiro_str(self.dur_min), de_inteiro_str(self.dur_max),
+                tuple(self.get_disciplinas_obrigatorias()),
+                tuple(self.get_disciplinas_opt_livre()),
+                tuple(self.get_disciplinas_opt_eletivas()))
+
+    def add_disciplinas(self, disciplinas : Iterable[tuple[str, str]]) -> None:
+        """
+        Adiciona as disciplinas da grade ao curso, na ordem da página.
+        As disciplinas repetidas em uma modalidade e as de modalidades
+        desconhecidas são ignoradas.
+
+        :param disciplinas: Tuplas (modalidade, código) de cada disciplina.
+        :type disciplinas: Iterable[tuple[str, str]]
+        """
+        grades = (self.disciplinas_obrigatorias, self.disciplinas_opt_livre, self.disciplinas_opt_eletivas)
+        # O conjunto só existe durante a adição, então o curso continua guardando apenas os arrays
+        vistas = {(posicao, identificador) for posicao, grade in enumerate(grades) for identificador in grade}
+        for modalidade, disciplina in disciplinas:
+            posicao = _MODALIDADES.get(modalidade.split(' ')[-1].strip().lower())
+            if posicao is None:
+                continue
+            identificador = self.registros.codigos.id(disciplina)
+            if (posicao, identificador) not in vistas:
+                vistas.add((posicao, identificador))
+                grades[posicao].append(identificador)
+
+    def add_disciplina(self, modalidade: str, disciplina : str) -> None:
+        # Cada chamada percorre a grade, então a grade inteira deve ser adicionada com add_disciplinas
+        self.add_disciplinas(((modalidade, disciplina),))
 
     def get_curso(self) -> str:
         """
@@ -55,7 +107,7 @@ class CursoUsp:
         :return: Nome do curso.
         :rtype: str
         """
-        return self.nome
+        return self.registros.cursos.nome(self.id)
 
     def get_unidade(self) -> str:
         """
@@ -64,62 +116,106 @@ class CursoUsp:
         :return: Nome da unidade e sua sigla.
         :rtype: str
         """
-        return self.unidade
+        return self.registros.unidades.nome(self.id_unidade)
     
-    def get_duracao_ideal(self) -> int:
+    def get_duracao_ideal(self) -> int | str:
         """
         Pega o inteiro da duração ideal do curso.
 
-        :return: Duração ideal.
-        :rtype: int
+        :return: Duração ideal, ou "N/A" caso ela não tenha sido encontrada.
+        :rtype: int | str
         """
-        return self.dur_idl
+        return de_inteiro(self.dur_idl)
     
-    def get_duracao_minima(self) -> int:
+    def get_duracao_minima(self) -> int | str:
         """
         Pega o inteiro da duração minima do curso.
 
-        :return: Duração minima.
-        :rtype: int
+        :return: Duração minima, ou "N/A" caso ela não tenha sido encontrada.
+        :rtype: int | str
         """
-        return self.dur_min
+        return de_inteiro(self.dur_min)
 
 
-    def get_duracao_maxima(self) -> int:
+    def get_duracao_maxima(self) -> int | str:
         """
         Pega o inteiro da duração maxima do curso.
 
-        :return: Duração maxima.
-        :rtype: int
+        :return: Duração maxima, ou "N/A" caso ela não tenha sido encontrada.
+        :rtype: int | str
         """
-        return self.dur_max
+        return de_inteiro(self.dur_max)
     
-    def __str__(self) -> str:
-        curso_str = f'\nUnidade: {self.unidade}'
-        curso_str += f'\nCurso: {self.nome}'
-        curso_str += f'\nDuração Ideal: {self.dur_idl}'
-        curso_str += f'\nDuração Mínima: {self.dur_min}'
-        curso_str += f'\nDuração Máxima: {self.dur_max}'
-
-        curso_str += "\n\nDisciplinas Obrigatórias:\n"
-        if len(self.disciplinas_obrigatorias) == 0:
-            curso_str += "\tN/A\n"
-        else:
-            for disc in self.disciplinas_obrigatorias:
-                curso_str += f'\t{disc}\n'
+    def get_disciplinas_obrigatorias(self) -> list[str]:
+        """
+        Pega os códigos das disciplinas obrigatórias do curso.
 
-        curso_str += "\nDisciplinas Optativas Livres:\n"
-        if len(self.disciplinas_opt_livre) == 0:
-            curso_str += '\tN/A\n'
-        else:
-            for disc in self.disciplinas_opt_livre:
-                curso_str += f'\t{disc}\n'
+        :return: Códigos das disciplinas obrigatórias.
+        :rtype: list[str]
+        """
+        return [self.registros.codigos.nome(identificador) for identificador in self.disciplinas_obrigatorias]
 
-        curso_str += "\nDisciplinas Optativas Eletivas:\n"
-        if len(self.disciplinas_opt_eletivas) == 0:
-            curso_str += '\tN/A\n'
-        else:
-            for disc in self.disciplinas_opt_eletivas:
-                curso_str += f'\t{disc}\n'
-            
-        return curso_str
\ No newline at end of file
+    def get_disciplinas_opt_livre(self) -> list[str]:
+        """
+        Pega os códigos das disciplinas optativas livres do curso.
+
+        :return: Códigos das disciplinas optativas livres.
+        :rtype: list[str]
+        """
+        return [self.registros.codigos.nome(identificador) for identificador in self.disciplinas_opt_livre]
+
+    def get_disciplinas_opt_eletivas(self) -> list[str]:
+        """
+        Pega os códigos das disciplinas optativas eletivas do curso.
+
+        :return: Códigos das disciplinas optativas eletivas.
+        :rtype: list[str]
+        """
+        return [self.registros.codigos.nome(identificador) for identificador in self.disciplinas_opt_eletivas]
+
+    def para_dicionario(self) -> dict:
+        """
+        Representa o curso como um dicionario, utilizado nas saidas
+        JSON Lines e CSV. Os valores "N/A" são representados por None.
+
+        :return: Dicionario com os valores do curso.
+        :rtype: dict
+        """
+        return {
+            'unidade'        : self.get_unidade(),
+            'curso'          : self.get_curso(),
+            'duracao_ideal'  : None if self.dur_idl == NA else self.dur_idl,
+            'duracao_minima' : None if self.dur_min == NA else self.dur_min,
+            'duracao_maxima' : None if self.dur_max == NA else self.dur_max,
+            'obrigatorias'   : self.get_disciplinas_obrigatorias(),
+            'livres'         : self.get_disciplinas_opt_livre(),
+            'eletivas'       : self.get_disciplinas_opt_eletivas(),
+        }
+
+    def partes_do_texto(self):
+        """
+        Gera, em ordem, os pedaços da representação legivel do curso,
+        para que ela possa ser escrita sem montar a string inteira.
+
+        :return: Gerador dos pedaços do texto.
+        :rtype: Iterator[str]
+        """
+        yield (f'\nUnidade: {self.get_unidade()}'
+               f'\nCurso: {self.get_curso()}'
+               f'\nDuração Ideal: {self.get_duracao_ideal()}'
+               f'\nDuração Mínima: {self.get_duracao_minima()}'
+               f'\nDuração Máxima: {self.get_duracao_maxima()}')
+
+        codigos = self.registros.codigos.nomes
+        for titulo, disciplinas in (("\n\nDisciplinas Obrigatórias:\n", self.disciplinas_obrigatorias),
+                                    ("\nDisciplinas Optativas Livres:\n", self.disciplinas_opt_livre),
+                                    ("\nDisciplinas Optativas Eletivas:\n", self.disciplinas_opt_eletivas)):
+            yield titulo
+            if len(disciplinas) == 0:
+                yield '\tN/A\n'
+            else:
+                # Uma secção inteira por vez, para não escrever pedaço por pedaço
+                yield '\t' + '\n\t'.join([codigos[identificador] for identificador in disciplinas]) + '\n'
+
+    def __str__(self) -> str:
+        return ''.join(self.partes_do_texto())
@@ -0,0 +1,180 @@
+import json
+import os
+from threading import Lock
+from typing import Callable
+
+from .UnidadeUsp import UnidadeUsp
+from .CursoUsp import CursoUsp
+from .DisciplinaUsp import DisciplinaUsp
+from .RegistroUsp import RegistrosUsp
+
+class DiarioUsp:
+    """
+    A classe DiarioUsp é um diario (journal) do scrape. Cada curso
+    terminado é escrito imediatamente no arquivo, uma linha JSON por
+    registro, para que um scrape interrompido possa ser retomado
+    de onde parou. Cada curso guarda as modalidades ignoradas pelo
+    filtro do scrape, e ao retomar com outro filtro de modalidades os
+    cursos registrados com o filtro antigo são scrapados novamente.
+    """
+
+    caminho     : str
+    cursos      : dict[str, list[str]]
+    feitos      : dict[str, dict[str, tuple[CursoUsp, list[DisciplinaUsp]]]]
+    impressoes  : dict[str, str]
+    modalidades : list[str]
+    registros   : RegistrosUsp
+
+    def __init__(self, caminho : str, retomar : bool, modalidades : list[str] | None = None,
+                 registros : RegistrosUsp | None = None) -> None:
+        """
+        :param caminho: Caminho do arquivo do diario.
+        :type caminho: str
+        :param retomar: Se True os registros já presentes no arquivo são
+            carregados e os novos são adicionados ao final. Caso contrario
+            o arquivo é recomeçado.
+        :type retomar: bool
+        :param modalidades: Modalidades ignoradas pelo filtro do scrape (FiltroUsp.modalidades).
+        :type modalidades: list[str] | None
+        :param registros: Registros dos nomes dos cursos carregados, os mesmos do scrape.
+        :type registros: RegistrosUsp | None
+        """
+        self.caminho = caminho
+        self.registros = registros if registros is not None else RegistrosUsp()
+        self.modalidades = sorted(modalidades or [])
+        self.cursos  = {}
+        self.feitos  = {}
+        self.impressoes = {}
+        self._trava  = Lock()
+
+        if retomar and os.path.exists(caminho):
+            self._carregar()
+            self._arquivo = open(caminho, 'a', encoding='utf-8')
+        else:
+            self._arquivo = open(caminho, 'w', encoding='utf-8')
+
+    def _carregar(self) -> None:
+        """
+        Lê os registros do arquivo. Uma ultima linha incompleta, escrita
+        durante a interrupção do scrape, é removida do arquivo para que
+        os novos registros comecem em uma linha nova.
+        """
+        fim_valido = 0
+        with open(self.caminho, 'rb') as arquivo:
+            for linha in arquivo:
+                try:
+                    registro = json.loads(linha)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                if not linha.endswith(b'\n'):
+                    break
+                fim_valido += len(linha)
+
+                unidade = registro['unidade']
+                if registro['tipo'] == 'unidade':
+                    self.cursos[unidade] = registro['cursos']
+                elif registro['tipo'] == 'curso':
+                    # A grade de um curso registrado com outro filtro de modalidades não serve para este scrape
+                    if registro.get('modalidades', []) != self.modalidades:
+                        continue
+                    curso = CursoUsp.de_tupla(registro['curso'], self.registros)
+                    disciplinas = [DisciplinaUsp.de_tupla(valores, self.registros) for valores in registro['disciplinas']]
+                    self.feitos.setdefault(unidade, {})[curso.get_curso()] = (curso, disciplinas)
+                    if registro.get('impressao') is not None:
+                        self.impressoes[curso.get_curso()] = registro['impressao']
+
+        os.truncate(self.caminho, fim_valido)
+
+    def _escrever(self, registro : dict) -> None:
+        """
+        Escreve um registro e força a sua gravação no disco.
+
+        :param registro: Registro para ser escrito.
+        :type registro: dict
+        """
+        linha = json.dumps(registro, ensure_ascii=False) + '\n'
+        with self._trava:
+            self._arquivo.write(linha)
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+
+    def registrar_unidade(self, unidade : str, cursos : list[str]) -> None:
+        """
+        Registra os cursos presentes no seletor de cursos de uma unidade.
+
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :param cursos: Nome dos cursos da unidade, na ordem do seletor.
+        :type cursos: list[str]
+        """
+        if self.cursos.get(unidade) == cursos:
+            return
+        self.cursos[unidade] = cursos
+        self._escrever({'tipo' : 'unidade', 'unidade' : unidade, 'cursos' : cursos})
+
+    def registrar_curso(self, unidade : str, resultado : tuple[CursoUsp, list[DisciplinaUsp]], impressao : str | None = None) -> None:
+        """
+        Registra um curso terminado.
+
+        :param unidade: Nome da unidade do curso.
+        :type unidade: str
+        :param resultado: O curso e as disciplinas da sua grade.
+        :type resultado: tuple[CursoUsp, list[DisciplinaUsp]]
+        :param impressao: Impressão digital do conteudo do curso.
+        :type impressao: str | None
+        """
+        curso, disciplinas = resultado
+        self._escrever({
+            'tipo'        : 'curso',
+            'unidade'     : unidade,
+            'curso'       : curso.para_tupla(),
+            'disciplinas' : [disciplina.para_tupla() for disciplina in disciplinas],
+            'impressao'   : impressao,
+            'modalidades' : self.modalidades,
+        })
+
+    def get_curso(self, unidade : str, curso : str) -> tuple[CursoUsp, list[DisciplinaUsp]] | None:
+        """
+        Pega o resultado de um curso já registrado no diario.
+
+        :param unidade: Nome da unidade do curso.
+        :type unidade: str
+        :param curso: Nome do curso.
+        :type curso: str
+        :return: O resultado do curso, ou None caso ele não esteja no diario.
+        :rtype: tuple[CursoUsp, list[DisciplinaUsp]] | None
+        """
+        return self.feitos.get(unidade, {}).get(curso)
+
+    def get_unidade(self, unidade : str, aceitar : Callable[[str], bool] | None = None
+                    ) -> tuple[UnidadeUsp, list[tuple[CursoUsp, list[DisciplinaUsp]]]] | None:
+        """
+        Pega o resultado de uma unidade, caso todos os seus cursos
+        já estejam registrados no diario.
+
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :param aceitar: Função que recebe o nome de um curso e diz se ele entra
+            no scrape. Apenas os cursos aceitos precisam estar registrados, e
+            apenas eles entram no resultado.
+        :type aceitar: Callable[[str], bool] | None
+        :return: O resultado da unidade, ou None caso ela não esteja completa.
+        :rtype: tuple[UnidadeUsp, list[tuple[CursoUsp, list[DisciplinaUsp]]]] | None
+        """
+        cursos = self.cursos.get(unidade)
+        if cursos is None:
+            return None
+        if aceitar is not None:
+            cursos = [curso for curso in cursos if aceitar(curso)]
+
+        resultados = [self.get_curso(unidade, curso) for curso in cursos]
+        if any(resultado is None for resultado in resultados):
+            return None
+
+        return UnidadeUsp(unidade, set(cursos), self.registros), resultados
+
+    def fechar(self) -> None:
+        """
+        Fecha o arquivo do diario.
+        """
+        self._arquivo.close()
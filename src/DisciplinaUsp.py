@@ -1,52 +1,83 @@
-from bs4.element import Tag
+from array import array
+
+from .RegistroUsp import RegistrosUsp, NA, para_inteiro, de_inteiro, de_inteiro_str
 
 class DisciplinaUsp:
 
+    __slots__ = ('registros', 'codigo', 'nome', 'cred_aula', 'cred_trab', 'CH', 'CE', 'CP', 'ATPA', 'cursos')
+
+    # Os créditos e cargas horárias são guardados como inteiros (NA quando vazios)
+    # e os cursos como identificadores do registro de cursos
+    registros : RegistrosUsp
     codigo : str
     nome : str
-    cred_aula : str
-    cred_trab : str
-    CH : str
-    CE : str
-    CP : str
-    ATPA : str
-    cursos : list[str]
-
-    def __init__(self, tag : Tag, curso : str):
-        self.codigo = tag.text
-        if not self.codigo:
-            self.codigo = "N/A"
-        tag = tag.parent.parent
-        self.nome = tag.contents[1].text
-        if not self.nome:
-            self.nome = "N/A"
-        self.cred_aula = tag.contents[2].text
-        if not self.cred_aula:
-            self.cred_aula = "N/A"
-        self.cred_trab = tag.contents[3].text
-        if not self.cred_trab:
-            self.cred_trab = "N/A"
-        self.CH = tag.contents[4].text
-        if not self.CH:
-            self.CH = "N/A"
-        self.CE = tag.contents[5].text
-        if not self.CE:
-            self.CE = "N/A"
-        self.CP = tag.contents[6].text
-        if not self.CP:
-            self.CP = "N/A"
-        self.ATPA = tag.contents[7].text
-        if not self.ATPA:
-            self.ATPA = "N/A"
-        self.cursos = []
-        self.cursos.append(curso)
-        
+    cred_aula : int
+    cred_trab : int
+    CH : int
+    CE : int
+    CP : int
+    ATPA : int
+    cursos : array
+
+    def __init__(self, valores : tuple[str, str, str, str, str, str, str, str], curso : str,
+                 registros : RegistrosUsp):
+        """
+        :param valores: Os textos das celulas da linha da disciplina na grade:
+            código, nome, créditos aula, créditos trabalho, CH, CE, CP e ATPA.
+        :type valores: tuple[str, str, str, str, str, str, str, str]
+        :param curso: Nome do curso em que a disciplina foi encontrada.
+        :type curso: str
+        :param registros: Registros dos nomes dos dados da disciplina.
+        :type registros: RegistrosUsp
+        """
+        codigo, nome, *numericos = valores
+        self.registros = registros
+        # O código é o mesmo objeto guardado no registro, que também é referenciado pelos cursos
+        self.codigo = registros.codigos.nome(registros.codigos.id(codigo if codigo else "N/A"))
+        self.nome = nome if nome else "N/A"
+        (self.cred_aula, self.cred_trab,
+         self.CH, self.CE, self.CP, self.ATPA) = (para_inteiro(valor) for valor in numericos)
+        self.cursos = array('I')
+        self.cursos.append(registros.cursos.id(curso))
+
+    @classmethod
+    def de_tupla(cls, valores : tuple, registros : RegistrosUsp) -> 'DisciplinaUsp':
+        """
+        Cria uma disciplina a partir da tupla gerada por para_tupla.
+
+        :param valores: Tupla com os valores da disciplina.
+        :type valores: tuple
+        :param registros: Registros dos nomes dos dados da disciplina.
+        :type registros: RegistrosUsp
+        :return: A disciplina.
+        :rtype: DisciplinaUsp
+        """
+        *campos, cursos = valores
+        disciplina = cls.__new__(cls)
+        disciplina.registros = registros
+        disciplina.codigo = registros.codigos.nome(registros.codigos.id(campos[0]))
+        disciplina.nome = campos[1]
+        (disciplina.cred_aula, disciplina.cred_trab,
+         disciplina.CH, disciplina.CE, disciplina.CP, disciplina.ATPA) = (para_inteiro(valor) for valor in campos[2:])
+        disciplina.cursos = array('I', (registros.cursos.id(curso) for curso in cursos))
+        return disciplina
+
+    def para_tupla(self) -> tuple:
+        """
+        Representa a disciplina como uma tupla de valores simples,
+        utilizada para salvar a disciplina em disco.
+
+        :return: Tupla com os valores da disciplina.
+        :rtype: tuple
+        """
+        return (self.codigo, self.nome) + tuple(de_inteiro_str(valor) for valor in (
+                self.cred_aula, self.cred_trab, self.CH, self.CE, self.CP, self.ATPA)) + (tuple(self.get_cursos()),)
 
     def add_curso(self, curso : str) -> None:
         """
         Adiciona um curso na disciplina, indicando que ela faz parte desse curso
         """
-        self.cursos.append(curso)
+        self.cursos.append(self.registros.cursos.id(curso))
 
     def get_codigo(self) -> str:
         """
@@ -66,59 +97,59 @@ class DisciplinaUsp:
         """
         return self.nome
 
-    def get_creditos_aula(self) -> str:
+    def get_creditos_aula(self) -> int | str:
         """
         Pega o inteiro de créditos aula da disciplina.
 
         :return: Créditos aula da disciplina.
-        :rtype: int
+        :rtype: int | str
         """
-        return self.cred_aula
+        return de_inteiro(self.cred_aula)
 
-    def get_creditos_trabalho(self) -> str:
+    def get_creditos_trabalho(self) -> int | str:
         """
         Pega o inteiro de créditos trabalho da disciplina.
 
         :return: Créditos trabalho da disciplina.
-        :rtype: int
+        :rtype: int | str
         """
-        return self.cred_trab
+        return de_inteiro(self.cred_trab)
 
-    def get_carga_horaria(self) -> str:
+    def get_carga_horaria(self) -> int | str:
         """
         Pega o inteiro de carga horária da disciplina.
 
         :return: Carga Horária da disciplina.
-        :rtype: int
+        :rtype: int | str
         """
-        return self.CH
+        return de_inteiro(self.CH)
 
-    def get_carga_horaria_estagio(self) -> str:
+    def get_carga_horaria_estagio(self) -> int | str:
         """
         Pega o inteiro de carga horária de estágio da disciplina.
 
         :return: Carga Horária de Estágio da disciplina.
-        :rtype: int
+        :rtype: int | str
         """
-        return self.CE
+        return de_inteiro(self.CE)
 
-    def get_carga_horaria_praticas_componentes_curriculares(self) -> str:
+    def get_carga_horaria_praticas_componentes_curriculares(self) -> int | str:
         """
         Pega o inteiro de carga horária de práticas como componentes curriculares da disciplina.
 
         :return: Carga Horária de Práticas Como Componentes Curriculares da disciplina.
-        :rtype: int
+        :rtype: int | str
         """
-        return self.CP
+        return de_inteiro(self.CP)
     
-    def get_atividades_teorico_praticas_aprofundamento(self) -> str:
+    def get_atividades_teorico_praticas_aprofundamento(self) -> int | str:
         """
         Pega o inteiro de ativides teórico práticas de aprofundamento da disciplina.
 
         :return: Atividades Teórico-Práticas de Aprofundamento da disciplina.
-        :rtype: int
+        :rtype: int | str
         """
-        return self.ATPA
+        return de_inteiro(self.ATPA)
 
     def get_cursos(self) -> list[str]:
         """
@@ -127,18 +158,57 @@ class DisciplinaUsp:
         :return: Lista dos cursos que tem essa disciplina.
         :rtype: list[str]
         """
-        return self.cursos
+        return [self.registros.cursos.nome(identificador) for identificador in self.cursos]
+
+    def get_quantidade_de_cursos(self) -> int:
+        """
+        Pega a quantidade de cursos que tem essa disciplina, sem montar a lista de nomes.
+
+        :return: Quantidade de cursos que tem essa disciplina.
+        :rtype: int
+        """
+        return len(self.cursos)
+
+    def para_dicionario(self) -> dict:
+        """
+        Representa a disciplina como um dicionario, utilizado nas saidas
+        JSON Lines e CSV. Os valores "N/A" são representados por None.
+
+        :return: Dicionario com os valores da disciplina.
+        :rtype: dict
+        """
+        return {
+            'codigo'                : self.codigo,
+            'nome'                  : self.nome,
+            'creditos_aula'         : None if self.cred_aula == NA else self.cred_aula,
+            'creditos_trabalho'     : None if self.cred_trab == NA else self.cred_trab,
+            'carga_horaria'         : None if self.CH == NA else self.CH,
+            'carga_horaria_estagio' : None if self.CE == NA else self.CE,
+            'carga_horaria_pcc'     : None if self.CP == NA else self.CP,
+            'atividades_tpa'        : None if self.ATPA == NA else self.ATPA,
+            'cursos'                : self.get_cursos(),
+        }
+
+    def partes_do_texto(self):
+        """
+        Gera, em ordem, os pedaços da representação legivel da disciplina,
+        para que ela possa ser escrita sem montar a string inteira.
+
+        :return: Gerador dos pedaços do texto.
+        :rtype: Iterator[str]
+        """
+        yield (f'\nCódigo: {self.codigo}'
+               f'\nNome: {self.nome}'
+               f'\nCréditos Aula: {self.get_creditos_aula()}'
+               f'\nCréditos Trabalho: {self.get_creditos_trabalho()}'
+               f'\nCarga Horária: {self.get_carga_horaria()}'
+               f'\nCarga Horária Estágio: {self.get_carga_horaria_estagio()}'
+               f'\nCarga Horária PCC: {self.get_carga_horaria_praticas_componentes_curriculares()}'
+               f'\nAtividades TPA: {self.get_atividades_teorico_praticas_aprofundamento()}'
+               "\nCursos do qual faz parte:\n")
+        cursos = self.registros.cursos.nomes
+        for identificador in self.cursos:
+            yield f'\t{cursos[identificador]}\n'
 
     def __str__(self) -> str:
-        disciplina_str = f'\nCódigo: {self.codigo}'
-        disciplina_str += f'\nNome: {self.nome}'
-        disciplina_str += f'\nCréditos Aula: {self.cred_aula}'
-        disciplina_str += f'\nCréditos Trabalho: {self.cred_trab}'
-        disciplina_str += f'\nCarga Horária: {self.CH}'
-        disciplina_str += f'\nCarga Horária Estágio: {self.CE}'
-        disciplina_str += f'\nCarga Horária PCC: {self.CP}'
-        disciplina_str += f'\nAtividades TPA: {self.ATPA}'
-        disciplina_str += "\nCursos do qual faz parte:\n"
-        for curso in self.cursos:
-            disciplina_str += f'\t{curso}\n'
-        return disciplina_str
\ No newline at end of file
+        return ''.join(self.partes_do_texto())
@@ -1,23 +1,48 @@
-from bs4 import BeautifulSoup
-from bs4.element import Tag
 from selenium.webdriver import Chrome
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
-from selenium.common.exceptions import ElementClickInterceptedException
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator
+import asyncio
+import functools
+import hashlib
+import os
+from queue import Queue, Empty
+from threading import Lock
 import time
-import sys
 import timeit
 import re
-from difflib import get_close_matches
+import sys
 
 from .UnidadeUsp import UnidadeUsp
 from .CursoUsp import CursoUsp
 from .DisciplinaUsp import DisciplinaUsp
+from .AcervoUsp import AcervoUsp
+from .DiarioUsp import DiarioUsp
+from .ConcorrenciaUsp import ConcorrenciaUsp
+from .FalhasUsp import FalhasUsp
+from .FiltroUsp import FiltroUsp
+from .RegistroUsp import RegistrosUsp
+from .EsperaUsp import EsperaUsp
+from .IndiceUsp import IndiceUsp
+from .RastreamentoUsp import RastreamentoUsp
+from .EstagioDeParseUsp import EstagioDeParseUsp
+from .ParserUsp import ERROS_DE_PARSE, Duracoes, ValoresDisciplina, extrair_curso, ler_curso_extraido
+from .SnapshotUsp import escrever_snapshot, ler_snapshot
+from .SugestoesUsp import SugestoesUsp
+from .RenderizadorUsp import ESCRITORES, abrir_escritor
+from .LoteUsp import EscritorDeLote, LoteUsp
+
+# O resultado do scrape de um curso é o proprio curso e as disciplinas da sua grade
+ResultadoCurso = tuple[CursoUsp, list[DisciplinaUsp]]
+# O resultado do scrape de uma unidade é a unidade e o resultado de cada um dos seus cursos.
+# Com o parse em outros processos o resultado de um curso pode ser um futuro
+ResultadoUnidade = tuple[UnidadeUsp, list[ResultadoCurso | Future]]
 
 class EnsinoUsp:
     """
@@ -34,6 +59,71 @@ class EnsinoUsp:
     ABA_BUSCAR  = 'step1-tab'
     ABA_GRADE   = 'step4-tab' 
 
+    CURSOS_URL  = 'https://uspdigital.usp.br/jupiterweb/jupCarreira.jsp?codmnu=8275'
+
+    # Só o conteudo das abas do curso é transferido, e não a página inteira
+    SCRIPT_STEP4 = "return document.getElementById('step4').outerHTML"
+
+    # Texto das opções de um seletor, ignorando a opção vazia de "selecione"
+    SCRIPT_OPCOES = """
+        return Array.from(document.getElementById(arguments[0]).children)
+            .filter(function (opcao) { return opcao.getAttribute('value') !== ''; })
+            .map(function (opcao) { return opcao.textContent; });
+    """
+
+    # Faz no navegador a mesma extração do ParserUsp.extrair_curso e devolve um JSON
+    # no formato {"d": [ideal, minima, maxima], "r": [[modalidade, código, nome, ...], ...]},
+    # ou null caso a aba não tenha as tabelas do curso
+    SCRIPT_EXTRAIR_CURSO = """
+        var step4 = document.getElementById('step4');
+        if (step4 === null || step4.querySelector('table') === null) {
+            return 'null';
+        }
+        function texto(elemento) {
+            return elemento === null ? '' : elemento.textContent;
+        }
+        var duracoes = ['duridlhab', 'durminhab', 'durmaxhab'].map(function (classe) {
+            return texto(step4.querySelector('span.' + classe));
+        });
+        var modalidades = new Map();
+        var linhas = [];
+        step4.querySelectorAll('.disciplina').forEach(function (disciplina) {
+            var linha = disciplina.parentNode.parentNode;
+            var tabela = linha.parentNode;
+            if (!modalidades.has(tabela)) {
+                var cabecalho = tabela.querySelector('tr');
+                modalidades.set(tabela, cabecalho === null ? '' : texto(cabecalho.querySelector('td')));
+            }
+            var celulas = Array.from(linha.children)
+                .filter(function (celula) { return celula.tagName === 'TD'; })
+                .map(texto);
+            celulas[0] = texto(disciplina);
+            while (celulas.length < 8) {
+                celulas.push('');
+            }
+            linhas.push([modalidades.get(tabela)].concat(celulas.slice(0, 8)));
+        });
+        return JSON.stringify({d: duracoes, r: linhas});
+    """
+
+    # Botão que fecha o dialogo do popup de erro, e o script que o fecha caso o botão não seja encontrado
+    XPATH_FECHAR_ERRO  = "//*[@id='err']/ancestor::div[contains(@class, 'ui-dialog')]//button"
+    SCRIPT_FECHAR_ERRO = "jQuery('#err').dialog('close');"
+
+    # Tempo maximo do scrape de um curso, incluindo todas as suas esperas
+    PRAZO_DO_CURSO = 120.0
+
+    # Onde o caminho do chromedriver é guardado entre as execuções
+    CACHE_DO_DRIVER = os.path.join(os.path.expanduser('~'), '.cache', 'scrape-usp', 'chromedriver')
+
+    # Recursos que o perfil rapido não baixa
+    RECURSOS_BLOQUEADOS = ['*.css', '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico',
+                           '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+
+    # Formas de extrair os dados de um curso no navegador
+    EXTRACAO_HTML = 'html'
+    EXTRACAO_JS   = 'js'
+
     def _get_unidades(self, nav : Chrome) -> list[str]:
         """
         Pega o nome de todas as unidades presentes no
@@ -48,10 +138,8 @@ class EnsinoUsp:
         :rtype: list[str]
         """
         # Demora um pouco para a lista das unidades aparecerem então é necessario esperar
-        WebDriverWait(nav, 60).until(ec.presence_of_element_located((By.CSS_SELECTOR, "#comboUnidade :nth-child(2)")))
-        unidades_soup = BeautifulSoup(nav.page_source, features="html.parser")
-        return [child.get_text() for child in unidades_soup.find(id='comboUnidade').children 
-                if (type(child) is Tag) and child.get('value') != '']
+        self._espera.esperar_condicao(nav, 'unidades', ec.presence_of_element_located((By.CSS_SELECTOR, "#comboUnidade :nth-child(2)")))
+        return nav.execute_script(self.SCRIPT_OPCOES, 'comboUnidade')
 
     def _get_cursos(self, nav : Chrome) -> list[str]:
         """
@@ -68,22 +156,19 @@ class EnsinoUsp:
         :rtype: list[str]
         """
         # Novamente é necessario esperar a lista de cursos
-        WebDriverWait(nav, 60).until(ec.presence_of_element_located((By.CSS_SELECTOR, "#comboCurso :nth-child(2)")))
-
-        cursos_soup = BeautifulSoup(nav.page_source, features="html.parser")
-        return [child.get_text() for child in cursos_soup.find(id='comboCurso') 
-                    if (type(child) is Tag) and child.get('value') != '']       
+        self._espera.esperar_condicao(nav, 'cursos', ec.presence_of_element_located((By.CSS_SELECTOR, "#comboCurso :nth-child(2)")))
+        return nav.execute_script(self.SCRIPT_OPCOES, 'comboCurso')
 
     def _click_aba(self, nav : Chrome, aba : str) -> None:
         """
         Clica eu uma das abas 'buscar', 'informações do curso',
-        'projeto pedagógico' ou 'grade curricular'. A tentativa
-        de clicar na aba sera infinita até que seja possível 
-        clicar.
+        'projeto pedagógico' ou 'grade curricular'. Enquanto o
+        clique for interceptado novas tentativas são feitas, cada
+        vez mais espaçadas, até o tempo limite dos cliques.
 
         :param nav: O navegador para scraping dos dados. Ele
             não pode estar com o popup de erro se não essa função
-            ficara infinitamente tentando clicar em uma das abas.
+            ficara tentando clicar em uma das abas até o tempo limite.
         :type nav: Chrome
         :param aba: Uma string do id da aba ser clicada. Os id seguem 
             o padrão, 'step1-tab', 'step2-tab' ..., dentro dessa classe
@@ -91,14 +176,10 @@ class EnsinoUsp:
             das duas abas que serão necessarias clicar.
         :type aba: str
         """
-        while True:
-            try:
-                nav.find_element(By.ID, aba).click()
-                break
-            except ElementClickInterceptedException:
-                continue
+        with self._rastreamento.intervalo('clique'):
+            self._espera.clicar(nav, By.ID, aba)
 
-    def _esperar_carregar(self, nav : Chrome) -> None:
+    def _esperar_carregar(self, nav : Chrome, tipo : str = 'carregar', marca : int | None = None) -> None:
         """
         Espera o popup de carregar desaparecer.
 
@@ -106,14 +187,17 @@ class EnsinoUsp:
             que o navegador acabou de fazer algo que faz com que
             o popup apareça.
         :type nav: Chrome
+        :param tipo: O tipo da espera, utilizado para o tempo limite e o histograma.
+        :type tipo: str
+        :param marca: A marca feita com self._espera.marcar antes da ação que
+            faz o popup aparecer. Caso seja None não é esperado o inicio de
+            uma nova requisição.
+        :type marca: int | None
         """
-        time.sleep(0.1)
-        WebDriverWait(nav, 10).until(
-            lambda nav: nav.execute_script("return jQuery.active == 0")
-        )
-        WebDriverWait(nav, 30).until(ec.invisibility_of_element_located((By.CLASS_NAME, 'blockUI.blockOverlay')))  
+        with self._rastreamento.intervalo('espera', tipo=tipo):
+            self._espera.esperar(nav, tipo, marca)
 
-    def _checa_erro_popup(self, nav : Chrome) -> bool:
+    def _checa_erro_popup(self, nav : Chrome, marca : int | None = None) -> bool:
         """
         Checa pelo popup de erro (informações não encontradas).
         Se ele for encontrado, fecha ele.
@@ -122,64 +206,108 @@ class EnsinoUsp:
             que o navegador acabou de fazer algo que possivelmente
             faça que o popup apareça.
         :type nav: Chrome
+        :param marca: A marca feita antes da ação que possivelmente
+            faça o popup aparecer.
+        :type marca: int | None
         :return: Retorna True se o popup foi encontrado, False caso
             contrario.
         :rtype: bool
         """   
-        self._esperar_carregar(nav)
+        self._esperar_carregar(nav, 'enviar', marca)
         try:
             nav.find_element(By.ID, 'err')
-            nav.find_elements(By.CLASS_NAME, 'ui-button-text')[2].click()
-            return True
         except NoSuchElementException:
             return False
 
-    def _get_curso_info(self, nav : Chrome) -> Tag:
+        self._rastreamento.contar('popups de erro')
+        # O popup também aparece quando o jupiter está sobrecarregado, então reduz a concorrência
+        self._concorrencia.congestionamento()
+        # O botão é procurado dentro do proprio dialogo do erro, já que a página tem outros dialogos com botões
+        botoes = nav.find_elements(By.XPATH, self.XPATH_FECHAR_ERRO)
+        if botoes:
+            botoes[0].click()
+        else:
+            nav.execute_script(self.SCRIPT_FECHAR_ERRO)
+        return True
+
+    def _get_disciplinas(self, nav : Chrome) -> str:
         """
-        Pega a aba das informações do curso.
+        Pega o html da aba da grade curricular do curso, que contém
+        as informações de cada disciplina na grade deste curso. A aba
+        também contém a tabela de informações do curso, então a aba
+        de informações não precisa ser transferida.
 
         :param nav: O navegador para scraping dos dados. Pressupõe
             que o navegador clicou no botão de enviar após selecionar
             um curso.
         :type nav: Chrome
-        :return: Aba de informações para scraping.
-        :rtype: Tag
-        """      
-        self._esperar_carregar(nav)
-        return BeautifulSoup(nav.page_source, features="html.parser").find(id='step4').find('table').find('tr').find('td')
-    
-    def _get_disciplinas(self, nav : Chrome) -> list[Tag]:
+        :return: O html da aba da grade para scraping.
+        :rtype: str
+        """     
+        self._esperar_carregar(nav, 'info')
+        marca = self._espera.marcar(nav)
+        self._click_aba(nav, self.ABA_GRADE)
+        self._esperar_carregar(nav, 'grade', marca)
+
+        with self._rastreamento.intervalo('transferência'):
+            return nav.execute_script(self.SCRIPT_STEP4)
+
+    def _get_curso_extraido(self, nav : Chrome) -> str:
         """
-        Pega a aba da grade curricular do curso e as informações
-        de cada disciplina na grade deste curso caso as informações
-        ainda não tenham sido coletadas.
+        Abre a aba da grade curricular do curso e extrai, no proprio
+        navegador, as durações e as disciplinas do curso.
 
         :param nav: O navegador para scraping dos dados. Pressupõe
             que o navegador clicou no botão de enviar após selecionar
             um curso.
         :type nav: Chrome
-        :param dis_ja: O set das disciplinas que ja foram processadas
-            para evitar que a mesma aba seja aberta duas vezes.
-        :type nav: set[str]
-        :return: A função retorna a aba da grade para scraping na primeira
-            posição da tupla. Na segunda retorna uma lista com o código de
-            cada disciplina da grade do curso.
-        :rtype: tuple[Tag, list[str]]
-        """     
+        :return: O JSON devolvido pelo SCRIPT_EXTRAIR_CURSO.
+        :rtype: str
+        """
         self._esperar_carregar(nav)
+        marca = self._espera.marcar(nav)
         self._click_aba(nav, self.ABA_GRADE)
-        self._esperar_carregar(nav)
+        self._esperar_carregar(nav, 'grade', marca)
 
-        tudo_soup = BeautifulSoup(nav.page_source, "html.parser")
-        disciplinas_do_curso : list[Tag] = tudo_soup.find_all(class_='disciplina')
+        with self._rastreamento.intervalo('transferência'):
+            return nav.execute_script(self.SCRIPT_EXTRAIR_CURSO)
 
-        return disciplinas_do_curso
+    def _caminho_do_driver(self) -> str:
+        """
+        Pega o caminho do chromedriver. O caminho resolvido pelo webdriver
+        manager é guardado em disco, então nas proximas execuções nenhuma
+        consulta a rede ou busca no sistema de arquivos é feita.
+
+        :return: Caminho do executavel do chromedriver.
+        :rtype: str
+        """
+        if self._driver is not None:
+            return self._driver
+
+        try:
+            with open(self.CACHE_DO_DRIVER, encoding='utf-8') as arquivo:
+                caminho = arquivo.read().strip()
+        except OSError:
+            caminho = ''
+
+        if not caminho or not os.path.isfile(caminho):
+            caminho = ChromeDriverManager().install()
+            os.makedirs(os.path.dirname(self.CACHE_DO_DRIVER), exist_ok=True)
+            with open(self.CACHE_DO_DRIVER, 'w', encoding='utf-8') as arquivo:
+                arquivo.write(caminho)
+
+        self._driver = caminho
+        return caminho
 
     def _ini_chrome(self) -> Chrome:
         """
         Inicializa o webdriver do Chrome. **É necessario que você
         tenha o Chrome instalado no seu computador no caminho padrão.**
 
+        No perfil rapido o Chrome é iniciado sem janela (headless), não
+        espera o carregamento de recursos secundarios da página e não
+        baixa imagens, fontes e folhas de estilo.
+
         :return: O navegador para webscraping.
         :rtype: Chrome
         """      
@@ -187,29 +315,53 @@ class EnsinoUsp:
         options.add_argument("--log-level=3")
         options.add_experimental_option('excludeSwitches', ['enable-logging'])
 
-        ChromeDriverManager().install()
+        if self._perfil_rapido:
+            options.add_argument("--headless=new")
+            options.add_argument("--window-size=1366,768")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--disable-extensions")
+            options.add_argument("--disable-dev-shm-usage")
+            options.add_argument("--no-first-run")
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images' : 2,
+                'profile.managed_default_content_settings.stylesheets' : 2,
+                'profile.managed_default_content_settings.fonts' : 2,
+            })
+            options.page_load_strategy = 'eager'
+
+        navegador = Chrome(service=Service(self._caminho_do_driver()), options=options)
 
-        return Chrome(service=Service(ChromeDriverManager().install()),options=options)
+        if self._perfil_rapido:
+            # As preferencias não bloqueiam todos os recursos, então o resto é bloqueado pelo devtools
+            navegador.execute_cdp_cmd('Network.enable', {})
+            navegador.execute_cdp_cmd('Network.setBlockedURLs', {'urls' : self.RECURSOS_BLOQUEADOS})
+
+        return navegador
     
-    def _processar_quantidade_de_unidades(self, quantidade_de_unidades : int) -> int:
+    def _processar_quantidade_de_unidades(self, quantidade_de_unidades : int, argumento : str | None) -> int:
         """
-        Processa o primeiro argumento do programa, que é a qunatidade
+        Processa o argumento do programa que indica a qunatidade
         de unidades para serem scrapadas.
 
         :param quantidade_de_unidades: É a quantiadade de que estão presentes
             no seletor de unidades, utilizado como valor padrão para entradas
             erroneas ou inexistentes.
         :type quantidade_de_unidades: int
+        :param argumento: O valor passado na linha de comando, ou None caso
+            nenhum valor tenha sido passado.
+        :type argumento: str | None
         :return: Quantiadade de unidades para scrape.
         :rtype: int
         """
+        if argumento is None:
+            return quantidade_de_unidades
+
         try:
-            numero_de_unidades_para_scrape = int(sys.argv[1])
+            numero_de_unidades_para_scrape = int(argumento)
         except ValueError:
             print('\033[0;31mValor passado não é um inteiro valido. Portanto foi escolhido o número máximo de unidades\033[0;37m\n')
             return quantidade_de_unidades
-        except IndexError:
-            return quantidade_de_unidades
 
         if numero_de_unidades_para_scrape < 0:
             print('\033[0;31mNão é possivel fazer o scrape de um número negativo de unidades. Portanto foi escolhido o número máximo de unidades.\033[0;37m\n')
@@ -220,68 +372,661 @@ class EnsinoUsp:
         else:
             return numero_de_unidades_para_scrape
 
-    # A função de init é suposta dar scrape em todos os conteudos, inicializando as classes
-    # a partir do conteudo scrapado
-    def __init__(self):
-        self.unidades    = []
-        self.cursos      = {}
-        self.disciplinas = {}
-
-        navegador : Chrome = self._ini_chrome()
-        CURSOS_URL : str = 'https://uspdigital.usp.br/jupiterweb/jupCarreira.jsp?codmnu=8275'
-        navegador.get(CURSOS_URL)
+    def _escolher_unidades(self, unidades : list[str], quantidade_de_unidades : str | None) -> list[tuple[int, str]]:
+        """
+        Escolhe as unidades do scrape: as unidades aceitas pelo filtro e,
+        delas, as primeiras indicadas pela quantidade de unidades.
 
-        unidades = self._get_unidades(navegador)        
+        :param unidades: Nome de cada unidade do seletor de unidades.
+        :type unidades: list[str]
+        :param quantidade_de_unidades: Quantidade de unidades passada na linha de comando.
+        :type quantidade_de_unidades: str | None
+        :return: Tuplas (posição no seletor, nome) das unidades escolhidas.
+        :rtype: list[tuple[int, str]]
+        """
+        ausentes = self._filtro.siglas_ausentes(unidades)
+        if ausentes:
+            print(f'\033[0;31mNenhuma unidade com as siglas {", ".join(ausentes)}.\033[0;37m\n')
 
-        qtd_unidades = self._processar_quantidade_de_unidades(len(unidades))
-        if qtd_unidades == 1:
-            print('Fazendo o scrape de 1 unidade da USP')
-        else:
-            print(f'Fazendo o scrape de {qtd_unidades} unidades da USP')
+        aceitas = [(posicao, unidade) for posicao, unidade in enumerate(unidades) if self._filtro.aceita_unidade(unidade)]
+        return aceitas[:self._processar_quantidade_de_unidades(len(aceitas), quantidade_de_unidades)]
 
-        tempo_do_inicio = timeit.default_timer()
-        
-        for seletor, unidade in zip(range(2, qtd_unidades + 2), unidades):
-            seletor_de_unidades = navegador.find_element(By.ID, "comboUnidade")
-            seletor_de_unidades.click()
-            seletor_de_unidades.find_element(By.CSS_SELECTOR, f'#comboUnidade :nth-child({seletor})').click()
+    def _abrir_pagina_de_cursos(self) -> tuple[Chrome, list[str]]:
+        """
+        Inicializa um navegador, abre a página de carreiras do
+        jupiter e espera o seletor de unidades carregar.
 
-            cursos = self._get_cursos(navegador)
+        :return: O navegador pronto para o scrape e a lista com o
+            nome de cada unidade do seletor.
+        :rtype: tuple[Chrome, list[str]]
+        """
+        # O webdriver manager não lida bem com varias instalações simultaneas
+        with self._rastreamento.intervalo('abrir navegador'):
+            with self._trava_do_chrome:
+                navegador : Chrome = self._ini_chrome()
+            navegador.get(self.CURSOS_URL)
+            return navegador, self._get_unidades(navegador)
 
-            self.unidades.append(UnidadeUsp(unidade, set(cursos)))
+    def _scrape_curso(self, nav : Chrome, seletor_curso : int, curso : str, unidade : str) -> ResultadoCurso | Future:
+        """
+        Seleciona um curso no seletor de cursos e faz o scrape
+        das suas informações e da sua grade curricular.
 
-            for seletor_curso, curso in zip(range(2, len(cursos) + 2), cursos):
-                seletor_de_cursos = navegador.find_element(By.ID, "comboCurso")
-                botao_enviar = navegador.find_element(By.ID, "enviar")
+        :param nav: O navegador para scraping dos dados. A unidade
+            do curso já deve estar selecionada.
+        :type nav: Chrome
+        :param seletor_curso: A posição do curso no seletor de cursos.
+        :type seletor_curso: int
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :return: O curso scrapado e as disciplinas da sua grade, na
+            ordem em que aparecem na página. Cada disciplina só conhece
+            este curso, a junção com as demais é feita depois. Com o
+            estagio de parse o resultado é um futuro.
+        :rtype: ResultadoCurso | Future
+        """
+        with self._rastreamento.intervalo('curso', RastreamentoUsp.CURSO, curso=curso, unidade=unidade):
+            with self._rastreamento.intervalo('clique'):
+                seletor_de_cursos = nav.find_element(By.ID, "comboCurso")
+                botao_enviar = nav.find_element(By.ID, "enviar")
                 seletor_de_cursos.click()
                 seletor_de_cursos.find_element(By.CSS_SELECTOR, f'#comboCurso :nth-child({seletor_curso})').click()
+                marca = self._espera.marcar(nav)
                 botao_enviar.click()
 
-                if not self._checa_erro_popup(navegador):
-                    curso_conteudo = self._get_curso_info(navegador) 
-                    novo_curso = CursoUsp(curso, unidade, curso_conteudo)     
-                    disciplinas_do_curso = self._get_disciplinas(navegador)
+            if self._extracao == self.EXTRACAO_JS:
+                if self._checa_erro_popup(nav, marca):
+                    return self._montar_curso_extraido(curso, unidade, None)
+
+                extraido = self._get_curso_extraido(nav)
+                self._click_aba(nav, self.ABA_BUSCAR)
+                return self._montar_curso_extraido(curso, unidade, extraido)
+
+            if self._checa_erro_popup(nav, marca):
+                return self._montar_curso(curso, unidade, None)
+
+            html_grade = self._get_disciplinas(nav)
+
+            self._click_aba(nav, self.ABA_BUSCAR)
+            return self._montar_curso(curso, unidade, html_grade)
+
+    def _impressao(self, conteudo : str | None) -> str:
+        """
+        Calcula a impressão digital (hash) do conteudo de um curso. As
+        modalidades ignoradas pelo filtro entram na impressão, já que o
+        mesmo html resulta em grades diferentes com filtros diferentes.
+
+        :param conteudo: Html da aba da grade (ou o JSON da extração no navegador),
+            ou None caso o curso não tenha sido encontrado.
+        :type conteudo: str | None
+        :return: O hash sha256 em hexadecimal.
+        :rtype: str
+        """
+        impressao = hashlib.sha256()
+        impressao.update((conteudo or '').encode())
+        # Sem modalidades ignoradas a impressão é a mesma dos scrapes sem filtro
+        for modalidade in sorted(self._filtro.modalidades):
+            impressao.update(b'\0')
+            impressao.update(modalidade.encode())
+        return impressao.hexdigest()
+
+    def _reaproveitar_curso(self, curso : str, impressao : str) -> ResultadoCurso | None:
+        """
+        Caso o conteudo do curso não tenha mudado desde o scrape base,
+        recria o resultado do curso a partir do scrape base, sem parse.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param impressao: Impressão digital do conteudo atual do curso.
+        :type impressao: str
+        :return: O resultado do curso, ou None caso o conteudo tenha mudado.
+        :rtype: ResultadoCurso | None
+        """
+        if self._base is None or self._base._impressoes.get(curso) != impressao:
+            return None
+
+        valores = self._base.cursos[curso].para_tupla()
+        novo_curso = CursoUsp.de_tupla(valores, self._registros)
+
+        # Cada disciplina do resultado só conhece este curso, assim como no scrape
+        disciplinas = [DisciplinaUsp.de_tupla(self._base.disciplinas[codigo].para_tupla()[:-1] + ((curso,),),
+                                              self._registros)
+                       for codigos in valores[5:8] for codigo in codigos
+                       if codigo in self._base.disciplinas]
+        return novo_curso, disciplinas
+
+    def _registrar_impressao(self, curso : str, impressao : str) -> ResultadoCurso | None:
+        """
+        Guarda a impressão digital do curso, contabiliza se ele é
+        inalterado, atualizado ou novo em relação ao scrape base e,
+        caso seja inalterado, devolve o resultado do scrape base.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param impressao: Impressão digital do conteudo atual do curso.
+        :type impressao: str
+        :return: O resultado reaproveitado do curso, ou None caso ele precise de parse.
+        :rtype: ResultadoCurso | None
+        """
+        reaproveitado = self._reaproveitar_curso(curso, impressao)
+
+        with self._trava_das_impressoes:
+            self._impressoes[curso] = impressao
+            if reaproveitado is not None:
+                self._contagem['inalterados'] += 1
+            elif self._base is not None and curso in self._base._impressoes:
+                self._contagem['atualizados'] += 1
+            else:
+                self._contagem['novos'] += 1
+
+        return reaproveitado
+
+    def _construir_curso(self, curso : str, unidade : str, duracoes : Duracoes | None,
+                         linhas : list[tuple[str, ValoresDisciplina]]) -> ResultadoCurso:
+        """
+        Constroi o curso e as disciplinas a partir dos valores extraidos.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :param duracoes: Durações do curso, ou None caso o curso não tenha sido encontrado.
+        :type duracoes: Duracoes | None
+        :param linhas: Tuplas (modalidade, valores) de cada disciplina da grade.
+        :type linhas: list[tuple[str, ValoresDisciplina]]
+        :return: O curso e as disciplinas da sua grade, na ordem em que
+            aparecem na página. Cada disciplina só conhece este curso,
+            a junção com as demais é feita depois.
+        :rtype: ResultadoCurso
+        """
+        novo_curso = CursoUsp(curso, unidade, duracoes, self._registros)
+
+        disciplinas : list[DisciplinaUsp] = []
+        grade : list[tuple[str, str]] = []
+        for modalidade, valores in linhas:
+            if not self._filtro.aceita_modalidade(modalidade):
+                continue
+            disciplinas.append(DisciplinaUsp(valores, curso, self._registros))
+            grade.append((modalidade, valores[0]))
+        novo_curso.add_disciplinas(grade)
+
+        return novo_curso, disciplinas
+
+    def _parse(self, curso : str, unidade : str, extrair : Callable, conteudo : str,
+               trilha : str | None = None) -> ResultadoCurso | Future:
+        """
+        Faz o parse do conteudo de um curso e constroi o curso e as
+        disciplinas. Com o estagio de parse o parse é feito em outro
+        processo e o resultado é um futuro.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :param extrair: Função de parse do conteudo (extrair_curso ou ler_curso_extraido).
+        :type extrair: Callable
+        :param conteudo: O html ou o JSON do curso.
+        :type conteudo: str
+        :param trilha: Trilha do rastreamento em que as fases aparecem. Por padrão a thread atual.
+        :type trilha: str | None
+        :return: O curso e as disciplinas da sua grade, ou o futuro deles.
+        :rtype: ResultadoCurso | Future
+        """
+        def construir(extraido : tuple) -> ResultadoCurso:
+            with self._rastreamento.intervalo('construção', trilha=trilha):
+                return self._construir_curso(curso, unidade, *extraido)
+
+        if self._estagio is not None:
+            futuro = self._estagio.enviar(extrair, conteudo, construir)
+            # Para que uma falha do parse seja registrada com o nome do curso
+            futuro.curso = curso
+            return futuro
+
+        with self._rastreamento.intervalo('parse', trilha=trilha):
+            extraido = extrair(conteudo)
+        return construir(extraido)
+
+    def _montar_curso(self, curso : str, unidade : str, html_grade : str | None,
+                      trilha : str | None = None) -> ResultadoCurso | Future:
+        """
+        Monta o curso e as disciplinas a partir do html scrapado. Caso
+        exista um scrape base e o html não tenha mudado, o resultado do
+        scrape base é reaproveitado.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :param html_grade: Html da aba da grade, ou None caso o curso não tenha sido encontrado.
+        :type html_grade: str | None
+        :param trilha: Trilha do rastreamento em que as fases aparecem. Por padrão a thread atual.
+        :type trilha: str | None
+        :return: O curso e as disciplinas da sua grade, ou o futuro deles com o estagio de parse.
+        :rtype: ResultadoCurso | Future
+        """
+        if self._acervo is not None:
+            with self._rastreamento.intervalo('acervo', trilha=trilha):
+                self._acervo.registrar_curso(unidade, curso, self.EXTRACAO_HTML, html_grade)
+
+        with self._rastreamento.intervalo('impressão', trilha=trilha):
+            reaproveitado = self._registrar_impressao(curso, self._impressao(html_grade))
+        if reaproveitado is not None:
+            return reaproveitado
+
+        if html_grade is None:
+            return CursoUsp(curso, unidade, None, self._registros), []
+
+        # A aba da grade também contém a tabela de informações, então um parse é suficiente
+        return self._parse(curso, unidade, extrair_curso, html_grade, trilha)
+
+    def _montar_sem_falha_de_parse(self, montar : Callable, curso : str, unidade : str,
+                                   *conteudo, **opcoes) -> ResultadoCurso | Future | None:
+        """
+        Monta um curso com o _montar_curso ou o _montar_curso_extraido. Um
+        conteudo que não pode ser lido pelo parse vai para o relatorio de
+        falhas, sem novas tentativas, ao invés de interromper o scrape.
+
+        :param montar: O _montar_curso ou o _montar_curso_extraido.
+        :type montar: Callable
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :return: O resultado do curso, ou None caso o parse tenha falhado.
+        :rtype: ResultadoCurso | Future | None
+        """
+        try:
+            return montar(curso, unidade, *conteudo, **opcoes)
+        except ERROS_DE_PARSE as erro:
+            self._falhas.registrar(unidade, curso, 1, erro)
+            return None
+
+    async def _montar_curso_async(self, vagas : asyncio.Semaphore, curso : str, unidade : str,
+                                  html_grade : str | None, trilha : str | None = None) -> ResultadoCurso | None:
+        """
+        Monta um curso do backend http sem bloquear o laço de eventos, para
+        que as outras requisições continuem sendo lidas durante o parse. O
+        _montar_curso roda em uma thread, e com o estagio de parse o futuro
+        do outro processo é esperado pelo asyncio. As vagas limitam os cursos
+        sendo montados ao mesmo tempo no lugar da fila do estagio, que
+        bloquearia o laço quando cheia.
+
+        :param vagas: Vagas dos cursos sendo montados.
+        :type vagas: asyncio.Semaphore
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :param html_grade: Html da aba da grade.
+        :type html_grade: str | None
+        :param trilha: Trilha do rastreamento em que as fases aparecem.
+        :type trilha: str | None
+        :return: O curso e as disciplinas da sua grade, ou None caso o parse tenha falhado.
+        :rtype: ResultadoCurso | None
+        """
+        async with vagas:
+            resultado = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self._montar_sem_falha_de_parse, self._montar_curso,
+                                        curso, unidade, html_grade, trilha=trilha))
+            if not isinstance(resultado, Future):
+                return resultado
+            try:
+                return await asyncio.wrap_future(resultado)
+            except Exception as erro:
+                self._falhas.registrar(unidade, curso, 1, erro)
+                return None
+
+    def _montar_curso_extraido(self, curso : str, unidade : str, extraido : str | None) -> ResultadoCurso | Future:
+        """
+        Monta o curso e as disciplinas a partir do JSON devolvido pelo
+        SCRIPT_EXTRAIR_CURSO. A impressão digital é calculada sobre o
+        JSON, então ela não é comparavel com a da extração por html.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :param extraido: O JSON extraido, ou None caso o curso não tenha sido encontrado.
+        :type extraido: str | None
+        :return: O curso e as disciplinas da sua grade, ou o futuro deles com o estagio de parse.
+        :rtype: ResultadoCurso | Future
+        """
+        if self._acervo is not None:
+            with self._rastreamento.intervalo('acervo'):
+                self._acervo.registrar_curso(unidade, curso, self.EXTRACAO_JS, extraido)
 
-                    for disciplina in disciplinas_do_curso:
-                        modalidade = disciplina.parent.parent.parent.find("tr").find("td").text
-                    
-                        if disciplina.text in self.disciplinas: 
-                            self.disciplinas[disciplina.text].add_curso(curso)
-                            novo_curso.add_disciplina(modalidade, disciplina.text)
-                            continue
+        with self._rastreamento.intervalo('impressão'):
+            reaproveitado = self._registrar_impressao(curso, self._impressao(extraido))
+        if reaproveitado is not None:
+            return reaproveitado
 
-                        nova_disciplina = DisciplinaUsp(disciplina, curso)                        
-                        self.disciplinas.update({nova_disciplina.get_codigo() : nova_disciplina})
+        if extraido is None:
+            return CursoUsp(curso, unidade, None, self._registros), []
 
-                        novo_curso.add_disciplina(modalidade, disciplina.text)
+        return self._parse(curso, unidade, ler_curso_extraido, extraido)
+
+    def _selecionar_unidade(self, nav : Chrome, seletor : int) -> list[str]:
+        """
+        Seleciona uma unidade no seletor de unidades e espera o
+        seletor de cursos carregar.
+
+        :param nav: O navegador para scraping dos dados. Ele
+            já deve estar na aba de buscar no site do jupiter.
+        :type nav: Chrome
+        :param seletor: A posição da unidade no seletor de unidades.
+        :type seletor: int
+        :return: O nome de cada curso da unidade.
+        :rtype: list[str]
+        """
+        with self._rastreamento.intervalo('clique'):
+            seletor_de_unidades = nav.find_element(By.ID, "comboUnidade")
+            seletor_de_unidades.click()
+            seletor_de_unidades.find_element(By.CSS_SELECTOR, f'#comboUnidade :nth-child({seletor})').click()
+
+        with self._rastreamento.intervalo('cursos da unidade'):
+            return self._get_cursos(nav)
+
+    def _reiniciar_sessao(self, nav : Chrome) -> None:
+        """
+        Descarta o estado da página e a sessão do jupiter depois de uma
+        falha, abrindo a página de carreiras novamente sem cookies.
+
+        :param nav: O navegador para scraping dos dados.
+        :type nav: Chrome
+        """
+        self._rastreamento.contar('sessões reiniciadas')
+        with self._rastreamento.intervalo('reiniciar sessão'):
+            nav.delete_all_cookies()
+            nav.get(self.CURSOS_URL)
+            self._get_unidades(nav)
+
+    def _abrir_unidade(self, nav : Chrome, seletor : int, unidade : str, reiniciar : bool = False) -> list[str] | None:
+        """
+        Seleciona a unidade, tentando novamente, com a sessão reiniciada,
+        caso a seleção falhe.
 
-                    self.cursos.update({curso : novo_curso})
-                    self._click_aba(navegador, self.ABA_BUSCAR)
+        :param nav: O navegador para scraping dos dados.
+        :type nav: Chrome
+        :param seletor: A posição da unidade no seletor de unidades.
+        :type seletor: int
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :param reiniciar: Se True a sessão é reiniciada antes da primeira tentativa.
+        :type reiniciar: bool
+        :return: O nome de cada curso da unidade, ou None caso todas as tentativas falhem.
+        :rtype: list[str] | None
+        """
+        tentativa = 1
+        while True:
+            try:
+                with self._espera.prazo(self._prazo_do_curso):
+                    if reiniciar:
+                        self._reiniciar_sessao(nav)
+                    return self._selecionar_unidade(nav, seletor)
+            except WebDriverException as erro:
+                if not self._falhas.pode_tentar_novamente(tentativa):
+                    self._falhas.registrar(unidade, None, tentativa, erro)
+                    return None
+                self._falhas.esperar(tentativa, time.monotonic())
+                reiniciar = True
+                tentativa += 1
+
+    def _tentar_curso(self, nav : Chrome, seletor_curso : int, curso : str, unidade : str,
+                      tentativa : int, novas_tentativas : deque) -> ResultadoCurso | Future | None:
+        """
+        Faz o scrape de um curso dentro do prazo de um curso. Caso falhe,
+        o curso vai para a fila de novas tentativas ou, depois da ultima
+        tentativa, para o relatorio de falhas. Um curso cuja página não
+        pode ser lida pelo parse vai direto para o relatorio de falhas.
+
+        :param nav: O navegador para scraping dos dados. A unidade
+            do curso já deve estar selecionada.
+        :type nav: Chrome
+        :param seletor_curso: A posição do curso no seletor de cursos.
+        :type seletor_curso: int
+        :param curso: Nome do curso.
+        :type curso: str
+        :param unidade: Nome da unidade que oferece o curso.
+        :type unidade: str
+        :param tentativa: Número desta tentativa, começando em 1.
+        :type tentativa: int
+        :param novas_tentativas: Fila com as tuplas (seletor_curso, curso, tentativa, instante da falha, erro)
+            dos cursos que serão tentados novamente.
+        :type novas_tentativas: deque
+        :return: O resultado do curso, ou None caso o scrape tenha falhado.
+        :rtype: ResultadoCurso | Future | None
+        """
+        try:
+            # A espera pela vaga não conta no prazo do curso, e a latencia é só a das esperas pelo jupiter
+            with self._concorrencia.vaga(self._espera.tempo_no_jupiter, ERROS_DE_PARSE), \
+                 self._espera.prazo(self._prazo_do_curso):
+                resultado = self._scrape_curso(nav, seletor_curso, curso, unidade)
+        except WebDriverException as erro:
+            self._rastreamento.contar('cursos com falha')
+            if self._falhas.pode_tentar_novamente(tentativa):
+                novas_tentativas.append((seletor_curso, curso, tentativa, time.monotonic(), erro))
+            else:
+                self._falhas.registrar(unidade, curso, tentativa, erro)
+            return None
+        except ERROS_DE_PARSE as erro:
+            # A página seria a mesma em uma nova tentativa
+            self._falhas.registrar(unidade, curso, tentativa, erro)
+            return None
+
+        if self._diario is not None:
+            self._registrar_no_diario(unidade, curso, resultado)
+        return resultado
+
+    def _scrape_unidade(self, nav : Chrome, seletor : int, unidade : str) -> ResultadoUnidade | None:
+        """
+        Seleciona uma unidade no seletor de unidades e faz o
+        scrape de todos os seus cursos. Os cursos que falham são
+        tentados novamente no final da unidade.
+
+        :param nav: O navegador para scraping dos dados. Ele
+            já deve estar na aba de buscar no site do jupiter.
+        :type nav: Chrome
+        :param seletor: A posição da unidade no seletor de unidades.
+        :type seletor: int
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :return: A unidade e o resultado de cada um dos seus cursos, sem
+            os cursos recusados pelo filtro e os que falharam em todas as tentativas, ou None caso
+            não tenha sido possivel selecionar a unidade.
+        :rtype: ResultadoUnidade | None
+        """
+        if self._diario is not None:
+            resultado = self._diario.get_unidade(unidade, self._filtro.aceita_curso)
+            if resultado is not None:
+                return resultado
+
+        with self._rastreamento.intervalo('unidade', RastreamentoUsp.UNIDADE, unidade=unidade):
+            cursos = self._abrir_unidade(nav, seletor, unidade)
+            if cursos is None:
+                return None
+            if self._diario is not None:
+                self._diario.registrar_unidade(unidade, cursos)
+            if self._acervo is not None:
+                self._acervo.registrar_unidade(unidade, seletor - 2, cursos)
+
+            # Depois de uma falha a sessão é reiniciada, para que o proximo curso comece de uma página limpa.
+            # Caso nem assim a unidade possa ser selecionada, ela é abandonada com os cursos já feitos
+            resultados : list[ResultadoCurso | Future | None] = [None] * len(cursos)
+            novas_tentativas : deque = deque()
+            disponivel = True
+            for posicao, curso in enumerate(cursos):
+                # O curso é recusado pelo nome do seletor, antes de qualquer clique
+                if not self._filtro.aceita_curso(curso):
+                    continue
+                resultados[posicao] = self._diario.get_curso(unidade, curso) if self._diario is not None else None
+                if resultados[posicao] is None:
+                    resultados[posicao] = self._tentar_curso(nav, posicao + 2, curso, unidade, 1, novas_tentativas)
+                    if resultados[posicao] is None:
+                        disponivel = self._abrir_unidade(nav, seletor, unidade, reiniciar=True) is not None
+                        if not disponivel:
+                            break
+
+            while novas_tentativas:
+                seletor_curso, curso, tentativa, falhou_em, erro = novas_tentativas.popleft()
+                if not disponivel:
+                    self._falhas.registrar(unidade, curso, tentativa, erro)
+                    continue
+                self._falhas.esperar(tentativa, falhou_em)
+                resultados[seletor_curso - 2] = self._tentar_curso(nav, seletor_curso, curso, unidade,
+                                                                   tentativa + 1, novas_tentativas)
+                if resultados[seletor_curso - 2] is None:
+                    disponivel = self._abrir_unidade(nav, seletor, unidade, reiniciar=True) is not None
+
+            feitos = [(curso, resultado) for curso, resultado in zip(cursos, resultados) if resultado is not None]
+            return UnidadeUsp(unidade, set(curso for curso, _ in feitos), self._registros), [resultado for _, resultado in feitos]
+
+    def _registrar_no_diario(self, unidade : str, curso : str, resultado : ResultadoCurso | Future) -> None:
+        """
+        Registra um curso terminado no diario. Quando o parse é feito em
+        outro processo o curso é registrado assim que o parse termina.
+
+        :param unidade: Nome da unidade do curso.
+        :type unidade: str
+        :param curso: Nome do curso.
+        :type curso: str
+        :param resultado: O resultado do curso, ou o seu futuro.
+        :type resultado: ResultadoCurso | Future
+        """
+        if isinstance(resultado, Future):
+            resultado.add_done_callback(lambda futuro : futuro.exception() is None and
+                                        self._registrar_no_diario(unidade, curso, futuro.result()))
+            return
+
+        with self._rastreamento.intervalo('diario'):
+            self._diario.registrar_curso(unidade, resultado, self._impressoes.get(curso))
+
+    def _esperar_parses(self, resultado : ResultadoUnidade) -> ResultadoUnidade:
+        """
+        Espera os cursos de uma unidade que ainda estão no estagio de parse.
+        Um curso cujo parse falhou vai para o relatorio de falhas e sai da
+        unidade, assim como um curso que falha no navegador, e o resto do
+        scrape continua.
+
+        :param resultado: Resultado do scrape da unidade.
+        :type resultado: ResultadoUnidade
+        :return: O resultado da unidade sem futuros.
+        :rtype: ResultadoUnidade
+        """
+        unidade, resultados = resultado
+        cursos : list[ResultadoCurso] = []
+        for curso in resultados:
+            if isinstance(curso, Future):
+                try:
+                    curso = curso.result()
+                except Exception as erro:
+                    self._falhas.registrar(unidade.get_nome(), curso.curso, 1, erro)
+                    continue
+            cursos.append(curso)
+
+        if len(cursos) < len(resultados):
+            unidade = UnidadeUsp(unidade.get_nome(), set(curso.get_curso() for curso, _ in cursos), self._registros)
+        return unidade, cursos
+
+    def _mesclar_unidade(self, resultado : ResultadoUnidade) -> None:
+        """
+        Junta o resultado do scrape de uma unidade aos dicionarios
+        de cursos e disciplinas. Quando uma disciplina já é conhecida
+        apenas o curso é adicionado a ela, assim o resultado é o mesmo
+        independente de qual navegador fez o scrape da unidade.
+        Os cursos ainda no estagio de parse são esperados.
+
+        :param resultado: Resultado do scrape da unidade.
+        :type resultado: ResultadoUnidade
+        """
+        unidade, cursos = self._esperar_parses(resultado)
+        self.unidades.append(unidade)
+
+        for curso, disciplinas in cursos:
+            for disciplina in disciplinas:
+                if disciplina.get_codigo() in self.disciplinas:
+                    self.disciplinas[disciplina.get_codigo()].add_curso(curso.get_curso())
                 else:
-                    novo_curso = CursoUsp(curso, unidade, None)     
-                    self.cursos.update({curso : novo_curso})
+                    self.disciplinas.update({disciplina.get_codigo() : disciplina})
+
+            self.cursos.update({curso.get_curso() : curso})
+
+    def _trabalhador(self, fila : Queue, resultados : list[ResultadoUnidade | None]) -> None:
+        """
+        Laço de um dos navegadores do modo paralelo. Retira unidades
+        da fila compartilhada até que ela esteja vazia e guarda o
+        resultado na posição da unidade no seletor.
 
-        navegador.close()
+        :param fila: Fila com as tuplas (indice do resultado, posição no seletor, nome) das unidades.
+        :type fila: Queue
+        :param resultados: Lista compartilhada com o resultado de cada unidade.
+        :type resultados: list[ResultadoUnidade | None]
+        """
+        navegador, _ = self._abrir_pagina_de_cursos()
+        try:
+            while True:
+                try:
+                    indice, posicao, unidade = fila.get_nowait()
+                except Empty:
+                    return
+                resultados[indice] = self._scrape_unidade(navegador, posicao + 2, unidade)
+        finally:
+            navegador.quit()
+
+    def _scrape_paralelo(self, unidades : list[tuple[int, str]], trabalhadores : int) -> None:
+        """
+        Faz o scrape das unidades utilizando varios navegadores, cada
+        um com o seu proprio webdriver. As unidades são distribuidas
+        por uma fila e os resultados são juntados na ordem do seletor.
+
+        :param unidades: Tuplas (posição no seletor, nome) das unidades para o scrape.
+        :type unidades: list[tuple[int, str]]
+        :param trabalhadores: Quantidade de navegadores simultaneos.
+        :type trabalhadores: int
+        """
+        fila : Queue = Queue()
+        for indice, (posicao, unidade) in enumerate(unidades):
+            fila.put((indice, posicao, unidade))
+
+        resultados : list[ResultadoUnidade | None] = [None] * len(unidades)
+        trabalhadores = min(trabalhadores, len(unidades))
+
+        with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+            futuros = [executor.submit(self._trabalhador, fila, resultados) for _ in range(trabalhadores)]
+            for futuro in futuros:
+                futuro.result()
+
+        # As unidades que não puderam ser selecionadas já estão no relatorio de falhas
+        for resultado in resultados:
+            if resultado is not None:
+                self._mesclar_unidade(resultado)
+
+    def _iniciar_scrape(self, qtd_unidades : int) -> float:
+        """
+        Anuncia o inicio do scrape.
+
+        :param qtd_unidades: Quantidade de unidades para o scrape.
+        :type qtd_unidades: int
+        :return: O instante do inicio do scrape.
+        :rtype: float
+        """
+        if qtd_unidades == 1:
+            print('Fazendo o scrape de 1 unidade da USP')
+        else:
+            print(f'Fazendo o scrape de {qtd_unidades} unidades da USP')
+
+        return timeit.default_timer()
+
+    def _finalizar_scrape(self, qtd_unidades : int, tempo_do_inicio : float) -> None:
+        """
+        Anuncia o fim do scrape e quanto tempo ele levou.
+
+        :param qtd_unidades: Quantidade de unidades scrapadas.
+        :type qtd_unidades: int
+        :param tempo_do_inicio: O instante do inicio do scrape.
+        :type tempo_do_inicio: float
+        """
         tempo_do_fim = timeit.default_timer()
         tempo_em_seg = round(tempo_do_fim - tempo_do_inicio, 2)
         if tempo_em_seg < 60:
@@ -294,37 +1039,465 @@ class EnsinoUsp:
                 print(f'Fim do scrape. 1 unidade scrapada em {int(tempo_em_seg // 60)}min {round(tempo_em_seg - (tempo_em_seg // 60) * 60)}s\n')
             else:
                 print(f'Fim do scrape. {qtd_unidades} unidades scrapadas em {int(tempo_em_seg // 60)}min {round(tempo_em_seg - (tempo_em_seg // 60) * 60)}s\n')
+
+    def _scrape_selenium(self, quantidade_de_unidades : str | None, trabalhadores : int) -> None:
+        """
+        Faz o scrape navegando pelo site do jupiter com o Chrome.
+
+        :param quantidade_de_unidades: Quantidade de unidades passada na linha de comando.
+        :type quantidade_de_unidades: str | None
+        :param trabalhadores: Quantidade de navegadores simultaneos.
+        :type trabalhadores: int
+        """
+        navegador, unidades = self._abrir_pagina_de_cursos()
+
+        escolhidas = self._escolher_unidades(unidades, quantidade_de_unidades)
+        qtd_unidades = len(escolhidas)
+        tempo_do_inicio = self._iniciar_scrape(qtd_unidades)
+
+        if trabalhadores > 1 and qtd_unidades > 1:
+            navegador.quit()
+            self._scrape_paralelo(escolhidas, trabalhadores)
+        else:
+            # As unidades só são juntadas no final, para que o navegador não espere o parse dos ultimos cursos de cada unidade
+            resultados = [self._scrape_unidade(navegador, posicao + 2, unidade) for posicao, unidade in escolhidas]
+            navegador.close()
+            for resultado in resultados:
+                if resultado is not None:
+                    self._mesclar_unidade(resultado)
+
+        self._finalizar_scrape(qtd_unidades, tempo_do_inicio)
+        print(self._espera.resumo())
+        print(self._rastreamento.resumo())
+        print(self._falhas.resumo())
+
+    async def _scrape_http(self, quantidade_de_unidades : str | None, conexoes : int,
+                           por_segundo : float | None, url_base : str | None) -> None:
+        """
+        Faz o scrape chamando diretamente os endpoints AJAX do jupiter,
+        sem navegador. Todas as unidades e cursos são buscados ao mesmo
+        tempo, limitados pela quantidade de conexões.
+
+        :param quantidade_de_unidades: Quantidade de unidades passada na linha de comando.
+        :type quantidade_de_unidades: str | None
+        :param conexoes: Quantidade maxima de requisições simultaneas.
+        :type conexoes: int
+        :param por_segundo: Quantidade maxima de requisições por segundo, ou None para não limitar.
+        :type por_segundo: float | None
+        :param url_base: Endereço do jupiter, ou None para o jupiter da USP.
+        :type url_base: str | None
+        """
+        # Importado aqui para que o httpx só seja necessario para esse backend
+        from .JupiterHttp import JupiterHttp
+
+        async with JupiterHttp(url_base or JupiterHttp.URL_BASE, conexoes, rastreamento=self._rastreamento,
+                               por_segundo=por_segundo, registros=self._registros) as jupiter:
+            unidades = await jupiter.get_unidades()
+
+            escolhidas = self._escolher_unidades([unidade for _, unidade in unidades], quantidade_de_unidades)
+            qtd_unidades = len(escolhidas)
+            tempo_do_inicio = self._iniciar_scrape(qtd_unidades)
+
+            # Com o estagio a fila dele nunca fica cheia, e sem ele o parse segura o GIL,
+            # então mais de uma thread de parse não deixaria o parse mais rapido
+            vagas = asyncio.Semaphore(self._estagio.pendentes if self._estagio is not None else 1)
+            montar = functools.partial(self._montar_curso_async, vagas)
+            resultados = await asyncio.gather(*(jupiter.scrape_unidade(*unidades[posicao], montar,
+                                                                       self._filtro.aceita_curso)
+                                                for posicao, _ in escolhidas))
+
+        if self._acervo is not None:
+            for posicao, (unidade, cursos) in enumerate(resultados):
+                self._acervo.registrar_unidade(unidade.get_nome(), posicao, [curso.get_curso() for curso, _ in cursos])
+
+        for resultado in resultados:
+            self._mesclar_unidade(resultado)
+
+        self._finalizar_scrape(qtd_unidades, tempo_do_inicio)
+        print(self._rastreamento.resumo())
+        print(self._falhas.resumo())
+
+    # A função de init é suposta dar scrape em todos os conteudos, inicializando as classes
+    # a partir do conteudo scrapado
+    def __init__(self, quantidade_de_unidades : str | None = None, *, trabalhadores : int = 1,
+                 backend : str = 'selenium', conexoes : int = 16,
+                 diario : str | None = None, retomar : bool = False, base : str | None = None,
+                 extracao : str = EXTRACAO_HTML, perfil_rapido : bool = False,
+                 rastreamento : str | None = None, acervo : str | None = None, processos : int = 0,
+                 falhas : str | None = None, prazo_do_curso : float = PRAZO_DO_CURSO,
+                 por_segundo : float | None = None, filtro : FiltroUsp | None = None,
+                 url_base : str | None = None):
+        self._iniciar_estado(extracao=extracao, filtro=filtro, falhas=falhas, prazo_do_curso=prazo_do_curso,
+                             trabalhadores=trabalhadores, por_segundo=por_segundo, perfil_rapido=perfil_rapido)
+        self._base = EnsinoUsp.carregar_snapshot(base) if base is not None else None
+        self._acervo = AcervoUsp(acervo) if acervo is not None else None
+        self._estagio = EstagioDeParseUsp(processos, rastreamento=self._rastreamento) if processos > 0 else None
+        # O diario só é utilizado no scrape com o navegador, que é o que pode durar horas
+        self._diario = DiarioUsp(diario, retomar, self._filtro.modalidades, self._registros) if diario is not None and backend == 'selenium' else None
+        if self._diario is not None:
+            self._impressoes.update(self._diario.impressoes)
+
+        try:
+            if backend == 'http':
+                asyncio.run(self._scrape_http(quantidade_de_unidades, conexoes, por_segundo, url_base))
+            else:
+                self._scrape_selenium(quantidade_de_unidades, trabalhadores)
+        finally:
+            # O estagio é fechado antes do diario porque os cursos são registrados no diario quando o parse termina
+            if self._estagio is not None:
+                self._estagio.fechar()
+                self._estagio = None
+            if self._diario is not None:
+                self._diario.fechar()
+            if self._acervo is not None:
+                self._acervo.fechar()
+            self._falhas.fechar()
+            # O trace também é escrito quando o scrape falha, que é quando ele mais ajuda
+            if rastreamento is not None:
+                self._rastreamento.exportar_chrome(rastreamento)
+
+        self._construir_indices()
+
+        if self._base is not None:
+            print(f'Cursos inalterados: {self._contagem["inalterados"]}, '
+                  f'atualizados: {self._contagem["atualizados"]}, '
+                  f'novos: {self._contagem["novos"]}\n')
         
-    def cursos_por_unidade(self):
+    def salvar_snapshot(self, caminho : str, base : str | None = None) -> None:
+        """
+        Salva as unidades, cursos e disciplinas scrapados em um
+        arquivo de snapshot, que pode ser carregado depois sem
+        a necessidade de um novo scrape.
+
+        :param caminho: Caminho do arquivo de snapshot.
+        :type caminho: str
+        :param base: Snapshot base, normalmente o --base do scrape. Com ele
+            apenas os cursos e disciplinas que mudaram são escritos, e o
+            snapshot depende do base para ser carregado.
+        :type base: str | None
+        """
+        escrever_snapshot(caminho, {
+            'unidades'    : [unidade.para_tupla() for unidade in self.iterar_unidades()],
+            'cursos'      : [curso.para_tupla() for curso in self.iterar_cursos()],
+            'disciplinas' : [disciplina.para_tupla() for disciplina in self.iterar_disciplinas()],
+            'impressoes'  : self._impressoes,
+        }, base)
+
+    @classmethod
+    def _sem_scrape(cls, *, filtro : FiltroUsp | None = None) -> 'EnsinoUsp':
+        """
+        Cria um EnsinoUsp vazio, sem fazer o scrape, para ser preenchido
+        por outra fonte de dados.
+
+        :param filtro: Filtro das unidades, cursos e modalidades, ou None para aceitar todos.
+        :type filtro: FiltroUsp | None
+        :return: O EnsinoUsp sem unidades, cursos e disciplinas.
+        :rtype: EnsinoUsp
+        """
+        ensino = cls.__new__(cls)
+        ensino._iniciar_estado(filtro=filtro)
+        ensino._diario = None
+        ensino._acervo = None
+        ensino._estagio = None
+        ensino._base = None
+        return ensino
+
+    def _iniciar_estado(self, *, extracao : str = EXTRACAO_HTML, filtro : FiltroUsp | None = None,
+                        falhas : str | None = None, prazo_do_curso : float = PRAZO_DO_CURSO,
+                        trabalhadores : int = 1, por_segundo : float | None = None,
+                        perfil_rapido : bool = False) -> None:
+        """
+        Inicia o estado comum ao scrape e ao EnsinoUsp criado sem scrape
+        (_sem_scrape), para que os dois não deixem de ter o mesmo estado.
+        Os parametros são os do __init__ com os mesmos nomes.
+        """
+        self.unidades    = []
+        self.cursos      = {}
+        self.disciplinas = {}
+        self._trava_do_chrome = Lock()
+        self._trava_das_impressoes = Lock()
+        self._extracao = extracao
+        self._filtro = filtro if filtro is not None else FiltroUsp()
+        self._registros = RegistrosUsp()
+        self._rastreamento = RastreamentoUsp()
+        self._espera = EsperaUsp(self._rastreamento)
+        self._falhas = FalhasUsp(falhas, self._rastreamento)
+        self._prazo_do_curso = prazo_do_curso
+        # No scrape com o navegador a concorrência é a quantidade de navegadores buscando cursos ao mesmo tempo.
+        # Os navegadores já estão abertos, então o limite começa em todos eles e só diminui se o jupiter demorar
+        self._concorrencia = ConcorrenciaUsp(trabalhadores, inicial=trabalhadores, por_segundo=por_segundo,
+                                             rastreamento=self._rastreamento)
+        self._perfil_rapido = perfil_rapido
+        self._driver = None
+        self._impressoes = {}
+        self._contagem = {'inalterados' : 0, 'atualizados' : 0, 'novos' : 0}
+
+    @classmethod
+    def reconstruir_do_acervo(cls, pasta : str, *, processos : int = 0, filtro : FiltroUsp | None = None) -> 'EnsinoUsp':
+        """
+        Cria um EnsinoUsp a partir do conteudo bruto guardado em um acervo,
+        fazendo o parse novamente, mas sem navegador e sem acessar o jupiter.
+        O resultado é o mesmo do scrape que gravou o acervo.
+
+        :param pasta: Pasta do acervo.
+        :type pasta: str
+        :param processos: Quantidade de processos fazendo o parse. Com 0 o parse é feito neste processo.
+        :type processos: int
+        :param filtro: Filtro das unidades, cursos e modalidades reconstruidos, ou None para todos.
+        :type filtro: FiltroUsp | None
+        :return: O EnsinoUsp com os dados reconstruidos.
+        :rtype: EnsinoUsp
+        :raises FileNotFoundError: Se a pasta não tiver o indice de um acervo.
+        """
+        if not os.path.isfile(os.path.join(pasta, AcervoUsp.INDICE)):
+            raise FileNotFoundError(f'Acervo {pasta} não existe.')
+
+        inicio = timeit.default_timer()
+        acervo = AcervoUsp(pasta)
+        ensino = cls._sem_scrape(filtro=filtro)
+        faltando = 0
+
+        pendentes : list[ResultadoUnidade] = []
+        if processos > 0:
+            ensino._estagio = EstagioDeParseUsp(processos, rastreamento=ensino._rastreamento)
+        try:
+            for unidade in acervo.unidades():
+                if not ensino._filtro.aceita_unidade(unidade):
+                    continue
+                presentes : list[str] = []
+                resultados : list[ResultadoCurso | Future] = []
+                for curso in acervo.cursos[unidade]:
+                    if not ensino._filtro.aceita_curso(curso):
+                        continue
+                    registro = acervo.conteudo.get((unidade, curso))
+                    if registro is None:
+                        faltando += 1
+                        continue
+                    # A aba de informações dos registros antigos não é lida, a grade já contém as informações
+                    montar = ensino._montar_curso_extraido if registro['extracao'] == cls.EXTRACAO_JS else ensino._montar_curso
+                    resultado = ensino._montar_sem_falha_de_parse(montar, curso, unidade, acervo.ler(registro['grade']))
+                    if resultado is not None:
+                        presentes.append(curso)
+                        resultados.append(resultado)
+                pendentes.append((UnidadeUsp(unidade, set(presentes), ensino._registros), resultados))
+
+            for resultado in pendentes:
+                ensino._mesclar_unidade(resultado)
+        finally:
+            if ensino._estagio is not None:
+                ensino._estagio.fechar()
+                ensino._estagio = None
+
+        ensino._construir_indices()
+        print(f'{len(ensino.cursos)} cursos reconstruidos do acervo em {round(timeit.default_timer() - inicio, 2)} segundos')
+        if faltando:
+            print(f'\033[0;31m{faltando} cursos não estão no acervo e foram ignorados.\033[0;37m')
+        if ensino._falhas.quantidade:
+            print(ensino._falhas.resumo(), end='')
+        print()
+        return ensino
+
+    @classmethod
+    def carregar_snapshot(cls, caminho : str) -> 'EnsinoUsp':
+        """
+        Cria um EnsinoUsp a partir de um arquivo de snapshot, sem
+        fazer o scrape.
+
+        :param caminho: Caminho do arquivo de snapshot.
+        :type caminho: str
+        :return: O EnsinoUsp com os dados do snapshot.
+        :rtype: EnsinoUsp
+        """
+        dados = ler_snapshot(caminho)
+
+        ensino = cls._sem_scrape()
+        ensino._impressoes = dados.get('impressoes', {})
+        registros = ensino._registros
+        ensino.unidades    = [UnidadeUsp.de_tupla(valores, registros) for valores in dados['unidades']]
+        ensino.cursos      = {valores[0] : CursoUsp.de_tupla(valores, registros) for valores in dados['cursos']}
+        ensino.disciplinas = {valores[0] : DisciplinaUsp.de_tupla(valores, registros) for valores in dados['disciplinas']}
+        ensino._construir_indices()
+        return ensino
+
+    def fechar(self) -> None:
+        """
+        Libera os recursos abertos pelos dados. Os dados de um EnsinoUsp
+        ficam todos na memoria, então não há nada para liberar.
+        """
+
+    def salvar_banco(self, caminho : str) -> None:
+        """
+        Salva as unidades, cursos e disciplinas em um banco SQLite, que
+        pode ser consultado depois com o BancoUsp sem carregar todos os
+        dados na memoria.
+
+        :param caminho: Caminho do arquivo do banco.
+        :type caminho: str
+        """
+        # Importado aqui porque o BancoUsp é uma subclasse do EnsinoUsp
+        from .BancoUsp import escrever_banco
+        escrever_banco(caminho, self.iterar_unidades(), self.iterar_cursos(), self.iterar_disciplinas())
+
+    def exportar_colunar(self, pasta : str, formato : str = 'parquet') -> list[str]:
+        """
+        Exporta as unidades, cursos, disciplinas e grades em tabelas
+        colunares (Parquet ou Arrow IPC). Necessita da dependencia
+        opcional pyarrow.
+
+        :param pasta: Pasta onde as tabelas são escritas.
+        :type pasta: str
+        :param formato: Formato das tabelas: parquet ou arrow.
+        :type formato: str
+        :return: Os caminhos das tabelas escritas.
+        :rtype: list[str]
+        """
+        # Importado aqui para que o pyarrow só seja necessario para a exportação
+        from .ExportacaoUsp import exportar_colunar
+        return exportar_colunar(pasta, self.unidades, self.cursos, self.disciplinas, formato)
+
+    def _construir_indices(self) -> None:
+        """
+        Constroi os indices de nomes dos cursos e disciplinas, e os
+        indices de trigramas utilizados para sugerir nomes e códigos
+        próximos. Deve ser chamada sempre que os dicionarios forem preenchidos.
+        """
+        self._indice = IndiceUsp(self.cursos, self.disciplinas)
+        self._sugestoes_de_cursos = SugestoesUsp(curso.get_curso() for curso in self.cursos.values())
+        self._sugestoes_de_disciplinas = SugestoesUsp(disciplina.get_nome() for disciplina in self.disciplinas.values())
+        self._sugestoes_de_codigos = SugestoesUsp(self.disciplinas)
+        self._matriz = None
+
+    def matriz(self):
+        """
+        Pega a matriz de incidencia cursos x disciplinas, que é construida
+        na primeira chamada. Necessita das dependencias opcionais de analise
+        (numpy e scipy).
+
+        :return: A matriz de incidencia.
+        :rtype: MatrizUsp
+        """
+        if self._matriz is None:
+            # Importado aqui para que o numpy e o scipy só sejam necessarios para as analises
+            from .MatrizUsp import MatrizUsp
+            self._matriz = MatrizUsp(self.cursos, self.disciplinas, self.unidades, self._registros)
+        return self._matriz
+
+    def buscar_cursos(self, nome_do_curso : str) -> list[CursoUsp]:
+        """
+        Busca os cursos pelo nome. O nome exato tem prioridade, caso
+        ele não exista o nome é buscado no indice de nomes normalizados.
+
+        :param nome_do_curso: Nome do curso.
+        :type nome_do_curso: str
+        :return: Os cursos encontrados.
+        :rtype: list[CursoUsp]
+        """
+        if nome_do_curso in self.cursos:
+            return [self.cursos[nome_do_curso]]
+
+        return [self.cursos[chave] for chave in self._indice.buscar_cursos(nome_do_curso)]
+
+    def buscar_disciplinas_por_nome(self, nome : str) -> list[DisciplinaUsp]:
+        """
+        Busca as disciplinas pelo nome no indice de nomes normalizados.
+
+        :param nome: Nome da disciplina.
+        :type nome: str
+        :return: Todas as disciplinas com esse nome.
+        :rtype: list[DisciplinaUsp]
+        """
+        return [self.disciplinas[codigo] for codigo in self._indice.buscar_disciplinas(nome)]
+
+    def buscar_disciplina(self, codigo : str) -> DisciplinaUsp | None:
+        """
+        Busca uma disciplina pelo código.
+
+        :param codigo: Código da disciplina.
+        :type codigo: str
+        :return: A disciplina, ou None caso ela não exista.
+        :rtype: DisciplinaUsp | None
+        """
+        return self.disciplinas.get(codigo)
+
+    def iterar_unidades(self) -> Iterator[UnidadeUsp]:
+        """
+        Percorre as unidades scrapadas.
+
+        :return: Iterador das unidades.
+        :rtype: Iterator[UnidadeUsp]
+        """
+        return iter(self.unidades)
+
+    def iterar_cursos(self) -> Iterator[CursoUsp]:
+        """
+        Percorre os cursos scrapados.
+
+        :return: Iterador dos cursos.
+        :rtype: Iterator[CursoUsp]
+        """
+        return iter(self.cursos.values())
+
+    def iterar_disciplinas(self) -> Iterator[DisciplinaUsp]:
+        """
+        Percorre as disciplinas scrapadas.
+
+        :return: Iterador das disciplinas.
+        :rtype: Iterator[DisciplinaUsp]
+        """
+        return iter(self.disciplinas.values())
+
+    def iterar_disciplinas_compartilhadas(self) -> Iterator[DisciplinaUsp]:
+        """
+        Percorre as disciplinas que são utilizadas em mais de um curso.
+
+        :return: Iterador das disciplinas.
+        :rtype: Iterator[DisciplinaUsp]
+        """
+        return (disciplina for disciplina in self.disciplinas.values() if disciplina.get_quantidade_de_cursos() > 1)
+
+    def cursos_por_unidade(self, formato : str = 'texto', arquivo : str | None = None):
         """
         Para cada unidade scrapada imprime todos os cursos que ela possui.
+
+        :param formato: Formato da saida: texto, jsonl ou csv.
+        :type formato: str
+        :param arquivo: Arquivo de saida. Caso seja None a saida é o stdout.
+        :type arquivo: str | None
         """
-        for unidade in self.unidades:
-            print(unidade)
+        with abrir_escritor(formato, arquivo) as escritor:
+            for unidade in self.iterar_unidades():
+                escritor.unidade(unidade)
     
     def dados_do_curso(self, nome_do_curso : str) -> bool:
         """
         Se o nome do curso passado como argumento estiver presente
         no dicionario de cursos imprime o seu valor e retorna true.
-        Caso contrario retorna false.
+        Caso contrario retorna false. Acentos, maiusculas e espaços
+        repetidos não precisam ser iguais aos do nome do curso.
 
         :param nome_do_curso: Nome do curso que deve ter seus dados imprimidos.
         :type nome_do_curso: str
         :return: Retorna true caso o curso seja encotrado, false caso contrario.
         :rtype: bool
         """
-        if nome_do_curso in self.cursos:
-            print(self.cursos[nome_do_curso])
-            return True
-        
-        return False
+        cursos = self.buscar_cursos(nome_do_curso)
+        for curso in cursos:
+            print(curso)
+
+        return len(cursos) > 0
     
-    def dados_de_todos_os_cursos(self):
+    def dados_de_todos_os_cursos(self, formato : str = 'texto', arquivo : str | None = None):
         """
         Imprime os dados de todos os cursos scrapados.
+
+        :param formato: Formato da saida: texto, jsonl ou csv.
+        :type formato: str
+        :param arquivo: Arquivo de saida. Caso seja None a saida é o stdout.
+        :type arquivo: str | None
         """
-        for curso in self.cursos.values():
-            print(curso)
+        with abrir_escritor(formato, arquivo) as escritor:
+            for curso in self.iterar_cursos():
+                escritor.curso(curso)
     
     def dados_da_disciplina_codigo(self, codigo_da_disciplina : str) -> bool:
         """
@@ -337,8 +1510,9 @@ class EnsinoUsp:
         :return: Retorna true caso a disciplina seja encotrado, false caso contrario.
         :rtype: bool
         """
-        if codigo_da_disciplina in self.disciplinas:
-            print(self.disciplinas[codigo_da_disciplina])
+        disciplina = self.buscar_disciplina(codigo_da_disciplina)
+        if disciplina is not None:
+            print(disciplina)
             return True
         
         return False
@@ -347,28 +1521,73 @@ class EnsinoUsp:
         """
         Se o nome da disciplina passada como argumento estiver presente
         no dicionario de disciplina imprime o seu valor e retorna true.
-        Caso contrario retorna false.
+        Caso contrario retorna false. Quando mais de uma disciplina tem
+        o mesmo nome todas são imprimidas.
 
         :param nome_do_curso: Nome da disciplina que deve ter seus dados imprimidos.
         :type nome_do_curso: str
         :return: Retorna true caso a disciplina seja encotrado, false caso contrario.
         :rtype: bool
         """
-        disciplina =  [x for x in self.disciplinas.values() if x.get_nome() == nome]
-        if len(disciplina) > 0:
-            print(disciplina[0])
-            return True
-    
-        return False
+        disciplinas = self.buscar_disciplinas_por_nome(nome)
+        for disciplina in disciplinas:
+            print(disciplina)
+
+        return len(disciplinas) > 0
     
-    def disciplinas_usadas_em_mais_de_um_curso(self):
+    def disciplinas_usadas_em_mais_de_um_curso(self, formato : str = 'texto', arquivo : str | None = None):
         """
         Imprime os dados de todas as disciplinas que sao utilizadas em mais de
         um curso.
+
+        :param formato: Formato da saida: texto, jsonl ou csv.
+        :type formato: str
+        :param arquivo: Arquivo de saida. Caso seja None a saida é o stdout.
+        :type arquivo: str | None
         """
-        disciplinas = [x for x in self.disciplinas.values() if len(x.get_cursos()) > 1]
-        for disciplina in disciplinas:
-            print(disciplina)
+        with abrir_escritor(formato, arquivo) as escritor:
+            for disciplina in self.iterar_disciplinas_compartilhadas():
+                escritor.disciplina(disciplina)
+
+    def cursos_similares(self, nome_do_curso : str) -> bool:
+        """
+        Imprime os cursos com a grade mais parecida com a do curso passado
+        como argumento, pela similaridade de Jaccard entre as grades.
+
+        :param nome_do_curso: Nome do curso.
+        :type nome_do_curso: str
+        :return: Retorna true caso o curso seja encotrado, false caso contrario.
+        :rtype: bool
+        """
+        cursos = self.buscar_cursos(nome_do_curso)
+        for curso in cursos:
+            print(f'\nCursos mais parecidos com {curso.get_curso()}:')
+            similares = self.matriz().mais_similares(curso.get_curso())
+            if len(similares) == 0:
+                print('\tN/A')
+            for similar, similaridade, em_comum in similares:
+                print(f'\t{similar} ({similaridade:.0%} de similaridade, {em_comum} disciplinas em comum)')
+
+        return len(cursos) > 0
+
+    def consulta_em_lote(self, entrada : str = '-', arquivo : str | None = None) -> int:
+        """
+        Executa, sem interação, as consultas de um arquivo ou do stdin,
+        uma por linha, e escreve um resultado JSON por consulta.
+
+        :param entrada: Arquivo das consultas. Caso seja "-" as consultas são lidas do stdin.
+        :type entrada: str
+        :param arquivo: Arquivo de saida. Caso seja None a saida é o stdout.
+        :type arquivo: str | None
+        :return: A quantidade de consultas executadas.
+        :rtype: int
+        """
+        lote = LoteUsp(self)
+        with EscritorDeLote(arquivo) as escritor:
+            if entrada == '-':
+                return lote.executar(sys.stdin, escritor)
+            with open(entrada, encoding='utf-8') as consultas:
+                return lote.executar(consultas, escritor)
 
     def _validar_entrada(self, funcionalidade : str, argumentos : list[str]) -> tuple[bool, str | tuple[int, str]]:
         """
@@ -387,8 +1606,14 @@ class EnsinoUsp:
             contrario retorna false e a segunda posição é uma string de erro.
         """
         if funcionalidade == 'lc' or funcionalidade == 'ddtc' or funcionalidade == 'ddmc':
-            return (True, '')
-        elif funcionalidade == 'ddc':
+            argumentos = [argumento for argumento in argumentos[1:] if argumento]
+            if len(argumentos) > 2:
+                return (False, "Essa funcionalidade recebe no maximo o formato e o arquivo de saida.")
+            formato = argumentos[0] if len(argumentos) > 0 else 'texto'
+            if formato not in ESCRITORES:
+                return (False, f"Formato {formato} não existe. Os formatos são: {', '.join(ESCRITORES)}.")
+            return (True, (formato, argumentos[1] if len(argumentos) > 1 else None))
+        elif funcionalidade == 'ddc' or funcionalidade == 'cs':
             if len(argumentos) > 1:
                 return (True, ' '.join(argumentos[1:]))
             else:
@@ -403,57 +1628,123 @@ class EnsinoUsp:
                 return (False, "É necessário de um disciplina e seu nome/códgo para buscar os seus dados. Zero disciplinas foram passados.")
             
             
+    def sugerir_cursos(self, nome : str) -> list[str]:
+        """
+        Sugere os nomes de cursos mais próximos de um nome não encontrado.
+
+        :param nome: Nome procurado.
+        :type nome: str
+        :return: Os nomes próximos, do mais parecido para o menos parecido.
+        :rtype: list[str]
+        """
+        return self._sugestoes_de_cursos.sugerir(nome)
+
+    def sugerir_disciplinas(self, nome : str) -> list[str]:
+        """
+        Sugere os nomes de disciplinas mais próximos de um nome não encontrado.
+
+        :param nome: Nome procurado.
+        :type nome: str
+        :return: Os nomes próximos, do mais parecido para o menos parecido.
+        :rtype: list[str]
+        """
+        return self._sugestoes_de_disciplinas.sugerir(nome)
+
+    def sugerir_codigos(self, codigo : str) -> list[DisciplinaUsp]:
+        """
+        Sugere as disciplinas com os códigos mais próximos de um código não encontrado.
+
+        :param codigo: Código procurado.
+        :type codigo: str
+        :return: As disciplinas próximas, da mais parecida para a menos parecida.
+        :rtype: list[DisciplinaUsp]
+        """
+        return [self.buscar_disciplina(proximo) for proximo in self._sugestoes_de_codigos.sugerir(codigo)]
+
     def _cursos_ou_disciplinas_proximos_ao_nao_encontrado(self, nome_procurado : str, curso_ou_disciplina : int):
         """
-        Imprime no stdout os cursos ou  que sa próximos ao procurado.
+        Imprime no stdout os cursos, disciplinas ou códigos que são próximos ao procurado.
 
         :param nome_procurado: Nome que foi procurado mais não encontrado.
         :type nome_procurado: str
-        :param curso_ou_disciplina: 0 se for um curso para verificar a proximidade, e 1 se for uma disciplina.
+        :param curso_ou_disciplina: 0 se for um curso para verificar a proximidade, 1 se for
+            o nome de uma disciplina e 2 se for o código de uma disciplina.
         """
         if curso_ou_disciplina == 0:
-            nomes_proximos = get_close_matches(nome_procurado, [x.get_curso() for x in self.cursos.values()], n=5, cutoff=0.6)
+            nomes_proximos = self.sugerir_cursos(nome_procurado)
             if len(nomes_proximos) > 0:
                 print('Curso não encontrado. Talvez você estava procurando por:')
                 for nome in nomes_proximos:
                     print(nome)
             else:
                 print('Curso não encontrado.')
-        else:
-            nomes_proximos = get_close_matches(nome_procurado, [x.get_nome() for x in self.disciplinas.values()], n=5, cutoff=0.6)
+        elif curso_ou_disciplina == 1:
+            nomes_proximos = self.sugerir_disciplinas(nome_procurado)
             if len(nomes_proximos) > 0:
                 print('Disciplina não encontrada. Talvez você estava procurando por:')
                 for nome in nomes_proximos:
                     print(nome)
             else:
                 print('Disciplina não encontrada.')
+        else:
+            disciplinas_proximas = self.sugerir_codigos(nome_procurado)
+            if len(disciplinas_proximas) > 0:
+                print('Código da disciplina não foi encontrado. Talvez você estava procurando por:')
+                for disciplina in disciplinas_proximas:
+                    print(f'{disciplina.get_codigo()} - {disciplina.get_nome()}')
+            else:
+                print('Código da disciplina não foi encontrado.')
 
     def _print_ajuda(self):
         """
         Imprime as informaçoes das funcionalidades disponiveis.
         """
         print('lc -> (listar cursos) Lista todos os cursos oferecidos pelas unidades scrapadas.')
-        print('\tEssa funcinalidade não precisa de argumentos.\n')
+        print('\tEssa funcinalidade não precisa de argumentos. Opcionalmente recebe o formato da saida (texto, jsonl ou csv) e um arquivo de saida.')
+        print('\tEx: lc csv unidades.csv\n')
         print('ddc -> (dados do curso) Imprime os dados de um determinado curso.')
         print('\tEssa funcinalidade recebe como argumento o nome do curso que deseja saber os dados.')
         print('\tEx: ddc Marketing (Ciclo Básico) - noturno\n')
         print('ddtc -> (dados de todos os cursos) Imprieme os dados de todos os cursos.')
-        print('\tEssa funcinalidade não precisa de argumentos.\n')
+        print('\tEssa funcinalidade não precisa de argumentos. Opcionalmente recebe o formato da saida (texto, jsonl ou csv) e um arquivo de saida.')
+        print('\tEx: ddtc jsonl cursos.jsonl\n')
         print('ddd -> (dados da disciplina) Imprieme os dados da disciplina que deseja saber os dados.')
         print('\tEssa funcinalidade recebe como primeiro argumento se a disciplina sera buscada pod código ou por nome, e como segundo o valor da respectiva escolha.')
         print('\tEx: ddd cod ACH0142\n')
         print('\tEx: ddd nome Sociedade, Multiculturalismo e Direitos - Cultura Digital')
         print('ddmc -> (dados das disciplinas em mais de um curso) Imprime os dados das disciplinas que estão em mais de um curso.')
-        print('\tEssa funcinalidade não precisa de argumentos.\n')
+        print('\tEssa funcinalidade não precisa de argumentos. Opcionalmente recebe o formato da saida (texto, jsonl ou csv) e um arquivo de saida.')
+        print('\tEx: ddmc csv\n')
+        print('cs -> (cursos similares) Imprime os cursos com a grade mais parecida com a de um determinado curso.')
+        print('\tEssa funcinalidade recebe como argumento o nome do curso.')
+        print('\tEx: cs Bacharelado em Ciências de Computação - integral\n')
         print('ajuda -> Imprime na tela as funcionalidade disponiveis para serem executadas, em conjunto com instruções de como utiliza-las.\n')
         print('sair -> Sai do programa.\n')
 
+    def _exportar_no_shell(self, exportacao : Callable, argumentos : tuple) -> None:
+        """
+        Executa uma funcionalidade que pode escrever em um arquivo. Caso o
+        arquivo não possa ser escrito o erro é imprimido e o shell continua,
+        sem perder os dados carregados.
+
+        :param exportacao: A funcionalidade (lc, ddtc ou ddmc).
+        :type exportacao: Callable
+        :param argumentos: O formato e o arquivo de saida validados.
+        :type argumentos: tuple
+        """
+        try:
+            exportacao(*argumentos)
+        except OSError as erro:
+            motivo = erro.strerror or str(erro)
+            onde = f' {erro.filename}' if erro.filename is not None else ''
+            print(f'\033[0;31mNão foi possivel escrever o arquivo{onde}: {motivo}.\033[0;37m')
+
     def consulta_de_informacoes(self):
         """
         Faz com que a stdin possa executar consultas
         na classe atraves de inputs especificos.
         """
-        funcionalidades = set(['lc', 'ddc', 'ddtc', 'ddd', 'ddmc'])
+        funcionalidades = set(['lc', 'ddc', 'ddtc', 'ddd', 'ddmc', 'cs'])
         print('Consulta de informações scrapadas.\nDigite um funcionalidade para executa-la.\nLista de funcionalidades disponiveis:')
         self._print_ajuda()
 
@@ -474,25 +1765,33 @@ class EnsinoUsp:
 
                     if entrada_valida:
                         if funcionalidade == 'lc':
-                            self.cursos_por_unidade()
+                            self._exportar_no_shell(self.cursos_por_unidade, args)
                         elif funcionalidade == 'ddc':
                             print(args)
                             encontrado = self.dados_do_curso(args)
                             if not encontrado:
                                 self._cursos_ou_disciplinas_proximos_ao_nao_encontrado(args, 0)
                         elif funcionalidade == 'ddtc':
-                            self.dados_de_todos_os_cursos()
+                            self._exportar_no_shell(self.dados_de_todos_os_cursos, args)
                         if funcionalidade == 'ddd':
                             if args[0] == 0:
                                 encontrado = self.dados_da_disciplina_codigo(args[1])
                                 if not encontrado:
-                                    print('Código da disciplina não foi encontrado.')
+                                    self._cursos_ou_disciplinas_proximos_ao_nao_encontrado(args[1], 2)
                             else:
                                 encontrado = self.dados_da_disciplina_nome(args[1])
                                 if not encontrado:
-                                    self._cursos_ou_disciplinas_proximos_ao_nao_encontrado(args, 1)
+                                    self._cursos_ou_disciplinas_proximos_ao_nao_encontrado(args[1], 1)
                         if funcionalidade == 'ddmc':
-                            self.disciplinas_usadas_em_mais_de_um_curso()
+                            self._exportar_no_shell(self.disciplinas_usadas_em_mais_de_um_curso, args)
+                        if funcionalidade == 'cs':
+                            try:
+                                encontrado = self.cursos_similares(args)
+                            except ImportError:
+                                print('As dependencias de analise não estão instaladas. Execute: pip install .[analise]')
+                            else:
+                                if not encontrado:
+                                    self._cursos_ou_disciplinas_proximos_ao_nao_encontrado(args, 0)
                     else:
                         print(args)
                 else:
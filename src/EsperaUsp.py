@@ -0,0 +1,286 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+from selenium.webdriver import Chrome
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.common.exceptions import ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException
+
+from .RastreamentoUsp import RastreamentoUsp
+
+class EsperaUsp:
+    """
+    A classe EsperaUsp concentra todas as esperas do scrape. Ao invés
+    de dormir um tempo fixo e consultar a página repetidamente, as
+    esperas são resolvidas dentro do navegador por eventos (ajaxSend e
+    ajaxStop do jQuery e um MutationObserver no overlay de carregamento).
+    O tempo limite de cada tipo de espera se adapta as latencias
+    observadas e cada espera é registrada em um histograma. Dentro
+    de um prazo (ex: o prazo de um curso) nenhuma espera passa do
+    fim do prazo.
+    """
+
+    # Limites, em ms, de cada faixa dos histogramas. A ultima faixa é o que passar de 10s
+    FAIXAS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    # Tempo limite de cada tipo de espera enquanto não existem amostras suficientes
+    TEMPO_LIMITE_PADRAO = 60.0
+    TEMPO_LIMITE_MINIMO = 5.0
+    AMOSTRAS_MINIMAS    = 20
+
+    # Tempo que uma espera aguarda o inicio de uma requisição antes de considerar
+    # que a ação não disparou nenhuma requisição
+    GRACA_MS = 100
+
+    # Instala os contadores de requisições na página, caso ainda não estejam instalados
+    _SCRIPT_INSTALAR = """
+        var estado = window.__esperaUsp;
+        if (estado === undefined) {
+            estado = window.__esperaUsp = {iniciadas: 0};
+            if (window.jQuery) {
+                jQuery(document).ajaxSend(function () { estado.iniciadas++; });
+            }
+        }
+    """
+
+    SCRIPT_MARCAR = _SCRIPT_INSTALAR + """
+        return estado.iniciadas;
+    """
+
+    SCRIPT_ESPERAR = _SCRIPT_INSTALAR + """
+        var marca = arguments[0];
+        var graca = arguments[1];
+        var pronto = arguments[arguments.length - 1];
+        var inicio = Date.now();
+
+        function overlayVisivel() {
+            var overlay = document.querySelector('.blockUI.blockOverlay');
+            return overlay !== null && overlay.getClientRects().length > 0
+                && getComputedStyle(overlay).visibility !== 'hidden';
+        }
+
+        function ocioso() {
+            if (marca !== null && estado.iniciadas <= marca && Date.now() - inicio < graca) {
+                return false;
+            }
+            return (!window.jQuery || jQuery.active == 0) && !overlayVisivel();
+        }
+
+        if (ocioso()) {
+            pronto(true);
+            return;
+        }
+
+        var observador = new MutationObserver(tentar);
+        var temporizador = setInterval(tentar, 100);
+        function tentar() {
+            if (ocioso()) {
+                observador.disconnect();
+                clearInterval(temporizador);
+                if (window.jQuery) {
+                    jQuery(document).off('ajaxStop', tentar);
+                }
+                pronto(true);
+            }
+        }
+        observador.observe(document.body, {childList: true, subtree: true, attributes: true,
+                                           attributeFilter: ['style', 'class']});
+        if (window.jQuery) {
+            jQuery(document).on('ajaxStop', tentar);
+        }
+        setTimeout(tentar, graca);
+    """
+
+    latencias   : dict[str, deque]
+    histogramas : dict[str, list[int]]
+    tentativas_de_clique : int
+
+    def __init__(self, rastreamento : RastreamentoUsp | None = None) -> None:
+        """
+        :param rastreamento: Rastreamento do scrape, em que as novas tentativas de clique são contadas.
+        :type rastreamento: RastreamentoUsp | None
+        """
+        self.latencias = {}
+        self.histogramas = {}
+        self.tentativas_de_clique = 0
+        self._trava = threading.Lock()
+        # Cada navegador tem a sua thread, então o prazo e o tempo esperando o jupiter são guardados por thread
+        self._prazos = threading.local()
+        self._no_jupiter = threading.local()
+        self._rastreamento = rastreamento
+
+    def tempo_limite(self, tipo : str) -> float:
+        """
+        Calcula o tempo limite de um tipo de espera a partir das
+        latencias observadas: cinco vezes o percentil 95, dentro
+        dos limites minimo e padrão, e nunca depois do fim do prazo atual.
+
+        :param tipo: O tipo da espera.
+        :type tipo: str
+        :return: O tempo limite em segundos.
+        :rtype: float
+        :raises TimeoutException: Se o prazo atual já terminou.
+        """
+        with self._trava:
+            amostras = sorted(self.latencias.get(tipo, ()))
+
+        if len(amostras) < self.AMOSTRAS_MINIMAS:
+            limite = self.TEMPO_LIMITE_PADRAO
+        else:
+            p95 = amostras[int(len(amostras) * 0.95) - 1]
+            limite = min(max(p95 * 5, self.TEMPO_LIMITE_MINIMO), self.TEMPO_LIMITE_PADRAO)
+
+        fim = getattr(self._prazos, 'fim', None)
+        if fim is None:
+            return limite
+        restante = fim - time.perf_counter()
+        if restante <= 0:
+            raise TimeoutException('O prazo terminou.')
+        return min(limite, restante)
+
+    @contextmanager
+    def prazo(self, segundos : float) -> Iterator[None]:
+        """
+        Limita todas as esperas da thread atual dentro do bloco with
+        a terminar em até segundos a partir de agora.
+
+        :param segundos: Duração do prazo.
+        :type segundos: float
+        """
+        anterior = getattr(self._prazos, 'fim', None)
+        self._prazos.fim = time.perf_counter() + segundos
+        try:
+            yield
+        finally:
+            self._prazos.fim = anterior
+
+    def tempo_no_jupiter(self) -> float:
+        """
+        Pega o tempo total que as esperas por requisições (esperar) da thread
+        atual levaram. A diferença entre duas chamadas é o tempo esperando o
+        jupiter entre elas, sem os cliques, as transferências do DOM e o parse,
+        e é utilizada como o relogio das latencias da ConcorrenciaUsp.
+
+        :return: O tempo, em segundos, esperando o jupiter na thread atual.
+        :rtype: float
+        """
+        return getattr(self._no_jupiter, 'total', 0.0)
+
+    def registrar(self, tipo : str, segundos : float) -> None:
+        """
+        Registra a latencia de uma espera.
+
+        :param tipo: O tipo da espera.
+        :type tipo: str
+        :param segundos: Quanto tempo a espera levou.
+        :type segundos: float
+        """
+        with self._trava:
+            self.latencias.setdefault(tipo, deque(maxlen=500)).append(segundos)
+            histograma = self.histogramas.setdefault(tipo, [0] * (len(self.FAIXAS_MS) + 1))
+            histograma[bisect_left(self.FAIXAS_MS, segundos * 1000)] += 1
+
+    def marcar(self, nav : Chrome) -> int:
+        """
+        Marca a quantidade de requisições iniciadas pela página. Deve
+        ser chamada antes de uma ação que dispara requisições, para que
+        a espera seguinte saiba se a requisição da ação já começou.
+
+        :param nav: O navegador para scraping dos dados.
+        :type nav: Chrome
+        :return: A marca para ser passada para esperar.
+        :rtype: int
+        """
+        return nav.execute_script(self.SCRIPT_MARCAR)
+
+    def esperar(self, nav : Chrome, tipo : str, marca : int | None = None) -> None:
+        """
+        Espera a página terminar todas as requisições e o overlay de
+        carregamento desaparecer.
+
+        :param nav: O navegador para scraping dos dados.
+        :type nav: Chrome
+        :param tipo: O tipo da espera, utilizado para o tempo limite e o histograma.
+        :type tipo: str
+        :param marca: A marca feita antes da ação que disparou as requisições.
+            Caso seja None a espera não aguarda o inicio de novas requisições.
+        :type marca: int | None
+        :raises TimeoutException: Se a página não terminar de carregar a tempo.
+        """
+        inicio = time.perf_counter()
+        nav.set_script_timeout(self.tempo_limite(tipo))
+        try:
+            nav.execute_async_script(self.SCRIPT_ESPERAR, marca, self.GRACA_MS)
+        finally:
+            self._no_jupiter.total = self.tempo_no_jupiter() + time.perf_counter() - inicio
+        self.registrar(tipo, time.perf_counter() - inicio)
+
+    def esperar_condicao(self, nav : Chrome, tipo : str, condicao) -> None:
+        """
+        Espera uma condição do selenium (expected_conditions).
+
+        :param nav: O navegador para scraping dos dados.
+        :type nav: Chrome
+        :param tipo: O tipo da espera, utilizado para o tempo limite e o histograma.
+        :type tipo: str
+        :param condicao: A condição esperada.
+        :raises TimeoutException: Se a condição não for satisfeita a tempo.
+        """
+        inicio = time.perf_counter()
+        WebDriverWait(nav, self.tempo_limite(tipo), poll_frequency=0.05).until(condicao)
+        self.registrar(tipo, time.perf_counter() - inicio)
+
+    def clicar(self, nav : Chrome, por : str, valor : str, tipo : str = 'clique') -> None:
+        """
+        Clica em um elemento. Caso o clique seja interceptado (por
+        exemplo pelo overlay de carregamento) as novas tentativas
+        são feitas com um intervalo que dobra a cada tentativa.
+
+        :param nav: O navegador para scraping dos dados.
+        :type nav: Chrome
+        :param por: A forma de localizar o elemento (By.ID, By.CSS_SELECTOR...).
+        :type por: str
+        :param valor: O valor para localizar o elemento.
+        :type valor: str
+        :param tipo: O tipo da espera, utilizado para o tempo limite e o histograma.
+        :type tipo: str
+        :raises TimeoutException: Se não for possivel clicar a tempo.
+        """
+        inicio = time.perf_counter()
+        limite = inicio + self.tempo_limite(tipo)
+        intervalo = 0.01
+
+        while True:
+            try:
+                nav.find_element(por, valor).click()
+                break
+            except ElementClickInterceptedException:
+                with self._trava:
+                    self.tentativas_de_clique += 1
+                if self._rastreamento is not None:
+                    self._rastreamento.contar('tentativas de clique')
+                if time.perf_counter() + intervalo > limite:
+                    raise TimeoutException(f'Não foi possivel clicar em {valor}.')
+                time.sleep(intervalo)
+                intervalo = min(intervalo * 2, 0.5)
+
+        self.registrar(tipo, time.perf_counter() - inicio)
+
+    def resumo(self) -> str:
+        """
+        Retorna uma representação legivel dos histogramas de cada tipo de espera.
+
+        :return: Uma tabela com a quantidade de esperas em cada faixa de latencia.
+        :rtype: str
+        """
+        cabecalho = [f'<={faixa}ms' for faixa in self.FAIXAS_MS] + [f'>{self.FAIXAS_MS[-1]}ms']
+        linhas = ['Latencia das esperas:', f'{"tipo":<12}' + ''.join(f'{faixa:>10}' for faixa in cabecalho)]
+        with self._trava:
+            for tipo, histograma in sorted(self.histogramas.items()):
+                linhas.append(f'{tipo:<12}' + ''.join(f'{quantidade:>10}' for quantidade in histograma))
+            linhas.append(f'Cliques interceptados: {self.tentativas_de_clique}')
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,84 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+from .RastreamentoUsp import RastreamentoUsp
+
+class EstagioDeParseUsp:
+    """
+    A classe EstagioDeParseUsp faz o parse dos cursos em outros processos,
+    para que o navegador continue navegando enquanto os cursos anteriores
+    são processados. O parse é CPU e segura o GIL, então em threads ele
+    não andaria junto da navegação.
+
+    O conteudo enviado espera em uma fila limitada: quando ela está cheia
+    quem envia fica bloqueado até um parse terminar, assim o html não se
+    acumula na memoria quando o parse é mais lento que a navegação.
+    """
+
+    def __init__(self, processos : int, pendentes : int | None = None,
+                 rastreamento : RastreamentoUsp | None = None) -> None:
+        """
+        :param processos: Quantidade de processos fazendo o parse.
+        :type processos: int
+        :param pendentes: Tamanho da fila, a quantidade maxima de conteudos enviados
+            e ainda não processados. Por padrão quatro por processo.
+        :type pendentes: int | None
+        :param rastreamento: Rastreamento em que as esperas pela fila são registradas.
+        :type rastreamento: RastreamentoUsp | None
+        """
+        # Os processos são iniciados do zero (spawn), e não copiados (fork), porque
+        # copiar um processo com as threads dos navegadores não é seguro
+        self._executor = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+        self.pendentes = pendentes if pendentes is not None else processos * 4
+        self._vagas = threading.BoundedSemaphore(self.pendentes)
+        self._rastreamento = rastreamento if rastreamento is not None else RastreamentoUsp()
+
+    def __enter__(self) -> 'EstagioDeParseUsp':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+    def enviar(self, extrair : Callable, conteudo : str, construir : Callable) -> Future:
+        """
+        Envia um conteudo para o parse. Bloqueia enquanto a fila estiver cheia.
+
+        :param extrair: Função de parse executada em outro processo, como o
+            ParserUsp.extrair_curso. Deve ser uma função de modulo.
+        :type extrair: Callable
+        :param conteudo: Conteudo passado para a função de parse.
+        :type conteudo: str
+        :param construir: Função que recebe o resultado do parse e constroi o resultado
+            final. É executada neste processo, assim que o parse termina.
+        :type construir: Callable
+        :return: O futuro com o resultado do construir.
+        :rtype: Future
+        """
+        if not self._vagas.acquire(blocking=False):
+            with self._rastreamento.intervalo('fila do parse'):
+                self._vagas.acquire()
+
+        resultado : Future = Future()
+        try:
+            parse = self._executor.submit(extrair, conteudo)
+        except BaseException:
+            self._vagas.release()
+            raise
+
+        def concluir(parse : Future) -> None:
+            self._vagas.release()
+            try:
+                resultado.set_result(construir(parse.result()))
+            except BaseException as erro:
+                resultado.set_exception(erro)
+
+        parse.add_done_callback(concluir)
+        return resultado
+
+    def fechar(self) -> None:
+        """
+        Espera os parses enviados terminarem e encerra os processos.
+        """
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,170 @@
+import os
+
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet
+
+from .CursoUsp import CursoUsp
+from .DisciplinaUsp import DisciplinaUsp
+from .UnidadeUsp import UnidadeUsp
+from .RegistroUsp import NA
+
+FORMATOS = {'parquet' : '.parquet', 'arrow' : '.arrow'}
+
+# O dicionario da coluna modalidade é o mesmo em todos os lotes, o que o Arrow IPC exige
+MODALIDADES = pa.array(['obrigatórias', 'livres', 'eletivas'])
+
+SCHEMA_UNIDADES = pa.schema([
+    ('id', pa.int32()),
+    ('nome', pa.string()),
+    ('sigla', pa.string()),
+])
+
+SCHEMA_CURSOS = pa.schema([
+    ('id', pa.int32()),
+    ('nome', pa.string()),
+    ('unidade_id', pa.int32()),
+    ('duracao_ideal', pa.int16()),
+    ('duracao_minima', pa.int16()),
+    ('duracao_maxima', pa.int16()),
+])
+
+SCHEMA_DISCIPLINAS = pa.schema([
+    ('codigo', pa.string()),
+    ('nome', pa.string()),
+    ('creditos_aula', pa.int16()),
+    ('creditos_trabalho', pa.int16()),
+    ('carga_horaria', pa.int16()),
+    ('carga_horaria_estagio', pa.int16()),
+    ('carga_horaria_pcc', pa.int16()),
+    ('atividades_tpa', pa.int16()),
+])
+
+SCHEMA_GRADES = pa.schema([
+    ('curso_id', pa.int32()),
+    ('codigo', pa.string()),
+    ('modalidade', pa.dictionary(pa.int8(), pa.string())),
+])
+
+DICIONARIOS_GRADES = {'modalidade' : MODALIDADES}
+
+class _EscritorDeTabela:
+    """
+    Acumula as linhas de uma tabela em colunas e escreve um lote
+    (RecordBatch) sempre que o tamanho do lote é atingido. As colunas
+    com dicionario recebem os indices do dicionario fixo da coluna.
+    """
+
+    def __init__(self, caminho : str, formato : str, schema : pa.Schema, tamanho_do_lote : int,
+                 dicionarios : dict[str, pa.Array] | None = None) -> None:
+        self._schema = schema
+        self._tamanho_do_lote = tamanho_do_lote
+        self._dicionarios = dicionarios or {}
+        self._colunas : list[list] = [[] for _ in schema]
+
+        if formato == 'parquet':
+            self._escritor = pyarrow.parquet.ParquetWriter(caminho, schema)
+        else:
+            self._escritor = pyarrow.ipc.new_file(caminho, schema)
+
+    def adicionar(self, *valores) -> None:
+        for coluna, valor in zip(self._colunas, valores):
+            coluna.append(valor)
+
+        if len(self._colunas[0]) >= self._tamanho_do_lote:
+            self._escrever_lote()
+
+    def estender(self, *valores : list) -> None:
+        """
+        Adiciona varias linhas de uma vez, recebendo uma lista por coluna.
+        """
+        for coluna, lista in zip(self._colunas, valores):
+            coluna.extend(lista)
+
+        if len(self._colunas[0]) >= self._tamanho_do_lote:
+            self._escrever_lote()
+
+    def _array(self, coluna : list, campo : pa.Field) -> pa.Array:
+        if campo.name in self._dicionarios:
+            return pa.DictionaryArray.from_arrays(pa.array(coluna, type=campo.type.index_type),
+                                                  self._dicionarios[campo.name])
+        return pa.array(coluna, type=campo.type)
+
+    def _escrever_lote(self) -> None:
+        if len(self._colunas[0]) == 0:
+            return
+
+        lote = pa.RecordBatch.from_arrays(
+            [self._array(coluna, campo) for coluna, campo in zip(self._colunas, self._schema)],
+            schema=self._schema)
+        self._escritor.write_batch(lote)
+        self._colunas = [[] for _ in self._schema]
+
+    def fechar(self) -> None:
+        self._escrever_lote()
+        self._escritor.close()
+
+def _valor(valor : int) -> int | None:
+    return None if valor == NA else valor
+
+def exportar_colunar(pasta : str, unidades : list[UnidadeUsp], cursos : dict[str, CursoUsp],
+                     disciplinas : dict[str, DisciplinaUsp], formato : str = 'parquet',
+                     tamanho_do_lote : int = 16384) -> list[str]:
+    """
+    Exporta os dados scrapados em quatro tabelas colunares normalizadas:
+    unidades, cursos, disciplinas e grades (curso, disciplina e modalidade).
+    Os ids das unidades e dos cursos são as suas posições nas tabelas.
+
+    :param pasta: Pasta onde as tabelas são escritas. É criada caso não exista.
+    :type pasta: str
+    :param unidades: Unidades scrapadas.
+    :type unidades: list[UnidadeUsp]
+    :param cursos: Dicionario dos cursos, indexado pelo nome do curso.
+    :type cursos: dict[str, CursoUsp]
+    :param disciplinas: Dicionario das disciplinas, indexado pelo código.
+    :type disciplinas: dict[str, DisciplinaUsp]
+    :param formato: Formato das tabelas: parquet ou arrow (Arrow IPC).
+    :type formato: str
+    :param tamanho_do_lote: Quantidade de linhas de cada lote escrito.
+    :type tamanho_do_lote: int
+    :return: Os caminhos das tabelas escritas.
+    :rtype: list[str]
+    :raises ValueError: Se o formato não existir.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato {formato} não existe. Os formatos são: {", ".join(FORMATOS)}.')
+
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = [os.path.join(pasta, nome + FORMATOS[formato])
+                for nome in ('unidades', 'cursos', 'disciplinas', 'grades')]
+
+    tabela = _EscritorDeTabela(caminhos[0], formato, SCHEMA_UNIDADES, tamanho_do_lote)
+    ids_das_unidades = {}
+    for id_unidade, unidade in enumerate(unidades):
+        ids_das_unidades[unidade.get_nome()] = id_unidade
+        tabela.adicionar(id_unidade, unidade.get_nome(), unidade.get_sigla())
+    tabela.fechar()
+
+    tabela = _EscritorDeTabela(caminhos[1], formato, SCHEMA_CURSOS, tamanho_do_lote)
+    grades = _EscritorDeTabela(caminhos[3], formato, SCHEMA_GRADES, tamanho_do_lote, DICIONARIOS_GRADES)
+    for id_curso, curso in enumerate(cursos.values()):
+        codigos = curso.registros.codigos.nomes
+        tabela.adicionar(id_curso, curso.get_curso(), ids_das_unidades.get(curso.get_unidade()),
+                         _valor(curso.dur_idl), _valor(curso.dur_min), _valor(curso.dur_max))
+
+        # Os indices das modalidades seguem a ordem de MODALIDADES
+        for modalidade, grade in enumerate((curso.disciplinas_obrigatorias, curso.disciplinas_opt_livre,
+                                            curso.disciplinas_opt_eletivas)):
+            grades.estender([id_curso] * len(grade), [codigos[identificador] for identificador in grade],
+                            [modalidade] * len(grade))
+    tabela.fechar()
+    grades.fechar()
+
+    tabela = _EscritorDeTabela(caminhos[2], formato, SCHEMA_DISCIPLINAS, tamanho_do_lote)
+    for disciplina in disciplinas.values():
+        tabela.adicionar(disciplina.codigo, disciplina.nome,
+                         _valor(disciplina.cred_aula), _valor(disciplina.cred_trab), _valor(disciplina.CH),
+                         _valor(disciplina.CE), _valor(disciplina.CP), _valor(disciplina.ATPA))
+    tabela.fechar()
+
+    return caminhos
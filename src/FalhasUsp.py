@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+
+from .RastreamentoUsp import RastreamentoUsp
+
+class FalhasUsp:
+    """
+    A classe FalhasUsp decide quando um curso (ou unidade) que falhou
+    no scrape é tentado novamente e registra os que falharam em todas
+    as tentativas. Cada tentativa espera o dobro da anterior depois da
+    falha. As falhas definitivas são escritas no relatorio, uma linha
+    JSON por falha, e não entram no resultado do scrape nem no diario,
+    então um --resume tenta esses cursos de novo.
+    """
+
+    TENTATIVAS     = 3
+    ESPERA_INICIAL = 5.0
+
+    caminho    : str | None
+    quantidade : int
+
+    def __init__(self, caminho : str | None = None, rastreamento : RastreamentoUsp | None = None) -> None:
+        """
+        :param caminho: Caminho do relatorio de falhas. O arquivo só é criado
+            quando acontece a primeira falha. Caso seja None as falhas são
+            apenas contadas.
+        :type caminho: str | None
+        :param rastreamento: Rastreamento em que as falhas são contadas.
+        :type rastreamento: RastreamentoUsp | None
+        """
+        self.caminho = caminho
+        self.quantidade = 0
+        self._rastreamento = rastreamento if rastreamento is not None else RastreamentoUsp()
+        self._trava = threading.Lock()
+        self._arquivo = None
+
+    def espera(self, tentativa : int) -> float:
+        """
+        Calcula quanto tempo, depois da falha, a proxima tentativa deve esperar.
+
+        :param tentativa: Número da tentativa que falhou, começando em 1.
+        :type tentativa: int
+        :return: A espera em segundos.
+        :rtype: float
+        """
+        return self.ESPERA_INICIAL * 2 ** (tentativa - 1)
+
+    def esperar(self, tentativa : int, falhou_em : float) -> None:
+        """
+        Dorme o que falta da espera da tentativa. O tempo gasto com outros
+        cursos desde a falha já conta como espera.
+
+        :param tentativa: Número da tentativa que falhou.
+        :type tentativa: int
+        :param falhou_em: Instante da falha, em time.monotonic().
+        :type falhou_em: float
+        """
+        restante = falhou_em + self.espera(tentativa) - time.monotonic()
+        if restante > 0:
+            with self._rastreamento.intervalo('espera da nova tentativa'):
+                time.sleep(restante)
+
+    def pode_tentar_novamente(self, tentativa : int) -> bool:
+        """
+        :param tentativa: Número da tentativa que falhou.
+        :type tentativa: int
+        :return: True caso ainda exista outra tentativa.
+        :rtype: bool
+        """
+        return tentativa < self.TENTATIVAS
+
+    def registrar(self, unidade : str, curso : str | None, tentativas : int, erro : BaseException) -> None:
+        """
+        Registra uma falha definitiva no relatorio.
+
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :param curso: Nome do curso, ou None caso a falha seja da unidade inteira.
+        :type curso: str | None
+        :param tentativas: Quantidade de tentativas feitas.
+        :type tentativas: int
+        :param erro: O erro da ultima tentativa.
+        :type erro: BaseException
+        """
+        self._rastreamento.contar('falhas definitivas')
+        mensagem = str(erro).strip().partition('\n')[0]
+        registro = {
+            'unidade'    : unidade,
+            'curso'      : curso,
+            'tentativas' : tentativas,
+            'erro'       : type(erro).__name__,
+            'mensagem'   : mensagem,
+            'instante'   : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self._trava:
+            self.quantidade += 1
+            if self.caminho is None:
+                return
+            if self._arquivo is None:
+                self._arquivo = open(self.caminho, 'w', encoding='utf-8')
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            self._arquivo.flush()
+
+    def resumo(self) -> str:
+        """
+        :return: Uma linha com a quantidade de falhas definitivas e onde elas foram registradas.
+        :rtype: str
+        """
+        if self.quantidade == 0:
+            return 'Nenhuma falha definitiva.\n'
+        onde = f', registradas em {self.caminho}' if self.caminho is not None else ''
+        return f'\033[0;31m{self.quantidade} falhas definitivas{onde}. Use --resume para tentar novamente.\033[0;37m\n'
+
+    def fechar(self) -> None:
+        """
+        Fecha o relatorio de falhas.
+        """
+        with self._trava:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
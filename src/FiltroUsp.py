@@ -0,0 +1,104 @@
+import re
+
+class FiltroUsp:
+    """
+    A classe FiltroUsp escolhe quais unidades, cursos e modalidades de
+    disciplinas entram no scrape. As unidades e os cursos são filtrados
+    pelo nome que aparece nos seletores do jupiter, antes de qualquer
+    clique ou requisição do curso, então um scrape de poucas unidades
+    custa apenas essas unidades. As modalidades ignoradas são removidas
+    da grade de cada curso na construção.
+
+    Um filtro sem nenhum criterio aceita tudo.
+    """
+
+    # Periodos que aparecem no final do nome dos cursos, ex: "... - integral"
+    PERIODOS = ('integral', 'diurno', 'matutino', 'vespertino', 'noturno')
+
+    siglas      : set[str] | None
+    padrao      : re.Pattern | None
+    periodos    : set[str] | None
+    modalidades : list[str]
+
+    def __init__(self, siglas : list[str] | None = None, padrao : str | None = None,
+                 periodos : list[str] | None = None, modalidades : list[str] | None = None) -> None:
+        """
+        :param siglas: Siglas das unidades aceitas, ex: ['ICMC', 'IME'], ou None para todas.
+        :type siglas: list[str] | None
+        :param padrao: Expressão regular procurada no nome dos cursos, sem
+            diferenciar maiusculas de minusculas, ou None para todos.
+        :type padrao: str | None
+        :param periodos: Periodos aceitos (PERIODOS), ex: ['noturno'], ou None para todos.
+        :type periodos: list[str] | None
+        :param modalidades: Trechos do nome das modalidades ignoradas, ex:
+            ['optativas livres'], sem diferenciar maiusculas de minusculas.
+        :type modalidades: list[str] | None
+        :raises ValueError: Se o padrão não for uma expressão regular valida ou
+            um periodo não for conhecido.
+        """
+        self.siglas = {sigla.strip().upper() for sigla in siglas if sigla.strip()} if siglas else None
+
+        try:
+            self.padrao = re.compile(padrao, re.IGNORECASE) if padrao else None
+        except re.error as erro:
+            raise ValueError(f'Padrão de curso invalido: {erro}') from erro
+
+        self.periodos = {periodo.strip().lower() for periodo in periodos if periodo.strip()} if periodos else None
+        desconhecidos = (self.periodos or set()) - set(self.PERIODOS)
+        if desconhecidos:
+            raise ValueError(f'Periodos desconhecidos: {", ".join(sorted(desconhecidos))}. '
+                             f'Os periodos são: {", ".join(self.PERIODOS)}.')
+
+        self.modalidades = [modalidade.strip().casefold() for modalidade in modalidades or [] if modalidade.strip()]
+
+    def aceita_unidade(self, unidade : str) -> bool:
+        """
+        :param unidade: Nome da unidade, com a sigla entre parenteses, como no seletor de unidades.
+        :type unidade: str
+        :return: True caso a unidade entre no scrape.
+        :rtype: bool
+        """
+        if self.siglas is None:
+            return True
+        sigla = re.findall(r'\(([^\)]+)\)', unidade)
+        return bool(sigla) and sigla[0].strip().upper() in self.siglas
+
+    def aceita_curso(self, curso : str) -> bool:
+        """
+        :param curso: Nome do curso, como no seletor de cursos.
+        :type curso: str
+        :return: True caso o curso entre no scrape.
+        :rtype: bool
+        """
+        if self.padrao is not None and self.padrao.search(curso) is None:
+            return False
+        if self.periodos is not None:
+            periodo = curso.rpartition(' - ')[2].strip().lower()
+            return periodo in self.periodos
+        return True
+
+    def aceita_modalidade(self, modalidade : str) -> bool:
+        """
+        :param modalidade: Nome da modalidade, ex: "Disciplinas Optativas Livres".
+        :type modalidade: str
+        :return: True caso as disciplinas da modalidade entrem na grade dos cursos.
+        :rtype: bool
+        """
+        if not self.modalidades:
+            return True
+        modalidade = modalidade.casefold()
+        return not any(ignorada in modalidade for ignorada in self.modalidades)
+
+    def siglas_ausentes(self, unidades : list[str]) -> list[str]:
+        """
+        Procura as siglas do filtro que não pertencem a nenhuma unidade.
+
+        :param unidades: Nome de todas as unidades do seletor de unidades.
+        :type unidades: list[str]
+        :return: As siglas sem unidade, em ordem alfabetica.
+        :rtype: list[str]
+        """
+        if self.siglas is None:
+            return []
+        presentes = {sigla.strip().upper() for unidade in unidades for sigla in re.findall(r'\(([^\)]+)\)', unidade)[:1]}
+        return sorted(self.siglas - presentes)
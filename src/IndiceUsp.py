@@ -0,0 +1,67 @@
+import unicodedata
+
+from .CursoUsp import CursoUsp
+from .DisciplinaUsp import DisciplinaUsp
+
+def normalizar(nome : str) -> str:
+    """
+    Normaliza um nome para busca: remove os acentos, ignora maiusculas
+    e minusculas e junta os espaços em branco repetidos.
+
+    :param nome: Nome para ser normalizado.
+    :type nome: str
+    :return: O nome normalizado.
+    :rtype: str
+    """
+    sem_acentos = ''.join(caractere for caractere in unicodedata.normalize('NFKD', nome)
+                          if not unicodedata.combining(caractere))
+    return ' '.join(sem_acentos.casefold().split())
+
+class IndiceUsp:
+    """
+    A classe IndiceUsp é um indice dos nomes normalizados dos cursos
+    e das disciplinas. Como disciplinas diferentes podem ter o mesmo
+    nome, cada nome aponta para a lista de todos os códigos com ele.
+    """
+
+    cursos      : dict[str, list[str]]
+    disciplinas : dict[str, list[str]]
+
+    def __init__(self, cursos : dict[str, CursoUsp], disciplinas : dict[str, DisciplinaUsp]) -> None:
+        """
+        :param cursos: Dicionario dos cursos, indexado pelo nome do curso.
+        :type cursos: dict[str, CursoUsp]
+        :param disciplinas: Dicionario das disciplinas, indexado pelo código.
+        :type disciplinas: dict[str, DisciplinaUsp]
+        """
+        self.cursos = {}
+        for chave, curso in cursos.items():
+            self.cursos.setdefault(normalizar(curso.get_curso()), []).append(chave)
+
+        self.disciplinas = {}
+        for codigo, disciplina in disciplinas.items():
+            self.disciplinas.setdefault(normalizar(disciplina.get_nome()), []).append(codigo)
+
+    def buscar_cursos(self, nome : str) -> list[str]:
+        """
+        Busca os cursos com o nome dado, sem diferenciar acentos,
+        maiusculas e minusculas e espaços repetidos.
+
+        :param nome: Nome do curso.
+        :type nome: str
+        :return: As chaves de todos os cursos com esse nome.
+        :rtype: list[str]
+        """
+        return self.cursos.get(normalizar(nome), [])
+
+    def buscar_disciplinas(self, nome : str) -> list[str]:
+        """
+        Busca as disciplinas com o nome dado, sem diferenciar acentos,
+        maiusculas e minusculas e espaços repetidos.
+
+        :param nome: Nome da disciplina.
+        :type nome: str
+        :return: Os códigos de todas as disciplinas com esse nome.
+        :rtype: list[str]
+        """
+        return self.disciplinas.get(normalizar(nome), [])
@@ -0,0 +1,200 @@
+import asyncio
+from typing import Callable
+
+import httpx
+from .ConcorrenciaUsp import ConcorrenciaUsp
+from .ParserUsp import extrair_unidades
+from .RastreamentoUsp import RastreamentoUsp
+from .RegistroUsp import RegistrosUsp
+from .UnidadeUsp import UnidadeUsp
+
+class JupiterHttp:
+    """
+    A classe JupiterHttp faz o scrape do jupiter sem navegador,
+    chamando diretamente os endpoints que o javascript da página
+    de carreiras chama via AJAX. Todas as requisições são feitas
+    por um único cliente assíncrono, que mantém os cookies da sessão
+    e reaproveita as conexões. A quantidade de requisições simultaneas
+    se adapta a latencia do jupiter (ConcorrenciaUsp), e as respostas
+    de servidor sobrecarregado (429 e 503) e as falhas de rede são
+    tentadas novamente depois de uma espera crescente.
+
+    Os endpoints, os seus parametros e o formato das respostas ainda não
+    foram conferidos com respostas gravadas do jupiter. O servidor local
+    dos benchmarks (benchmarks/servidor_jupiter.py) responde no formato que
+    esta classe espera, então ele testa o cliente, mas não o contrato.
+    """
+
+    URL_BASE            = 'https://uspdigital.usp.br/jupiterweb/'
+    PAGINA_CARREIRA     = 'jupCarreira.jsp?codmnu=8275'
+    # Não conferidos com o jupiter, por isso são constantes que podem ser ajustadas
+    ENDPOINT_CURSOS     = 'listarCursosRequisitos'
+    ENDPOINT_GRADE      = 'listarGradeCurricular'
+
+    # Respostas que indicam servidor sobrecarregado e são tentadas novamente
+    STATUS_SOBRECARGA   = (429, 502, 503, 504)
+    TENTATIVAS          = 5
+    ESPERA_INICIAL      = 0.5
+
+    cliente      : httpx.AsyncClient
+    concorrencia : ConcorrenciaUsp
+    rastreamento : RastreamentoUsp
+    registros    : RegistrosUsp
+
+    def __init__(self, url_base : str = URL_BASE, conexoes : int = 16, tempo_limite : float = 60,
+                 rastreamento : RastreamentoUsp | None = None, por_segundo : float | None = None,
+                 registros : RegistrosUsp | None = None) -> None:
+        """
+        :param url_base: Endereço do jupiter. Pode ser trocado por um servidor
+            local que imite o jupiter.
+        :type url_base: str
+        :param conexoes: Quantidade maxima de requisições simultaneas. A quantidade
+            usada se adapta a latencia do servidor, sem passar deste maximo.
+        :type conexoes: int
+        :param tempo_limite: Tempo maximo, em segundos, de cada requisição.
+        :type tempo_limite: float
+        :param rastreamento: Rastreamento em que as requisições são registradas.
+        :type rastreamento: RastreamentoUsp | None
+        :param por_segundo: Quantidade maxima de requisições iniciadas por segundo, ou None para não limitar.
+        :type por_segundo: float | None
+        :param registros: Registros dos nomes das unidades criadas pelo scrape.
+        :type registros: RegistrosUsp | None
+        """
+        self.cliente = httpx.AsyncClient(
+            base_url=url_base,
+            timeout=tempo_limite,
+            limits=httpx.Limits(max_connections=conexoes, max_keepalive_connections=conexoes),
+            headers={'X-Requested-With': 'XMLHttpRequest'},
+            follow_redirects=True,
+        )
+        self.rastreamento = rastreamento if rastreamento is not None else RastreamentoUsp()
+        self.registros = registros if registros is not None else RegistrosUsp()
+        self.concorrencia = ConcorrenciaUsp(conexoes, por_segundo=por_segundo, rastreamento=self.rastreamento)
+
+    async def __aenter__(self) -> 'JupiterHttp':
+        # A primeira visita a página de carreiras cria a sessão (JSESSIONID)
+        # que os endpoints esperam receber nos cookies
+        await self._get(self.PAGINA_CARREIRA)
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.cliente.aclose()
+
+    async def _get(self, caminho : str, **parametros : str) -> httpx.Response:
+        """
+        Faz uma requisição GET respeitando o limite de requisições simultaneas.
+        Respostas de sobrecarga e falhas de rede são tentadas novamente, com
+        uma espera que dobra a cada tentativa, e reduzem o limite.
+
+        :param caminho: Caminho relativo ao endereço do jupiter.
+        :type caminho: str
+        :return: A resposta do servidor.
+        :rtype: httpx.Response
+        :raises httpx.HTTPError: Se a ultima tentativa falhar.
+        """
+        for tentativa in range(1, self.TENTATIVAS + 1):
+            try:
+                async with self.concorrencia.vaga_async():
+                    resposta = await self.cliente.get(caminho, params=parametros)
+                    # Dentro da vaga, para que a sobrecarga conte como congestionamento
+                    if resposta.status_code in self.STATUS_SOBRECARGA:
+                        resposta.raise_for_status()
+                resposta.raise_for_status()
+                return resposta
+            except httpx.HTTPStatusError as erro:
+                if erro.response.status_code not in self.STATUS_SOBRECARGA or tentativa == self.TENTATIVAS:
+                    raise
+            except httpx.TransportError:
+                if tentativa == self.TENTATIVAS:
+                    raise
+            self.rastreamento.contar('requisições repetidas')
+            with self.rastreamento.intervalo('espera da nova tentativa'):
+                await asyncio.sleep(self.ESPERA_INICIAL * 2 ** (tentativa - 1))
+
+    async def get_unidades(self) -> list[tuple[str, str]]:
+        """
+        Pega o código e o nome de todas as unidades presentes
+        no seletor de unidades da página de carreiras.
+
+        :return: Lista de tuplas (código, nome) de cada unidade.
+        :rtype: list[tuple[str, str]]
+        """
+        resposta = await self._get(self.PAGINA_CARREIRA)
+        return extrair_unidades(resposta.text)
+
+    async def get_cursos(self, codigo_unidade : str) -> list[tuple[str, str, str]]:
+        """
+        Pega os cursos de uma unidade, os mesmos que aparecem
+        no seletor de cursos após selecionar a unidade.
+
+        :param codigo_unidade: Código da unidade (codcg).
+        :type codigo_unidade: str
+        :return: Lista de tuplas (codcur, codhab, nome) de cada curso.
+        :rtype: list[tuple[str, str, str]]
+        """
+        with self.rastreamento.intervalo('cursos da unidade', trilha=codigo_unidade):
+            resposta = await self._get(self.ENDPOINT_CURSOS, codcg=codigo_unidade)
+        return [(str(curso['codcur']), str(curso['codhab']), curso['nomcur']) for curso in resposta.json()]
+
+    async def get_grade(self, codigo_unidade : str, codcur : str, codhab : str) -> str:
+        """
+        Pega o html da grade curricular de um curso, o mesmo que a
+        página coloca na aba da grade curricular.
+
+        :param codigo_unidade: Código da unidade (codcg).
+        :type codigo_unidade: str
+        :param codcur: Código do curso.
+        :type codcur: str
+        :param codhab: Código da habilitação do curso.
+        :type codhab: str
+        :return: O html da grade curricular.
+        :rtype: str
+        """
+        # Cada requisição tem a sua trilha, já que varias acontecem ao mesmo tempo na mesma thread
+        with self.rastreamento.intervalo('requisição da grade', trilha=f'{codigo_unidade}/{codcur}-{codhab}'):
+            resposta = await self._get(self.ENDPOINT_GRADE, codcg=codigo_unidade, codcur=codcur, codhab=codhab, tipo='N')
+        return resposta.text
+
+    async def scrape_unidade(self, codigo_unidade : str, unidade : str, montar : Callable,
+                             aceitar : Callable[[str], bool] | None = None) -> tuple[UnidadeUsp, list]:
+        """
+        Faz o scrape de todos os cursos de uma unidade ao mesmo tempo.
+
+        :param codigo_unidade: Código da unidade (codcg).
+        :type codigo_unidade: str
+        :param unidade: Nome da unidade.
+        :type unidade: str
+        :param montar: Corrotina que recebe o nome do curso, o nome da unidade, o
+            html da grade e a trilha do rastreamento e monta o resultado do curso.
+            A tabela de informações do curso é lida da grade.
+            Ela é chamada assim que a grade do curso chega, enquanto as outras
+            grades ainda são requisitadas, e não deve bloquear o laço de eventos.
+            Um curso para o qual o montar devolve None (ex: o parse falhou) fica fora da unidade.
+        :type montar: Callable
+        :param aceitar: Função que recebe o nome de um curso e diz se ele entra
+            no scrape. Os cursos recusados não tem a grade requisitada.
+        :type aceitar: Callable[[str], bool] | None
+        :return: A unidade e o resultado de cada um dos seus cursos aceitos, na
+            ordem do seletor de cursos.
+        :rtype: tuple[UnidadeUsp, list]
+        """
+        with self.rastreamento.intervalo('unidade', RastreamentoUsp.UNIDADE, trilha=codigo_unidade, unidade=unidade):
+            cursos = await self.get_cursos(codigo_unidade)
+            if aceitar is not None:
+                cursos = [curso for curso in cursos if aceitar(curso[2])]
+
+            async def scrape_curso(codcur : str, codhab : str, curso : str):
+                grade = await self.get_grade(codigo_unidade, codcur, codhab)
+                trilha = f'{codigo_unidade}/{codcur}-{codhab}'
+                with self.rastreamento.intervalo('curso', RastreamentoUsp.CURSO, trilha=trilha,
+                                                 curso=curso, unidade=unidade):
+                    return curso, await montar(curso, unidade, grade, trilha=trilha)
+
+            montados = await asyncio.gather(*(scrape_curso(*curso) for curso in cursos))
+            presentes = set()
+            resultados = []
+            for curso, resultado in montados:
+                if resultado is not None:
+                    presentes.add(curso)
+                    resultados.append(resultado)
+            return UnidadeUsp(unidade, presentes, self.registros), resultados
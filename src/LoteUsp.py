@@ -0,0 +1,209 @@
+import json
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from .RenderizadorUsp import EscritorUsp
+
+class EscritorDeLote(EscritorUsp):
+    """
+    Escreve os resultados das consultas em lote, um objeto JSON por linha.
+    """
+
+    def __init__(self, arquivo : str | None = None) -> None:
+        super().__init__(arquivo)
+        self._codificador = json.JSONEncoder(ensure_ascii=False)
+
+    def resultado(self, resultado : dict) -> None:
+        self._saida.write(self._codificador.encode(resultado))
+        self._saida.write('\n')
+
+class LoteUsp:
+    """
+    A classe LoteUsp executa consultas em lote sobre um EnsinoUsp (ou
+    BancoUsp), sem interação. Cada consulta é uma linha, no mesmo formato
+    das consultas interativas (ex: ddd cod ACH0142) ou um objeto JSON
+    (ex: {"id": 1, "comando": "ddd", "codigo": "ACH0142"}), e gera um
+    objeto JSON de resultado, inclusive quando nada é encontrado, caso
+    em que o resultado traz as sugestões de nomes ou códigos próximos.
+    """
+
+    TAMANHO_DO_CACHE = 4096
+
+    def __init__(self, usp) -> None:
+        """
+        :param usp: Dados consultados.
+        :type usp: EnsinoUsp
+        """
+        self._usp = usp
+        self._decodificador = json.JSONDecoder()
+
+        # Os lotes costumam repetir as mesmas consultas não encontradas, e as sugestões são a parte mais cara
+        self._sugerir_cursos = lru_cache(self.TAMANHO_DO_CACHE)(usp.sugerir_cursos)
+        self._sugerir_disciplinas = lru_cache(self.TAMANHO_DO_CACHE)(usp.sugerir_disciplinas)
+        self._sugerir_codigos = lru_cache(self.TAMANHO_DO_CACHE)(
+            lambda codigo : [{'codigo' : proxima.get_codigo(), 'nome' : proxima.get_nome()}
+                             for proxima in usp.sugerir_codigos(codigo)])
+        self._comandos : dict[str, Callable[[dict, bool], dict]] = {
+            'lc'   : self._lc,
+            'ddc'  : self._ddc,
+            'ddtc' : self._ddtc,
+            'ddd'  : self._ddd,
+            'ddmc' : self._ddmc,
+            'cs'   : self._cs,
+        }
+
+    def executar(self, entrada : Iterable[str], escritor : EscritorDeLote) -> int:
+        """
+        Executa todas as consultas da entrada e escreve um resultado para cada uma.
+        Linhas em branco são ignoradas.
+
+        :param entrada: Linhas das consultas, como um arquivo aberto ou o stdin.
+        :type entrada: Iterable[str]
+        :param escritor: Escritor dos resultados.
+        :type escritor: EscritorDeLote
+        :return: A quantidade de consultas executadas.
+        :rtype: int
+        """
+        quantidade = 0
+        for numero, linha in enumerate(entrada, 1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            escritor.resultado(self.consultar(linha, numero))
+            quantidade += 1
+        return quantidade
+
+    def consultar(self, linha : str, numero : int = 0) -> dict:
+        """
+        Executa uma consulta.
+
+        :param linha: Consulta em texto ou objeto JSON.
+        :type linha: str
+        :param numero: Número da linha, utilizado como id quando a consulta não tem um.
+        :type numero: int
+        :return: O resultado da consulta.
+        :rtype: dict
+        """
+        try:
+            pedido = self._ler_pedido(linha)
+        except ValueError as erro:
+            return {'id' : numero, 'erro' : str(erro)}
+
+        pedido.setdefault('id', numero)
+        return {'id' : pedido['id'], **self.responder(pedido)}
+
+    def responder(self, pedido : dict, sugerir : bool = True) -> dict:
+        """
+        Executa um pedido já lido, com o comando e o nome ou código procurado.
+
+        :param pedido: Pedido da consulta, ex: {"comando": "ddd", "codigo": "ACH0142"}.
+        :type pedido: dict
+        :param sugerir: Se False as consultas não encontradas são respondidas sem
+            as sugestões, que são a parte mais cara da consulta.
+        :type sugerir: bool
+        :return: O resultado da consulta, sem o id.
+        :rtype: dict
+        """
+        comando = self._comandos.get(pedido['comando'])
+        if comando is None:
+            return {'comando' : pedido['comando'], 'erro' : 'Funcionalidade não existe.'}
+
+        try:
+            return {'comando' : pedido['comando'], **comando(pedido, sugerir)}
+        except ImportError:
+            return {'comando' : pedido['comando'],
+                    'erro' : 'As dependencias de analise não estão instaladas. Execute: pip install .[analise]'}
+
+    def _ler_pedido(self, linha : str) -> dict:
+        """
+        Converte uma linha de consulta no pedido, com o comando e o
+        nome ou código procurado.
+
+        :raises ValueError: Se a linha for um JSON invalido ou com campos que não são texto.
+        """
+        if linha.startswith('{'):
+            try:
+                pedido = self._decodificador.decode(linha)
+            except json.JSONDecodeError as erro:
+                raise ValueError(f'JSON invalido: {erro}') from None
+            if not isinstance(pedido, dict):
+                raise ValueError('A consulta em JSON deve ser um objeto.')
+            for campo in ('comando', 'nome', 'codigo'):
+                if campo in pedido and not isinstance(pedido[campo], str):
+                    raise ValueError(f'O campo {campo} da consulta deve ser um texto.')
+            pedido['comando'] = pedido.get('comando', '').lower()
+            return pedido
+
+        comando, _, argumento = linha.partition(' ')
+        comando = comando.lower()
+        argumento = argumento.strip()
+        if comando == 'ddd':
+            tipo, _, valor = argumento.partition(' ')
+            return {'comando' : comando, 'codigo' if tipo == 'cod' else 'nome' : valor.strip()}
+        if argumento:
+            return {'comando' : comando, 'nome' : argumento}
+        return {'comando' : comando}
+
+    def _sem_argumentos(self, pedido : dict, registros : Iterable) -> dict:
+        if 'nome' in pedido:
+            return {'erro' : 'Essa funcionalidade não recebe argumentos no modo em lote.'}
+        return {'resultados' : [registro.para_dicionario() for registro in registros]}
+
+    def _nao_encontrado(self, consulta : str, sugestoes : Callable[[str], list], sugerir : bool) -> dict:
+        resultado = {'consulta' : consulta, 'encontrado' : False, 'resultados' : []}
+        if sugerir:
+            resultado['sugestoes'] = sugestoes(consulta)
+        return resultado
+
+    def _lc(self, pedido : dict, sugerir : bool = True) -> dict:
+        return self._sem_argumentos(pedido, self._usp.iterar_unidades())
+
+    def _ddtc(self, pedido : dict, sugerir : bool = True) -> dict:
+        return self._sem_argumentos(pedido, self._usp.iterar_cursos())
+
+    def _ddmc(self, pedido : dict, sugerir : bool = True) -> dict:
+        return self._sem_argumentos(pedido, self._usp.iterar_disciplinas_compartilhadas())
+
+    def _ddc(self, pedido : dict, sugerir : bool = True) -> dict:
+        nome = pedido.get('nome')
+        if not nome:
+            return {'erro' : 'É necessário de um curso para buscar os seus dados.'}
+
+        cursos = self._usp.buscar_cursos(nome)
+        if cursos:
+            return {'consulta' : nome, 'encontrado' : True, 'resultados' : [curso.para_dicionario() for curso in cursos]}
+        return self._nao_encontrado(nome, self._sugerir_cursos, sugerir)
+
+    def _ddd(self, pedido : dict, sugerir : bool = True) -> dict:
+        codigo = pedido.get('codigo')
+        if codigo:
+            disciplina = self._usp.buscar_disciplina(codigo)
+            if disciplina is not None:
+                return {'consulta' : codigo, 'encontrado' : True, 'resultados' : [disciplina.para_dicionario()]}
+            return self._nao_encontrado(codigo, self._sugerir_codigos, sugerir)
+
+        nome = pedido.get('nome')
+        if not nome:
+            return {'erro' : 'É necessário do código ou do nome da disciplina para buscar os seus dados.'}
+
+        disciplinas = self._usp.buscar_disciplinas_por_nome(nome)
+        if disciplinas:
+            return {'consulta' : nome, 'encontrado' : True,
+                    'resultados' : [disciplina.para_dicionario() for disciplina in disciplinas]}
+        return self._nao_encontrado(nome, self._sugerir_disciplinas, sugerir)
+
+    def _cs(self, pedido : dict, sugerir : bool = True) -> dict:
+        nome = pedido.get('nome')
+        if not nome:
+            return {'erro' : 'É necessário de um curso para buscar os cursos similares.'}
+
+        cursos = self._usp.buscar_cursos(nome)
+        if not cursos:
+            return self._nao_encontrado(nome, self._sugerir_cursos, sugerir)
+
+        matriz = self._usp.matriz()
+        return {'consulta' : nome, 'encontrado' : True, 'resultados' : [
+            {'curso' : curso.get_curso(), 'similares' : [
+                {'curso' : similar, 'similaridade' : similaridade, 'em_comum' : em_comum}
+                for similar, similaridade, em_comum in matriz.mais_similares(curso.get_curso())]}
+            for curso in cursos]}
@@ -0,0 +1,210 @@
+import numpy as np
+import scipy.sparse as sp
+
+from .CursoUsp import CursoUsp
+from .DisciplinaUsp import DisciplinaUsp
+from .UnidadeUsp import UnidadeUsp
+from .RegistroUsp import RegistrosUsp
+
+OBRIGATORIAS = 'obrigatórias'
+LIVRES       = 'livres'
+ELETIVAS     = 'eletivas'
+MODALIDADES  = (OBRIGATORIAS, LIVRES, ELETIVAS)
+
+class MatrizUsp:
+    """
+    A classe MatrizUsp representa os dados scrapados como uma matriz
+    esparsa de incidencia cursos x disciplinas, uma para cada modalidade.
+    As consultas de sobreposição entre grades são feitas com produtos
+    de matrizes esparsas ao invés de laços sobre os dicionarios.
+    """
+
+    cursos      : list[str]
+    disciplinas : list[str]
+    unidades    : list[str]
+    modalidades : dict[str, sp.csr_array]
+
+    def __init__(self, cursos : dict[str, CursoUsp], disciplinas : dict[str, DisciplinaUsp],
+                 unidades : list[UnidadeUsp], registros : RegistrosUsp) -> None:
+        """
+        :param cursos: Dicionario dos cursos, indexado pelo nome do curso.
+        :type cursos: dict[str, CursoUsp]
+        :param disciplinas: Dicionario das disciplinas, indexado pelo código.
+        :type disciplinas: dict[str, DisciplinaUsp]
+        :param unidades: Unidades scrapadas.
+        :type unidades: list[UnidadeUsp]
+        :param registros: Registros dos nomes utilizados pelos cursos e disciplinas.
+        :type registros: RegistrosUsp
+        """
+        self.cursos = list(cursos)
+        self.disciplinas = list(disciplinas)
+        self.unidades = [unidade.get_nome() for unidade in unidades]
+        self._linhas = {curso : linha for linha, curso in enumerate(self.cursos)}
+
+        # Tabela do identificador do código (registro de códigos dos dados) para a coluna da disciplina
+        identificadores = [registros.codigos.id(codigo) for codigo in self.disciplinas]
+        colunas = np.full(len(registros.codigos.nomes), -1, dtype=np.int64)
+        colunas[identificadores] = np.arange(len(self.disciplinas))
+
+        grades = {
+            OBRIGATORIAS : [curso.disciplinas_obrigatorias for curso in cursos.values()],
+            LIVRES       : [curso.disciplinas_opt_livre for curso in cursos.values()],
+            ELETIVAS     : [curso.disciplinas_opt_eletivas for curso in cursos.values()],
+        }
+        self.modalidades = {modalidade : self._construir(colunas, grade) for modalidade, grade in grades.items()}
+
+        indices_unidade = {unidade : indice for indice, unidade in enumerate(self.unidades)}
+        self._unidade_do_curso = np.array([indices_unidade.get(curso.get_unidade(), -1) for curso in cursos.values()],
+                                          dtype=np.int64)
+
+    def _construir(self, colunas : np.ndarray, grade : list) -> sp.csr_array:
+        """
+        Constroi a matriz de uma modalidade a partir dos arrays de
+        identificadores das disciplinas de cada curso.
+        """
+        tamanhos = np.fromiter((len(disciplinas) for disciplinas in grade), dtype=np.int64, count=len(grade))
+        identificadores = np.concatenate([np.frombuffer(disciplinas, dtype=np.uint32) for disciplinas in grade]
+                                         + [np.empty(0, dtype=np.uint32)]).astype(np.int64)
+        linhas = np.repeat(np.arange(len(grade)), tamanhos)
+        colunas_da_grade = colunas[identificadores] if len(identificadores) else identificadores
+
+        # Disciplinas de uma grade que não estão no dicionario de disciplinas são ignoradas
+        conhecidas = colunas_da_grade >= 0
+        matriz = sp.coo_array((np.ones(int(conhecidas.sum()), dtype=np.int32),
+                               (linhas[conhecidas], colunas_da_grade[conhecidas])),
+                              shape=(len(grade), len(self.disciplinas)))
+        return matriz.tocsr()
+
+    def binaria(self, modalidades : tuple[str, ...] = MODALIDADES) -> sp.csr_array:
+        """
+        Pega a matriz de incidencia cursos x disciplinas das modalidades
+        escolhidas, com 1 quando a disciplina faz parte da grade do curso.
+
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: A matriz de incidencia.
+        :rtype: sp.csr_array
+        """
+        matriz = sum((self.modalidades[modalidade] for modalidade in modalidades),
+                     sp.csr_array((len(self.cursos), len(self.disciplinas)), dtype=np.int32))
+        matriz.data = np.minimum(matriz.data, 1)
+        return matriz
+
+    def cursos_por_disciplina(self, modalidades : tuple[str, ...] = MODALIDADES) -> dict[str, int]:
+        """
+        Conta em quantos cursos cada disciplina aparece.
+
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: Dicionario do código da disciplina para a quantidade de cursos,
+            apenas das disciplinas que aparecem em mais de um curso.
+        :rtype: dict[str, int]
+        """
+        contagem = self.binaria(modalidades).sum(axis=0)
+        return {self.disciplinas[coluna] : int(contagem[coluna]) for coluna in np.flatnonzero(contagem > 1)}
+
+    def compartilhadas(self, modalidades : tuple[str, ...] = MODALIDADES) -> sp.csr_array:
+        """
+        Calcula a quantidade de disciplinas que cada par de cursos tem em comum.
+
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: Matriz cursos x cursos com a quantidade de disciplinas em comum.
+        :rtype: sp.csr_array
+        """
+        binaria = self.binaria(modalidades)
+        return (binaria @ binaria.T).tocsr()
+
+    def jaccard(self, modalidades : tuple[str, ...] = MODALIDADES) -> sp.csr_array:
+        """
+        Calcula a similaridade de Jaccard entre as grades de cada par
+        de cursos. Pares sem disciplinas em comum não são guardados.
+
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: Matriz cursos x cursos com a similaridade, entre 0 e 1.
+        :rtype: sp.csr_array
+        """
+        compartilhadas = self.compartilhadas(modalidades).tocoo()
+        tamanhos = compartilhadas.diagonal()
+        uniao = tamanhos[compartilhadas.row] + tamanhos[compartilhadas.col] - compartilhadas.data
+        return sp.csr_array((compartilhadas.data / uniao, (compartilhadas.row, compartilhadas.col)),
+                            shape=compartilhadas.shape)
+
+    def mais_similares(self, curso : str, k : int = 5,
+                       modalidades : tuple[str, ...] = MODALIDADES) -> list[tuple[str, float, int]]:
+        """
+        Busca os k cursos com a grade mais parecida com a de um curso.
+
+        :param curso: Nome do curso.
+        :type curso: str
+        :param k: Quantidade de cursos.
+        :type k: int
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: Tuplas (curso, similaridade de Jaccard, disciplinas em comum),
+            da mais parecida para a menos parecida.
+        :rtype: list[tuple[str, float, int]]
+        """
+        binaria = self.binaria(modalidades)
+        linha = self._linhas[curso]
+
+        compartilhadas = (binaria @ binaria[[linha]].T).toarray().ravel()
+        tamanhos = np.asarray(binaria.sum(axis=1)).ravel()
+        uniao = tamanhos + tamanhos[linha] - compartilhadas
+        similaridades = np.divide(compartilhadas, uniao, out=np.zeros(len(self.cursos)), where=uniao > 0)
+        similaridades[linha] = -1
+
+        candidatos = np.flatnonzero(compartilhadas > 0)
+        candidatos = candidatos[candidatos != linha]
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-similaridades[candidatos], k - 1)[:k]]
+        candidatos = candidatos[np.lexsort((candidatos, -similaridades[candidatos]))]
+
+        return [(self.cursos[candidato], float(similaridades[candidato]), int(compartilhadas[candidato]))
+                for candidato in candidatos]
+
+    def pares_mais_similares(self, k : int = 10,
+                             modalidades : tuple[str, ...] = MODALIDADES) -> list[tuple[str, str, float, int]]:
+        """
+        Busca os k pares de cursos diferentes com as grades mais parecidas.
+
+        :param k: Quantidade de pares.
+        :type k: int
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: Tuplas (curso, curso, similaridade de Jaccard, disciplinas em comum),
+            do par mais parecido para o menos parecido.
+        :rtype: list[tuple[str, str, float, int]]
+        """
+        jaccard = sp.triu(self.jaccard(modalidades), k=1).tocoo()
+        compartilhadas = self.compartilhadas(modalidades)
+
+        melhores = np.arange(len(jaccard.data))
+        if len(melhores) > k:
+            melhores = np.argpartition(-jaccard.data, k - 1)[:k]
+        melhores = melhores[np.lexsort((melhores, -jaccard.data[melhores]))]
+
+        return [(self.cursos[jaccard.row[i]], self.cursos[jaccard.col[i]], float(jaccard.data[i]),
+                 int(compartilhadas[jaccard.row[i], jaccard.col[i]])) for i in melhores]
+
+    def sobreposicao_por_unidade(self, modalidades : tuple[str, ...] = MODALIDADES) -> sp.csr_array:
+        """
+        Calcula a quantidade de disciplinas distintas que cada par de
+        unidades tem em comum nas grades dos seus cursos.
+
+        :param modalidades: Modalidades consideradas.
+        :type modalidades: tuple[str, ...]
+        :return: Matriz unidades x unidades, na ordem de self.unidades, com a
+            quantidade de disciplinas em comum. A diagonal é a quantidade de
+            disciplinas distintas de cada unidade.
+        :rtype: sp.csr_array
+        """
+        com_unidade = np.flatnonzero(self._unidade_do_curso >= 0)
+        cursos_da_unidade = sp.csr_array((np.ones(len(com_unidade), dtype=np.int32),
+                                          (self._unidade_do_curso[com_unidade], com_unidade)),
+                                         shape=(len(self.unidades), len(self.cursos)))
+
+        disciplinas_da_unidade = (cursos_da_unidade @ self.binaria(modalidades)).tocsr()
+        disciplinas_da_unidade.data = np.minimum(disciplinas_da_unidade.data, 1)
+        return (disciplinas_da_unidade @ disciplinas_da_unidade.T).tocsr()
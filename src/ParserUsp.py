@@ -0,0 +1,108 @@
+import json
+
+import lxml.etree
+import lxml.html
+
+# Valores de um curso: (duração ideal, duração minima, duração maxima)
+Duracoes = tuple[str, str, str]
+# Valores de uma disciplina: (código, nome, créditos aula, créditos trabalho, CH, CE, CP, ATPA)
+ValoresDisciplina = tuple[str, str, str, str, str, str, str, str]
+
+_CLASSES_DURACAO = ('duridlhab', 'durminhab', 'durmaxhab')
+
+# Erros que o parse de uma página ou de um JSON fora do formato esperado levanta.
+# Tentar novamente não adianta, já que o conteudo do curso é o mesmo
+ERROS_DE_PARSE = (ValueError, TypeError, IndexError, KeyError, AttributeError, lxml.etree.LxmlError)
+
+def _classes(elemento) -> list[str]:
+    return (elemento.get('class') or '').split()
+
+def _modalidade(tabela, cache : dict) -> str:
+    """
+    Pega o texto da primeira célula da primeira linha da tabela, que é
+    o cabeçalho da modalidade (obrigatórias, optativas livres ou eletivas).
+    """
+    modalidade = cache.get(tabela)
+    if modalidade is None:
+        linha = next(tabela.iter('tr'), None)
+        celula = next(linha.iter('td'), None) if linha is not None else None
+        modalidade = celula.text_content() if celula is not None else ''
+        cache[tabela] = modalidade
+    return modalidade
+
+def extrair_curso(html : str) -> tuple[Duracoes | None, list[tuple[str, ValoresDisciplina]]]:
+    """
+    Extrai as durações e as disciplinas de um curso a partir do html
+    da aba do curso (#step4). Apenas a subárvore do #step4 é percorrida,
+    uma única vez, em ordem de documento.
+
+    :param html: Html contendo o #step4, ou apenas o seu conteudo.
+    :type html: str
+    :return: As durações do curso, ou None caso a aba não tenha a tabela de
+        informações, e uma lista de tuplas (modalidade, valores) com cada
+        disciplina na ordem em que aparece na página.
+    :rtype: tuple[Duracoes | None, list[tuple[str, ValoresDisciplina]]]
+    """
+    raiz = lxml.html.fromstring(html)
+    step4 = raiz if raiz.get('id') == 'step4' else next(iter(raiz.xpath('//*[@id="step4"]')), raiz)
+
+    # Assim como no site, um curso sem tabelas é um curso cujas informações não foram encontradas
+    if next(step4.iter('table'), None) is None:
+        return None, []
+
+    duracoes : dict[str, str] = {}
+    disciplinas : list[tuple[str, ValoresDisciplina]] = []
+    modalidades : dict = {}
+
+    for elemento in step4.iter(lxml.etree.Element):
+        classes = _classes(elemento)
+        if not classes:
+            continue
+
+        if 'disciplina' in classes:
+            linha = elemento.getparent().getparent()
+            celulas = [celula.text_content() for celula in linha.iterchildren('td')]
+            celulas[0] = elemento.text_content()
+            celulas += [''] * (8 - len(celulas))
+            disciplinas.append((_modalidade(linha.getparent(), modalidades), tuple(celulas[:8])))
+
+        elif elemento.tag == 'span':
+            for classe in _CLASSES_DURACAO:
+                if classe in classes and classe not in duracoes:
+                    duracoes[classe] = elemento.text_content()
+
+    return tuple(duracoes.get(classe, '') for classe in _CLASSES_DURACAO), disciplinas
+
+def ler_curso_extraido(extraido : str) -> tuple[Duracoes | None, list[tuple[str, ValoresDisciplina]]]:
+    """
+    Lê o JSON devolvido pelo script de extração no navegador
+    (EnsinoUsp.SCRIPT_EXTRAIR_CURSO), no mesmo formato do extrair_curso.
+
+    :param extraido: JSON no formato {"d": [ideal, minima, maxima], "r": [[modalidade, código, ...], ...]}
+        ou null caso a aba não tenha as tabelas do curso.
+    :type extraido: str
+    :return: As durações do curso, ou None, e uma lista de tuplas (modalidade, valores)
+        com cada disciplina na ordem em que aparece na página.
+    :rtype: tuple[Duracoes | None, list[tuple[str, ValoresDisciplina]]]
+    """
+    dados = json.loads(extraido)
+    if dados is None:
+        return None, []
+    return tuple(dados['d']), [(linha[0], tuple(linha[1:])) for linha in dados['r']]
+
+def extrair_unidades(html : str) -> list[tuple[str, str]]:
+    """
+    Extrai o código e o nome das unidades do seletor de unidades
+    (#comboUnidade) da página de carreiras. A opção vazia do seletor
+    ("Selecione") é ignorada.
+
+    :param html: Html da página de carreiras.
+    :type html: str
+    :return: Lista de tuplas (código, nome) de cada unidade.
+    :rtype: list[tuple[str, str]]
+    """
+    seletor = lxml.html.fromstring(html).find('.//*[@id="comboUnidade"]')
+    if seletor is None:
+        return []
+    return [(opcao.get('value'), opcao.text_content()) for opcao in seletor.iterchildren('option')
+            if opcao.get('value') != '']
@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+class RastreamentoUsp:
+    """
+    A classe RastreamentoUsp registra quanto tempo cada unidade, cada
+    curso e cada fase do scrape (cliques, esperas, transferencia do html,
+    parse e construção) levaram, e conta eventos como os popups de erro
+    e os cliques interceptados. O registro pode ser exportado no formato
+    de trace do Chrome, que abre no Perfetto (ui.perfetto.dev) ou no
+    chrome://tracing, e resumido em uma tabela no final do scrape.
+    """
+
+    # Categorias dos intervalos. Apenas as fases entram na tabela de fases
+    UNIDADE = 'unidade'
+    CURSO   = 'curso'
+    FASE    = 'fase'
+
+    contadores : dict[str, int]
+    medidas    : dict[str, list[float]]
+
+    def __init__(self) -> None:
+        self._inicio = time.perf_counter_ns()
+        self._trava = threading.Lock()
+        self._eventos : list[dict] = []
+        self._trilhas : dict[str, int] = {}
+        self.contadores = {}
+        self.medidas = {}
+
+    def _trilha(self, trilha : str | None) -> int:
+        # Deve ser chamada com a trava
+        nome = trilha if trilha is not None else threading.current_thread().name
+        identificador = self._trilhas.get(nome)
+        if identificador is None:
+            identificador = self._trilhas[nome] = len(self._trilhas) + 1
+        return identificador
+
+    @contextmanager
+    def intervalo(self, nome : str, categoria : str = FASE, trilha : str | None = None,
+                  **argumentos) -> Iterator[None]:
+        """
+        Registra o tempo do bloco with como um intervalo.
+
+        :param nome: Nome do intervalo, ex: o nome da fase.
+        :type nome: str
+        :param categoria: UNIDADE, CURSO ou FASE.
+        :type categoria: str
+        :param trilha: Trilha em que o intervalo aparece no trace. Por padrão a
+            thread atual. Código assíncrono, em que varias tarefas dividem a mesma
+            thread, deve passar uma trilha por tarefa para os intervalos não se cruzarem.
+        :type trilha: str | None
+        :param argumentos: Valores guardados com o intervalo, ex: o nome do curso.
+        """
+        inicio = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            fim = time.perf_counter_ns()
+            with self._trava:
+                self._eventos.append({
+                    'name' : nome, 'cat' : categoria, 'ph' : 'X', 'pid' : 1, 'tid' : self._trilha(trilha),
+                    'ts' : (inicio - self._inicio) / 1000, 'dur' : (fim - inicio) / 1000, 'args' : argumentos,
+                })
+
+    def contar(self, nome : str, quantidade : int = 1) -> None:
+        """
+        Soma uma quantidade a um contador. Cada mudança do contador também
+        é registrada no trace, para que seja possivel ver quando aconteceu.
+
+        :param nome: Nome do contador.
+        :type nome: str
+        :param quantidade: Quantidade somada.
+        :type quantidade: int
+        """
+        agora = time.perf_counter_ns()
+        with self._trava:
+            total = self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+            self._eventos.append({'name' : nome, 'ph' : 'C', 'pid' : 1, 'ts' : (agora - self._inicio) / 1000,
+                                  'args' : {nome : total}})
+
+    def medir(self, nome : str, valor : float) -> None:
+        """
+        Registra o valor atual de uma medida, como a concorrência das buscas.
+        Ao contrario dos contadores o valor não é somado, e o resumo mostra
+        o ultimo, o menor e o maior valor.
+
+        :param nome: Nome da medida.
+        :type nome: str
+        :param valor: Valor atual.
+        :type valor: float
+        """
+        agora = time.perf_counter_ns()
+        with self._trava:
+            ultimo_menor_maior = self.medidas.get(nome)
+            if ultimo_menor_maior is None:
+                self.medidas[nome] = [valor, valor, valor]
+            else:
+                ultimo_menor_maior[0] = valor
+                ultimo_menor_maior[1] = min(ultimo_menor_maior[1], valor)
+                ultimo_menor_maior[2] = max(ultimo_menor_maior[2], valor)
+            self._eventos.append({'name' : nome, 'ph' : 'C', 'pid' : 1, 'ts' : (agora - self._inicio) / 1000,
+                                  'args' : {nome : valor}})
+
+    def exportar_chrome(self, caminho : str) -> None:
+        """
+        Escreve os intervalos e contadores no formato de trace do Chrome (JSON).
+
+        :param caminho: Caminho do arquivo do trace.
+        :type caminho: str
+        """
+        with self._trava:
+            eventos = [{'name' : 'process_name', 'ph' : 'M', 'pid' : 1, 'args' : {'name' : 'scrape-usp'}}]
+            eventos += [{'name' : 'thread_name', 'ph' : 'M', 'pid' : 1, 'tid' : identificador, 'args' : {'name' : nome}}
+                        for nome, identificador in self._trilhas.items()]
+            eventos += self._eventos
+            contadores = dict(self.contadores)
+            medidas = {nome : valores[0] for nome, valores in self.medidas.items()}
+
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump({'traceEvents' : eventos, 'displayTimeUnit' : 'ms', 'otherData' : {'contadores' : contadores, 'medidas' : medidas}},
+                      arquivo, ensure_ascii=False)
+
+    def _duracoes(self, categoria : str) -> list[dict]:
+        with self._trava:
+            return [evento for evento in self._eventos if evento['ph'] == 'X' and evento['cat'] == categoria]
+
+    def resumo(self, mais_lentos : int = 5) -> str:
+        """
+        Retorna uma tabela com o tempo total, medio, p95 e maximo de cada
+        fase, as unidades e os cursos mais lentos, os contadores e as medidas.
+
+        :param mais_lentos: Quantidade de unidades e de cursos mais lentos listados.
+        :type mais_lentos: int
+        :return: A tabela legivel.
+        :rtype: str
+        """
+        fases : dict[str, list[float]] = {}
+        for evento in self._duracoes(self.FASE):
+            fases.setdefault(evento['name'], []).append(evento['dur'] / 1000)
+
+        linhas = ['Tempo das fases do scrape:',
+                  f'{"fase":<24}{"quantidade":>12}{"total (s)":>12}{"media (ms)":>12}{"p95 (ms)":>12}{"max (ms)":>12}']
+        for fase, duracoes in sorted(fases.items(), key=lambda item : -sum(item[1])):
+            duracoes.sort()
+            linhas.append(f'{fase:<24}{len(duracoes):>12}{sum(duracoes) / 1000:>12.2f}'
+                          f'{sum(duracoes) / len(duracoes):>12.1f}{duracoes[int(len(duracoes) * 0.95)]:>12.1f}'
+                          f'{duracoes[-1]:>12.1f}')
+
+        for categoria, titulo in ((self.UNIDADE, 'Unidades mais lentas:'), (self.CURSO, 'Cursos mais lentos:')):
+            eventos = sorted(self._duracoes(categoria), key=lambda evento : -evento['dur'])[:mais_lentos]
+            if eventos:
+                linhas.append(titulo)
+                linhas += [f'{evento["dur"] / 1e6:>10.2f}s  {evento["args"].get(categoria, evento["name"])}'
+                           for evento in eventos]
+
+        with self._trava:
+            if self.contadores:
+                linhas.append('Contadores: ' + ', '.join(f'{nome}: {total}' for nome, total in sorted(self.contadores.items())))
+            for nome, (ultimo, menor, maior) in sorted(self.medidas.items()):
+                linhas.append(f'{nome.capitalize()}: ultima {ultimo:g}, menor {menor:g}, maior {maior:g}')
+        return '\n'.join(linhas) + '\n'
@@ -0,0 +1,107 @@
+from threading import Lock
+
+# Valor guardado no lugar dos campos numericos vazios, que são exibidos como "N/A"
+NA = -1
+
+def para_inteiro(valor : str) -> int:
+    """
+    Converte o texto de um campo numerico para inteiro.
+
+    :param valor: Texto do campo, podendo ser vazio ou "N/A".
+    :type valor: str
+    :return: O inteiro, ou NA caso o campo não tenha um número.
+    :rtype: int
+    """
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return NA
+
+def de_inteiro(valor : int) -> int | str:
+    """
+    Converte um campo numerico guardado de volta para o valor exibido.
+
+    :param valor: Valor guardado pelo para_inteiro.
+    :type valor: int
+    :return: O inteiro, ou "N/A" caso o campo não tenha um número.
+    :rtype: int | str
+    """
+    return "N/A" if valor == NA else valor
+
+def de_inteiro_str(valor : int) -> str:
+    """
+    Converte um campo numerico guardado para o texto salvo em disco.
+
+    :param valor: Valor guardado pelo para_inteiro.
+    :type valor: int
+    :return: O número como texto, ou "N/A" caso o campo não tenha um número.
+    :rtype: str
+    """
+    return "N/A" if valor == NA else str(valor)
+
+class RegistroUsp:
+    """
+    A classe RegistroUsp associa cada nome a um identificador inteiro.
+    Os modelos guardam apenas os identificadores, assim um nome que
+    aparece em milhares de disciplinas é guardado uma única vez.
+    """
+
+    __slots__ = ('nomes', '_ids', '_trava')
+
+    nomes : list[str]
+
+    def __init__(self) -> None:
+        self.nomes = []
+        self._ids : dict[str, int] = {}
+        self._trava = Lock()
+
+    def id(self, nome : str) -> int:
+        """
+        Pega o identificador de um nome, registrando o nome caso ele ainda
+        não exista. Pode ser chamada por varios navegadores ao mesmo tempo.
+
+        :param nome: O nome.
+        :type nome: str
+        :return: O identificador do nome.
+        :rtype: int
+        """
+        identificador = self._ids.get(nome)
+        if identificador is None:
+            with self._trava:
+                identificador = self._ids.get(nome)
+                if identificador is None:
+                    identificador = len(self.nomes)
+                    self.nomes.append(nome)
+                    self._ids[nome] = identificador
+        return identificador
+
+    def nome(self, identificador : int) -> str:
+        """
+        Pega o nome de um identificador.
+
+        :param identificador: O identificador.
+        :type identificador: int
+        :return: O nome registrado com esse identificador.
+        :rtype: str
+        """
+        return self.nomes[identificador]
+
+class RegistrosUsp:
+    """
+    A classe RegistrosUsp agrupa os registros dos nomes dos cursos, das
+    unidades e dos códigos das disciplinas de um conjunto de dados. Cada
+    EnsinoUsp tem os seus registros, que são passados para os modelos que
+    ele cria, assim os registros crescem apenas com os nomes desses dados
+    e são liberados junto com eles quando os dados são recarregados.
+    """
+
+    __slots__ = ('cursos', 'unidades', 'codigos')
+
+    cursos   : RegistroUsp
+    unidades : RegistroUsp
+    codigos  : RegistroUsp
+
+    def __init__(self) -> None:
+        self.cursos = RegistroUsp()
+        self.unidades = RegistroUsp()
+        self.codigos = RegistroUsp()
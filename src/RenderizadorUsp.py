@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import sys
+
+from .CursoUsp import CursoUsp
+from .DisciplinaUsp import DisciplinaUsp
+from .UnidadeUsp import UnidadeUsp
+
+class EscritorUsp:
+    """
+    A classe EscritorUsp escreve unidades, cursos e disciplinas em um
+    único fluxo com buffer, no stdout ou em um arquivo. Cada formato de
+    saida é uma subclasse que implementa como cada registro é escrito.
+    Deve ser utilizada com with, para que o buffer seja esvaziado no final.
+    """
+
+    TAMANHO_DO_BUFFER = 1 << 20
+
+    def __init__(self, arquivo : str | None = None) -> None:
+        """
+        :param arquivo: Caminho do arquivo de saida. Caso seja None a saida é o stdout.
+        :type arquivo: str | None
+        """
+        if arquivo is not None:
+            self._saida = open(arquivo, 'w', encoding='utf-8', newline='', buffering=self.TAMANHO_DO_BUFFER)
+            return
+
+        # O que já foi imprimido precisa sair antes do que for escrito aqui
+        sys.stdout.flush()
+        try:
+            self._saida = open(sys.stdout.fileno(), 'w', encoding=sys.stdout.encoding, newline='',
+                               buffering=self.TAMANHO_DO_BUFFER, closefd=False)
+        except (AttributeError, io.UnsupportedOperation):
+            # O stdout foi trocado por um objeto sem descritor de arquivo
+            self._saida = sys.stdout
+
+    def __enter__(self) -> 'EscritorUsp':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        """
+        Esvazia o buffer e fecha a saida, caso ela não seja o stdout.
+        """
+        if self._saida is sys.stdout:
+            self._saida.flush()
+        else:
+            self._saida.close()
+
+    def unidade(self, unidade : UnidadeUsp) -> None:
+        raise NotImplementedError
+
+    def curso(self, curso : CursoUsp) -> None:
+        raise NotImplementedError
+
+    def disciplina(self, disciplina : DisciplinaUsp) -> None:
+        raise NotImplementedError
+
+class EscritorTexto(EscritorUsp):
+    """
+    Escreve os registros no mesmo formato legivel do shell, igual
+    ao de um print de cada registro.
+    """
+
+    def _escrever(self, registro) -> None:
+        # Juntar os pedaços de um registro e fazer uma escrita é mais rapido que
+        # uma escrita por pedaço, e o registro inteiro é pequeno
+        self._saida.write(''.join(registro.partes_do_texto()))
+        self._saida.write('\n')
+
+    def unidade(self, unidade : UnidadeUsp) -> None:
+        self._escrever(unidade)
+
+    def curso(self, curso : CursoUsp) -> None:
+        self._escrever(curso)
+
+    def disciplina(self, disciplina : DisciplinaUsp) -> None:
+        self._escrever(disciplina)
+
+class EscritorJsonl(EscritorUsp):
+    """
+    Escreve cada registro como um objeto JSON em uma linha.
+    """
+
+    def __init__(self, arquivo : str | None = None) -> None:
+        super().__init__(arquivo)
+        self._codificador = json.JSONEncoder(ensure_ascii=False)
+
+    def _escrever(self, registro) -> None:
+        self._saida.write(self._codificador.encode(registro.para_dicionario()))
+        self._saida.write('\n')
+
+    def unidade(self, unidade : UnidadeUsp) -> None:
+        self._escrever(unidade)
+
+    def curso(self, curso : CursoUsp) -> None:
+        self._escrever(curso)
+
+    def disciplina(self, disciplina : DisciplinaUsp) -> None:
+        self._escrever(disciplina)
+
+class EscritorCsv(EscritorUsp):
+    """
+    Escreve cada registro como uma linha CSV. O cabeçalho é escrito
+    antes do primeiro registro de cada tipo e as listas (cursos e
+    disciplinas) são juntadas com SEPARADOR_DE_LISTA.
+    """
+
+    SEPARADOR_DE_LISTA = ';'
+
+    def __init__(self, arquivo : str | None = None) -> None:
+        super().__init__(arquivo)
+        self._csv = csv.writer(self._saida)
+        self._tipo = None
+
+    def _escrever(self, tipo : str, registro) -> None:
+        valores = registro.para_dicionario()
+        if tipo != self._tipo:
+            self._tipo = tipo
+            self._csv.writerow(valores.keys())
+
+        self._csv.writerow(self.SEPARADOR_DE_LISTA.join(valor) if isinstance(valor, list) else valor
+                           for valor in valores.values())
+
+    def unidade(self, unidade : UnidadeUsp) -> None:
+        self._escrever('unidade', unidade)
+
+    def curso(self, curso : CursoUsp) -> None:
+        self._escrever('curso', curso)
+
+    def disciplina(self, disciplina : DisciplinaUsp) -> None:
+        self._escrever('disciplina', disciplina)
+
+ESCRITORES = {
+    'texto' : EscritorTexto,
+    'jsonl' : EscritorJsonl,
+    'csv'   : EscritorCsv,
+}
+
+def abrir_escritor(formato : str = 'texto', arquivo : str | None = None) -> EscritorUsp:
+    """
+    Cria o escritor de um formato de saida.
+
+    :param formato: Formato da saida: texto, jsonl ou csv.
+    :type formato: str
+    :param arquivo: Caminho do arquivo de saida. Caso seja None a saida é o stdout.
+    :type arquivo: str | None
+    :return: O escritor, que deve ser utilizado com with.
+    :rtype: EscritorUsp
+    :raises ValueError: Se o formato não existir.
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f'Formato {formato} não existe. Os formatos são: {", ".join(ESCRITORES)}.')
+    return ESCRITORES[formato](arquivo)
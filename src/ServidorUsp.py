@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+import time
+import traceback
+from collections import OrderedDict
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+from .LoteUsp import LoteUsp
+
+STATUS = {
+    200 : 'OK',
+    400 : 'Bad Request',
+    404 : 'Not Found',
+    405 : 'Method Not Allowed',
+    413 : 'Payload Too Large',
+    500 : 'Internal Server Error',
+}
+
+# Resposta de uma rota: status HTTP e o corpo JSON já codificado
+Resposta = tuple[int, bytes]
+
+class _Dados:
+    """
+    Um conjunto de dados carregado e tudo que depende dele: as consultas
+    e o cache das respostas. É trocado inteiro quando os dados são
+    recarregados, então uma requisição nunca mistura dados de duas cargas.
+    """
+
+    def __init__(self, usp, versao : int, assinatura : tuple | None) -> None:
+        self.usp = usp
+        self.lote = LoteUsp(usp)
+        self.versao = versao
+        self.assinatura = assinatura
+        self.carregado_em = time.time()
+        self.cache : OrderedDict[str, Resposta] = OrderedDict()
+        # Consultas em andamento nas threads, esperadas antes dos dados serem fechados
+        self.pendentes : set[asyncio.Future] = set()
+
+class ServidorUsp:
+    """
+    A classe ServidorUsp é um servidor HTTP/JSON, feito com asyncio, que
+    responde as consultas sobre um conjunto de dados carregado uma vez.
+    As respostas das consultas são guardadas já codificadas em um cache,
+    e os dados podem ser recarregados, sem parar o servidor, quando o
+    arquivo de origem muda ou com um POST em /recarregar. As consultas
+    lentas, como as sugestões e as disciplinas compartilhadas, são
+    feitas em threads, então elas não atrasam as respostas das outras
+    conexões.
+
+    Rotas:
+        GET  /cursos?nome=NOME                 dados do curso
+        GET  /disciplinas?codigo=CODIGO        dados da disciplina pelo código
+        GET  /disciplinas?nome=NOME            disciplinas com o nome
+        GET  /disciplinas/compartilhadas       disciplinas em mais de um curso
+        GET  /sugestoes/cursos?nome=NOME       nomes de cursos próximos
+        GET  /sugestoes/disciplinas?nome=NOME  nomes de disciplinas próximos
+        GET  /sugestoes/codigos?codigo=CODIGO  códigos de disciplinas próximos
+        GET  /saude                            versão e horario da carga dos dados
+        POST /recarregar                       recarrega os dados
+    """
+
+    TAMANHO_DO_CACHE = 65536
+    TAMANHO_MAXIMO_DO_CORPO = 1 << 16
+
+    def __init__(self, carregar : Callable, caminho : str | None = None, intervalo : float = 5.0) -> None:
+        """
+        :param carregar: Função que carrega os dados e retorna o EnsinoUsp (ou BancoUsp).
+        :type carregar: Callable[[], EnsinoUsp]
+        :param caminho: Arquivo de origem dos dados. Quando ele muda os dados são
+            recarregados. Caso seja None os dados só são recarregados pelo /recarregar.
+        :type caminho: str | None
+        :param intervalo: Intervalo, em segundos, entre as checagens do arquivo de origem.
+        :type intervalo: float
+        """
+        self._carregar = carregar
+        self._caminho = caminho
+        self._intervalo = intervalo
+        self._trava_da_recarga = asyncio.Lock()
+        # Assinatura do arquivo cuja recarga falhou, que só é tentado de novo quando mudar
+        self._assinatura_com_falha : tuple | None = None
+        self._dados = _Dados(carregar(), 1, self._assinatura())
+        self._rotas : dict[tuple[str, str], Callable[..., Resposta]] = {
+            ('GET', '/cursos')                     : self._cursos,
+            ('GET', '/disciplinas')                : self._disciplinas,
+            ('GET', '/disciplinas/compartilhadas') : self._compartilhadas,
+            ('GET', '/sugestoes/cursos')           : self._sugestoes_de_cursos,
+            ('GET', '/sugestoes/disciplinas')      : self._sugestoes_de_disciplinas,
+            ('GET', '/sugestoes/codigos')          : self._sugestoes_de_codigos,
+        }
+        # Rotas de busca, que só precisam da thread quando nada é encontrado e as sugestões são calculadas
+        self._buscas = {('GET', '/cursos'), ('GET', '/disciplinas')}
+        self._codificador = json.JSONEncoder(ensure_ascii=False)
+
+    def _assinatura(self) -> tuple | None:
+        """
+        Identifica a versão do arquivo de origem pela data de modificação e tamanho.
+        """
+        if self._caminho is None:
+            return None
+        try:
+            estado = os.stat(self._caminho)
+        except FileNotFoundError:
+            return None
+        return (estado.st_mtime_ns, estado.st_size)
+
+    async def recarregar(self) -> int:
+        """
+        Carrega os dados novamente, em uma thread para que o servidor continue
+        respondendo com os dados antigos, e troca os dados de uma vez.
+
+        :return: A versão dos novos dados.
+        :rtype: int
+        """
+        async with self._trava_da_recarga:
+            assinatura = self._assinatura()
+            usp = await asyncio.to_thread(self._carregar)
+            antigos = self._dados
+            self._dados = _Dados(usp, antigos.versao + 1, assinatura)
+            # As consultas que começaram com os dados antigos terminam antes deles serem fechados
+            if antigos.pendentes:
+                await asyncio.wait(antigos.pendentes)
+            antigos.usp.fechar()
+            return self._dados.versao
+
+    async def _vigiar(self) -> None:
+        """
+        Recarrega os dados sempre que o arquivo de origem muda. Os snapshots
+        e bancos são escritos em um arquivo temporario e renomeados, então
+        quando a assinatura muda o arquivo já está completo.
+        """
+        while True:
+            await asyncio.sleep(self._intervalo)
+            assinatura = self._assinatura()
+            if assinatura is None or assinatura in (self._dados.assinatura, self._assinatura_com_falha):
+                continue
+            try:
+                versao = await self.recarregar()
+            except Exception:
+                # Um arquivo com defeito é tentado de novo só quando for escrito outra vez
+                self._assinatura_com_falha = assinatura
+                print('Falha ao recarregar os dados:')
+                traceback.print_exc()
+            else:
+                self._assinatura_com_falha = None
+                print(f'Dados recarregados, versão {versao}.')
+
+    def _json(self, status : int, valor) -> Resposta:
+        return (status, self._codificador.encode(valor).encode('utf-8'))
+
+    def _consulta(self, dados : _Dados, pedido : dict, sugerir : bool = True) -> Resposta:
+        resultado = dados.lote.responder(pedido, sugerir)
+        if 'erro' in resultado:
+            return self._json(400, resultado)
+        return self._json(200 if resultado.get('encontrado', True) else 404, resultado)
+
+    def _cursos(self, dados : _Dados, parametros : dict[str, str], sugerir : bool = True) -> Resposta:
+        return self._consulta(dados, {'comando' : 'ddc', 'nome' : parametros.get('nome', '')}, sugerir)
+
+    def _disciplinas(self, dados : _Dados, parametros : dict[str, str], sugerir : bool = True) -> Resposta:
+        if 'codigo' in parametros:
+            return self._consulta(dados, {'comando' : 'ddd', 'codigo' : parametros['codigo']}, sugerir)
+        return self._consulta(dados, {'comando' : 'ddd', 'nome' : parametros.get('nome', '')}, sugerir)
+
+    def _compartilhadas(self, dados : _Dados, parametros : dict[str, str]) -> Resposta:
+        return self._consulta(dados, {'comando' : 'ddmc'})
+
+    def _sugestoes_de_cursos(self, dados : _Dados, parametros : dict[str, str]) -> Resposta:
+        return self._json(200, {'consulta' : parametros.get('nome', ''),
+                                'sugestoes' : dados.usp.sugerir_cursos(parametros.get('nome', ''))})
+
+    def _sugestoes_de_disciplinas(self, dados : _Dados, parametros : dict[str, str]) -> Resposta:
+        return self._json(200, {'consulta' : parametros.get('nome', ''),
+                                'sugestoes' : dados.usp.sugerir_disciplinas(parametros.get('nome', ''))})
+
+    def _sugestoes_de_codigos(self, dados : _Dados, parametros : dict[str, str]) -> Resposta:
+        return self._json(200, {'consulta' : parametros.get('codigo', ''), 'sugestoes' : [
+            {'codigo' : disciplina.get_codigo(), 'nome' : disciplina.get_nome()}
+            for disciplina in dados.usp.sugerir_codigos(parametros.get('codigo', ''))]})
+
+    async def _em_thread(self, dados : _Dados, rota : Callable[..., Resposta], parametros : dict[str, str]) -> Resposta:
+        """
+        Faz uma consulta em uma thread, para que o servidor continue respondendo
+        as outras conexões, e a guarda nas consultas pendentes dos dados.
+        """
+        consulta = asyncio.ensure_future(asyncio.to_thread(rota, dados, parametros))
+        dados.pendentes.add(consulta)
+        consulta.add_done_callback(dados.pendentes.discard)
+        return await consulta
+
+    async def _responder_consulta(self, metodo : str, alvo : str) -> Resposta:
+        """
+        Responde uma requisição de consulta, pelo cache quando possivel.
+        As respostas são guardadas pelo alvo inteiro (caminho e parametros).
+        As buscas encontradas são respondidas direto, sem o custo da thread,
+        e as demais consultas são feitas em uma thread.
+        """
+        dados = self._dados
+        if metodo == 'GET':
+            resposta = dados.cache.get(alvo)
+            if resposta is not None:
+                dados.cache.move_to_end(alvo)
+                return resposta
+
+        partes = urlsplit(alvo)
+        rota = self._rotas.get((metodo, partes.path))
+        if rota is None:
+            if any(caminho == partes.path for _, caminho in self._rotas):
+                return self._json(405, {'erro' : 'Método não permitido.'})
+            return self._json(404, {'erro' : 'Rota não existe.'})
+
+        parametros = {chave : valores[0] for chave, valores in parse_qs(partes.query).items()}
+        resposta = None
+        if (metodo, partes.path) in self._buscas:
+            resposta = rota(dados, parametros, sugerir=False)
+            if resposta[0] == 404:
+                resposta = None
+        if resposta is None:
+            resposta = await self._em_thread(dados, rota, parametros)
+
+        dados.cache[alvo] = resposta
+        if len(dados.cache) > self.TAMANHO_DO_CACHE:
+            dados.cache.popitem(last=False)
+        return resposta
+
+    async def _responder(self, metodo : str, alvo : str) -> Resposta:
+        caminho = urlsplit(alvo).path
+        if caminho == '/saude':
+            return self._json(200, {'versao' : self._dados.versao, 'carregado_em' : self._dados.carregado_em,
+                                    'respostas_em_cache' : len(self._dados.cache)})
+        if caminho == '/recarregar':
+            if metodo != 'POST':
+                return self._json(405, {'erro' : 'Método não permitido.'})
+            try:
+                return self._json(200, {'versao' : await self.recarregar()})
+            except Exception:
+                # Os detalhes do erro ficam no log do servidor, e não na resposta
+                traceback.print_exc()
+                return self._json(500, {'erro' : 'Falha ao recarregar os dados.'})
+
+        return await self._responder_consulta(metodo, alvo)
+
+    async def _conexao(self, leitor : asyncio.StreamReader, escritor : asyncio.StreamWriter) -> None:
+        """
+        Atende as requisições de uma conexão, mantendo a conexão aberta
+        entre as requisições (keep-alive) até que o cliente a feche.
+        """
+        try:
+            while True:
+                try:
+                    cabecalho = await leitor.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    escritor.write(self._http(413, b'{}', False))
+                    return
+
+                linhas = cabecalho.decode('latin-1').split('\r\n')
+                try:
+                    metodo, alvo, versao = linhas[0].split(' ')
+                except ValueError:
+                    escritor.write(self._http(400, b'{}', False))
+                    return
+
+                campos = {}
+                for linha in linhas[1:]:
+                    nome, _, valor = linha.partition(':')
+                    campos[nome.strip().lower()] = valor.strip()
+
+                # O corpo não é utilizado por nenhuma rota, mas precisa ser lido da conexão
+                tamanho_do_corpo = int(campos.get('content-length', 0) or 0)
+                if tamanho_do_corpo > self.TAMANHO_MAXIMO_DO_CORPO:
+                    escritor.write(self._http(413, b'{}', False))
+                    return
+                if tamanho_do_corpo:
+                    await leitor.readexactly(tamanho_do_corpo)
+
+                manter = campos.get('connection', '').lower() != 'close' and versao == 'HTTP/1.1'
+                try:
+                    status, corpo = await self._responder(metodo, alvo)
+                except Exception:
+                    traceback.print_exc()
+                    status, corpo = self._json(500, {'erro' : 'Erro interno do servidor.'})
+
+                escritor.write(self._http(status, corpo, manter))
+                await escritor.drain()
+                if not manter:
+                    return
+        except (ConnectionError, ValueError):
+            return
+        finally:
+            escritor.close()
+
+    def _http(self, status : int, corpo : bytes, manter : bool) -> bytes:
+        return (f'HTTP/1.1 {status} {STATUS[status]}\r\n'
+                f'Content-Type: application/json; charset=utf-8\r\n'
+                f'Content-Length: {len(corpo)}\r\n'
+                f'Connection: {"keep-alive" if manter else "close"}\r\n\r\n').encode('latin-1') + corpo
+
+    async def servir(self, endereco : str = '127.0.0.1', porta : int = 8080) -> None:
+        """
+        Inicia o servidor e atende as conexões até ser interrompido.
+
+        :param endereco: Endereço em que o servidor escuta.
+        :type endereco: str
+        :param porta: Porta em que o servidor escuta.
+        :type porta: int
+        """
+        servidor = await asyncio.start_server(self._conexao, endereco, porta)
+        vigia = asyncio.create_task(self._vigiar()) if self._caminho is not None else None
+        print(f'Servidor de consultas em http://{endereco}:{porta}')
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            if vigia is not None:
+                vigia.cancel()
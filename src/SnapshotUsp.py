@@ -0,0 +1,144 @@
+import hashlib
+import io
+import os
+import pickle
+import struct
+import zlib
+
+# Todo snapshot começa com esse cabeçalho seguido da versão do formato
+MAGICO = b'USPSNAP\x00'
+# Versão 2: adiciona as impressões digitais de cada curso
+# Versão 3: adiciona os snapshots delta, com apenas o que mudou desde um snapshot base
+VERSAO = 3
+_CABECALHO = struct.Struct('>8sH')
+
+# Quantidade maxima de deltas seguidos. Depois dela o snapshot é escrito completo,
+# para que carregar um snapshot não precise ler uma cadeia longa de arquivos
+MAXIMO_DE_DELTAS = 7
+
+# Em um delta cada tabela guarda só a ordem dos nomes ou códigos, e as tuplas que mudaram ficam nessa chave
+_ALTERADOS = {'cursos' : 'cursos_alterados', 'disciplinas' : 'disciplinas_alteradas'}
+
+class _UnpicklerSeguro(pickle.Unpickler):
+    """
+    O snapshot só contém tipos simples (tuplas, listas, dicionarios e
+    strings), então qualquer tentativa de carregar uma classe indica
+    um arquivo corrompido ou malicioso.
+    """
+    def find_class(self, modulo : str, nome : str):
+        raise pickle.UnpicklingError(f'Snapshot invalido: {modulo}.{nome} não é permitido.')
+
+def _impressao_do_arquivo(caminho : str) -> str:
+    impressao = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda : arquivo.read(1 << 20), b''):
+            impressao.update(bloco)
+    return impressao.hexdigest()
+
+def _delta(dados : dict, caminho : str, base : str) -> dict | None:
+    """
+    Calcula o delta dos dados em relação ao snapshot base: os cursos e as
+    disciplinas cujas tuplas mudaram ou são novas, e a ordem de todos
+    eles, para que o snapshot carregado seja igual ao completo.
+
+    :return: O delta, ou None caso o snapshot deva ser escrito completo.
+    :rtype: dict | None
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    if os.path.abspath(base) == os.path.abspath(caminho):
+        return None
+    anteriores = ler_snapshot(base)
+    if anteriores['deltas'] >= MAXIMO_DE_DELTAS:
+        return None
+
+    delta = {
+        'base'       : {'caminho' : os.path.relpath(os.path.abspath(base), pasta),
+                        'sha256'  : _impressao_do_arquivo(base)},
+        'unidades'   : dados['unidades'],
+        'impressoes' : dados['impressoes'],
+    }
+    for tabela, alterados in _ALTERADOS.items():
+        tuplas = {valores[0] : valores for valores in anteriores[tabela]}
+        delta[tabela] = [valores[0] for valores in dados[tabela]]
+        delta[alterados] = [valores for valores in dados[tabela] if tuplas.get(valores[0]) != valores]
+    return delta
+
+def escrever_snapshot(caminho : str, dados : dict, base : str | None = None) -> None:
+    """
+    Escreve os dados no arquivo de snapshot. O arquivo é escrito
+    em um arquivo temporario e depois renomeado, então um snapshot
+    antigo nunca fica pela metade.
+
+    Com um snapshot base apenas os cursos e as disciplinas que mudaram
+    desde ele são escritos (um delta), e o snapshot base precisa
+    continuar no mesmo lugar, e sem mudanças, para que o delta seja lido.
+
+    :param caminho: Caminho do arquivo de snapshot.
+    :type caminho: str
+    :param dados: Dicionario contendo apenas tipos simples, com as listas
+        de tuplas 'unidades', 'cursos' e 'disciplinas' e as 'impressoes'.
+    :type dados: dict
+    :param base: Caminho do snapshot base, ou None para escrever o snapshot completo.
+        O snapshot também é escrito completo quando o base é o proprio arquivo
+        ou já é o fim de uma cadeia de MAXIMO_DE_DELTAS deltas.
+    :type base: str | None
+    """
+    if base is not None:
+        delta = _delta(dados, caminho, base)
+        if delta is not None:
+            dados = delta
+    conteudo = zlib.compress(pickle.dumps(dados, protocol=pickle.HIGHEST_PROTOCOL), level=6)
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(_CABECALHO.pack(MAGICO, VERSAO))
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+def ler_snapshot(caminho : str) -> dict:
+    """
+    Lê os dados de um arquivo de snapshot. Um snapshot delta é juntado
+    ao seu snapshot base, então o resultado é sempre o snapshot completo.
+
+    :param caminho: Caminho do arquivo de snapshot.
+    :type caminho: str
+    :return: Os dados salvos no snapshot, mais a quantidade de 'deltas' lidos.
+    :rtype: dict
+    :raises ValueError: Se o arquivo não for um snapshot, se a versão do
+        snapshot não for suportada ou se o snapshot base de um delta mudou.
+    """
+    dados = _ler_arquivo(caminho)
+    base = dados.pop('base', None)
+    if base is None:
+        dados['deltas'] = 0
+        return dados
+
+    caminho_da_base = os.path.join(os.path.dirname(os.path.abspath(caminho)), base['caminho'])
+    if not os.path.isfile(caminho_da_base) or _impressao_do_arquivo(caminho_da_base) != base['sha256']:
+        raise ValueError(f'O snapshot base {caminho_da_base} do delta {caminho} não existe ou mudou.')
+    anteriores = ler_snapshot(caminho_da_base)
+
+    for tabela, alterados in _ALTERADOS.items():
+        tuplas = {valores[0] : valores for valores in anteriores[tabela]}
+        tuplas.update((valores[0], valores) for valores in dados.pop(alterados))
+        dados[tabela] = [tuplas[chave] for chave in dados[tabela]]
+    dados['deltas'] = anteriores['deltas'] + 1
+    return dados
+
+def _ler_arquivo(caminho : str) -> dict:
+    """
+    Lê os dados de um unico arquivo de snapshot, sem juntar um delta ao seu base.
+    """
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.read(_CABECALHO.size)
+        conteudo = arquivo.read()
+
+    if len(cabecalho) < _CABECALHO.size:
+        raise ValueError(f'{caminho} não é um snapshot valido.')
+
+    magico, versao = _CABECALHO.unpack(cabecalho)
+    if magico != MAGICO:
+        raise ValueError(f'{caminho} não é um snapshot valido.')
+    if versao > VERSAO:
+        raise ValueError(f'A versão {versao} do snapshot {caminho} não é suportada.')
+
+    return _UnpicklerSeguro(io.BytesIO(zlib.decompress(conteudo))).load()
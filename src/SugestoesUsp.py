@@ -0,0 +1,99 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Iterable
+
+from .IndiceUsp import normalizar
+
+def trigramas(texto : str) -> set[str]:
+    """
+    Separa um texto em trigramas. O texto é completado com espaços
+    para que o inicio e o fim das palavras também tenham trigramas.
+    """
+    texto = f'  {texto} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def escolher(procurado : str, candidatos : Iterable[tuple[int, str, str]], n : int, corte : float) -> list[str]:
+    """
+    Compara os candidatos escolhidos pelos trigramas com o nome procurado
+    e escolhe as sugestões. Compartilhada pelo SugestoesUsp e pelas
+    sugestões do BancoUsp, que escolhem os candidatos no banco.
+
+    :param procurado: Nome procurado, já normalizado.
+    :type procurado: str
+    :param candidatos: Tuplas (posição, nome, nome normalizado) dos candidatos.
+        A posição desempata as sugestões com a mesma similaridade.
+    :type candidatos: Iterable[tuple[int, str, str]]
+    :param n: Quantidade maxima de sugestões.
+    :type n: int
+    :param corte: Similaridade minima, entre 0 e 1, de uma sugestão.
+    :type corte: float
+    :return: As sugestões, da mais próxima para a menos próxima.
+    :rtype: list[str]
+    """
+    comparador = SequenceMatcher()
+    comparador.set_seq2(procurado)
+    pontuados = []
+    for posicao, nome, normalizado in candidatos:
+        comparador.set_seq1(normalizado)
+        if comparador.real_quick_ratio() >= corte and comparador.quick_ratio() >= corte:
+            similaridade = comparador.ratio()
+            if similaridade >= corte:
+                pontuados.append((-similaridade, posicao, nome))
+
+    return [nome for _, _, nome in sorted(pontuados)[:n]]
+
+class SugestoesUsp:
+    """
+    A classe SugestoesUsp é um indice invertido de trigramas para
+    sugerir nomes próximos a um nome não encontrado. Os candidatos
+    são escolhidos pelos trigramas em comum com o nome procurado e
+    apenas os melhores são comparados com o SequenceMatcher, ao
+    invés de comparar o nome procurado com todos os nomes.
+    """
+
+    nomes : list[str]
+
+    # Quantos candidatos, para cada sugestão pedida, passam para a comparação final
+    CANDIDATOS_POR_SUGESTAO = 10
+
+    def __init__(self, nomes : Iterable[str]) -> None:
+        """
+        :param nomes: Nomes que podem ser sugeridos.
+        :type nomes: Iterable[str]
+        """
+        self.nomes = list(dict.fromkeys(nomes))
+        self._normalizados = [normalizar(nome) for nome in self.nomes]
+        self._tamanhos : list[int] = []
+        self._indice : dict[str, list[int]] = {}
+
+        for posicao, normalizado in enumerate(self._normalizados):
+            do_nome = trigramas(normalizado)
+            self._tamanhos.append(len(do_nome))
+            for trigrama in do_nome:
+                self._indice.setdefault(trigrama, []).append(posicao)
+
+    def sugerir(self, nome : str, n : int = 5, corte : float = 0.6) -> list[str]:
+        """
+        Sugere os nomes mais próximos do nome procurado.
+
+        :param nome: Nome procurado.
+        :type nome: str
+        :param n: Quantidade maxima de sugestões.
+        :type n: int
+        :param corte: Similaridade minima, entre 0 e 1, de uma sugestão.
+        :type corte: float
+        :return: As sugestões, da mais próxima para a menos próxima.
+        :rtype: list[str]
+        """
+        procurado = normalizar(nome)
+        do_procurado = trigramas(procurado)
+
+        em_comum : Counter = Counter()
+        for trigrama in do_procurado:
+            em_comum.update(self._indice.get(trigrama, ()))
+
+        # Coeficiente de Dice dos trigramas, que é barato de calcular para todos os candidatos
+        candidatos = sorted(em_comum, key=lambda posicao: (-2 * em_comum[posicao] / (len(do_procurado) + self._tamanhos[posicao]), posicao))
+        candidatos = candidatos[:n * self.CANDIDATOS_POR_SUGESTAO]
+
+        return escolher(procurado, ((posicao, self.nomes[posicao], self._normalizados[posicao]) for posicao in candidatos), n, corte)
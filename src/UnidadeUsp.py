@@ -1,19 +1,53 @@
 import re
+from array import array
+
+from .RegistroUsp import RegistrosUsp
 
 class UnidadeUsp:
     """
     A classe UnidadeUsp representa uma unidade da USP.
     Ela contem o nome da unidade, a sigla da unidade
-    e os cursos que essa unidade possui.
+    e os cursos que essa unidade possui. O nome e os
+    cursos são guardados como identificadores dos
+    registros de unidades e de cursos.
     """
-    nome : str
+    __slots__ = ('registros', 'id', 'sigla', 'cursos')
+
+    registros : RegistrosUsp
+    id : int
     sigla : str
-    cursos : set[str]
+    cursos : array
 
-    def __init__(self, nome : str, cursos : set[str]):
-        self.nome = nome
+    def __init__(self, nome : str, cursos : set[str], registros : RegistrosUsp):
+        self.registros = registros
+        self.id = registros.unidades.id(nome)
         self.sigla : str = re.findall(r'\(([^\)]+)\)', nome)[0].strip()
-        self.cursos = cursos
+        self.cursos = array('I', (registros.cursos.id(curso) for curso in sorted(cursos)))
+
+    @classmethod
+    def de_tupla(cls, valores : tuple, registros : RegistrosUsp) -> 'UnidadeUsp':
+        """
+        Cria uma unidade a partir da tupla gerada por para_tupla.
+
+        :param valores: Tupla com o nome e os cursos da unidade.
+        :type valores: tuple
+        :param registros: Registros dos nomes dos dados da unidade.
+        :type registros: RegistrosUsp
+        :return: A unidade.
+        :rtype: UnidadeUsp
+        """
+        nome, cursos = valores
+        return cls(nome, set(cursos), registros)
+
+    def para_tupla(self) -> tuple:
+        """
+        Representa a unidade como uma tupla de valores simples,
+        utilizada para salvar a unidade em disco.
+
+        :return: Tupla com o nome e os cursos da unidade.
+        :rtype: tuple
+        """
+        return (self.get_nome(), tuple(sorted(self.get_cursos())))
 
     def get_nome(self) -> str:
         """
@@ -22,7 +56,7 @@ class UnidadeUsp:
         :return: Nome da unidade.
         :rtype: str
         """
-        return self.nome
+        return self.registros.unidades.nome(self.id)
     
     def get_sigla(self) -> str:
         """
@@ -41,7 +75,7 @@ class UnidadeUsp:
         :return: Conjunto de nomes de cursos.
         :rtype: set[str]
         """
-        return self.cursos
+        return {self.registros.cursos.nome(identificador) for identificador in self.cursos}
     
     def get_cursos_str(self) -> str:
         """
@@ -52,13 +86,38 @@ class UnidadeUsp:
             e um indicador de qual unidade eles pertencem.
         :rtype: str
         """
-        str_cursos = f'Cursos da {self.sigla}:\n'
-        for curso in self.cursos:
-            str_cursos += f'\t{curso}\n'
+        return ''.join(self._partes_dos_cursos())
+
+    def _partes_dos_cursos(self):
+        yield f'Cursos da {self.sigla}:\n'
+        cursos = self.registros.cursos.nomes
+        for identificador in self.cursos:
+            yield f'\t{cursos[identificador]}\n'
+
+    def para_dicionario(self) -> dict:
+        """
+        Representa a unidade como um dicionario, utilizado nas saidas
+        JSON Lines e CSV.
+
+        :return: Dicionario com o nome, a sigla e os cursos da unidade.
+        :rtype: dict
+        """
+        return {
+            'unidade' : self.get_nome(),
+            'sigla'   : self.sigla,
+            'cursos'  : [self.registros.cursos.nome(identificador) for identificador in self.cursos],
+        }
+
+    def partes_do_texto(self):
+        """
+        Gera, em ordem, os pedaços da representação legivel da unidade,
+        para que ela possa ser escrita sem montar a string inteira.
+
+        :return: Gerador dos pedaços do texto.
+        :rtype: Iterator[str]
+        """
+        yield f'\n{self.get_nome()}\n'
+        yield from self._partes_dos_cursos()
 
-        return str_cursos
-    
     def __str__(self) -> str:
-        unidade_str = f'\n{self.nome}\n'
-        unidade_str += self.get_cursos_str()
-        return unidade_str
\ No newline at end of file
+        return ''.join(self.partes_do_texto())